@@ -9,27 +9,33 @@ import asyncio
 import logging
 import os
 
-from agent_framework import ChatAgent, MCPStreamableHTTPTool
+from agent_framework import ChatAgent, MCPStreamableHTTPTool, TextReasoningContent
 from agent_framework.openai import OpenAIResponsesClient
 from dotenv import load_dotenv
+from mcp_pool import MCPClientPool
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer
 from rich import print
 from rich.logging import RichHandler
 
 load_dotenv(override=True)
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
+logging.getLogger("mcp_pool").setLevel(logging.INFO)
 
-client = OpenAIResponsesClient(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none",
-    model_id=os.environ["NIM_MODEL"],
-)
+client = OpenAIResponsesClient(async_client=get_async_client(), model_id=os.environ["NIM_MODEL"])
+pool = MCPClientPool.from_env("http://localhost:8000/mcp/")
 
 
 async def main():
-    async with MCPStreamableHTTPTool(
-        name="hotels", description="Provides tools for hotel search", url="http://localhost:8000/mcp/"
-    ) as mcp_server:
+    async with (
+        pool,
+        MCPStreamableHTTPTool(
+            name="hotels", description="Provides tools for hotel search", url=pool.url, session=pool.session()
+        ) as mcp_server,
+    ):
         agent = ChatAgent(
             chat_client=client, name="Assistant", instructions="Use the tools to achieve the task", tools=mcp_server
         )
@@ -38,8 +44,21 @@ async def main():
             "Find me a hotel in San Francisco for 2 nights starting from 2024-01-01."
             "I need a hotel with free WiFi and a pool."
         )
-        response = await agent.run(message)
-        print(response.text)
+        if STREAM:
+            renderer = StreamRenderer()
+            async for update in agent.run_stream(message):
+                for content in update.contents:
+                    event = content.raw_representation
+                    # Agent Framework also repeats the complete reasoning text once the item is done
+                    if isinstance(content, TextReasoningContent) and event.type == "response.reasoning_text.delta":
+                        renderer.reasoning(content.text, event.item_id)
+                if update.text:
+                    renderer.text(update.text)
+            renderer.finish()
+        else:
+            response = await agent.run(message)
+            print(response.text)
+    pool.log_stats()
 
 
 if __name__ == "__main__":
@@ -8,23 +8,26 @@ import asyncio
 import logging
 import os
 
-from agent_framework import ChatAgent, MCPStreamableHTTPTool
+from agent_framework import ChatAgent, MCPStreamableHTTPTool, TextReasoningContent
 from agent_framework.observability import setup_observability
 from agent_framework.openai import OpenAIResponsesClient
 from dotenv import load_dotenv
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer
 from rich import print
 from rich.logging import RichHandler
+from telemetry import telemetry_from_env
 
 load_dotenv(override=True)
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
-setup_observability(enable_sensitive_data=True)
+# One bootstrap per process: NIM_TELEMETRY installs its own providers, which Agent Framework's would replace
+if not telemetry_from_env(os.environ):
+    setup_observability(enable_sensitive_data=True)
 
-client = OpenAIResponsesClient(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none",
-    model_id=os.environ["NIM_MODEL"],
-)
+client = OpenAIResponsesClient(async_client=get_async_client(), model_id=os.environ["NIM_MODEL"])
 
 
 async def main():
@@ -36,8 +39,20 @@ async def main():
         )
 
         message = "Does Azure offer serverless GPUs?"
-        response = await agent.run(message)
-        print("Response: ", response.text)
+        if STREAM:
+            renderer = StreamRenderer()
+            async for update in agent.run_stream(message):
+                for content in update.contents:
+                    event = content.raw_representation
+                    # Agent Framework also repeats the complete reasoning text once the item is done
+                    if isinstance(content, TextReasoningContent) and event.type == "response.reasoning_text.delta":
+                        renderer.reasoning(content.text, event.item_id)
+                if update.text:
+                    renderer.text(update.text)
+            renderer.finish()
+        else:
+            response = await agent.run(message)
+            print("Response: ", response.text)
 
 
 if __name__ == "__main__":
@@ -8,26 +8,30 @@ from typing import Annotated
 from agent_framework import ChatAgent
 from agent_framework.openai import OpenAIResponsesClient
 from dotenv import load_dotenv
-from pydantic import Field
+from fanout import gather_bounded
+from nim_cassette import recorded_tool
+from nim_client import get_async_client
+from pydantic import BaseModel, Field
 from rich import print
 from rich.logging import RichHandler
+from telemetry import agent_span, traced_agent_run, traced_tool
+from tool_cache import cached_tool
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger("multi_agent_assistant")
 
 load_dotenv(override=True)
 
-client = OpenAIResponsesClient(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none",
-    model_id=os.environ["NIM_MODEL"],
-)
+client = OpenAIResponsesClient(async_client=get_async_client(), model_id=os.environ["NIM_MODEL"])
 
 # ----------------------------------------------------------------------------------
 # Sub-agent 1 tools: weekend planning
 # ----------------------------------------------------------------------------------
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=600)
 def get_weather(
     city: Annotated[str, Field(description="The city to get the weather for.")],
     date: Annotated[str, Field(description="The date to get weather for in format YYYY-MM-DD.")],
@@ -40,6 +44,9 @@ def get_weather(
         return {"temperature": 60, "description": "Rainy"}
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=3600)
 def get_activities(
     city: Annotated[str, Field(description="The city to get activities for.")],
     date: Annotated[str, Field(description="The date to get activities for in format YYYY-MM-DD.")],
@@ -53,6 +60,8 @@ def get_activities(
     ]
 
 
+@traced_tool
+@recorded_tool
 def get_current_date() -> str:
     """Gets the current date from the system (YYYY-MM-DD)."""
     logger.info("Getting current date")
@@ -73,7 +82,8 @@ weekend_agent = ChatAgent(
 async def plan_weekend(query: str) -> str:
     """Plan a weekend based on user query and return the final response."""
     logger.info("Tool: plan_weekend invoked")
-    response = await weekend_agent.run(query)
+    with agent_span("weekend_planner"):
+        response = await weekend_agent.run(query)
     return response.text
 
 
@@ -82,6 +92,9 @@ async def plan_weekend(query: str) -> str:
 # ----------------------------------------------------------------------------------
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=3600)
 def find_recipes(
     query: Annotated[str, Field(description="User query or desired meal/ingredient")],
 ) -> list[dict]:
@@ -114,6 +127,9 @@ def find_recipes(
     return recipes
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=60)
 def check_fridge() -> list[str]:
     """Returns a JSON list of ingredients currently in the fridge."""
     logger.info("Checking fridge for current ingredients")
@@ -138,7 +154,8 @@ meal_agent = ChatAgent(
 async def plan_meal(query: str) -> str:
     """Plan a meal based on user query and return the final response."""
     logger.info("Tool: plan_meal invoked")
-    response = await meal_agent.run(query)
+    with agent_span("meal_planner"):
+        response = await meal_agent.run(query)
     return response.text
 
 
@@ -157,10 +174,77 @@ supervisor_agent = ChatAgent(
 )
 
 
+# ----------------------------------------------------------------------------------
+# Fan-out supervisor: plan once, run sub-agents concurrently, synthesize once
+# ----------------------------------------------------------------------------------
+
+# "tools" lets the supervisor call sub-agents as tools, one model turn each.
+# "fanout" plans up front and runs the needed sub-agents concurrently.
+SUPERVISOR_MODE = os.getenv("SUPERVISOR_MODE", "tools")
+MAX_CONCURRENT_SUBAGENTS = int(os.getenv("MAX_CONCURRENT_SUBAGENTS", "2"))
+
+
+class FanoutPlan(BaseModel):
+    weekend_query: str | None = Field(
+        default=None, description="Query for the weekend planning agent, or null if it is not needed."
+    )
+    meal_query: str | None = Field(
+        default=None, description="Query for the meal planning agent, or null if it is not needed."
+    )
+
+
+planner_agent = ChatAgent(
+    chat_client=client,
+    instructions=(
+        "You are a supervisor managing two specialist agents: a weekend planning agent and a meal planning agent. "
+        "Break down the user's request into a clear, concise query for each specialist that is needed. "
+        "Leave the query empty for a specialist that is not needed."
+    ),
+)
+
+synthesizer_agent = ChatAgent(
+    chat_client=client,
+    instructions=(
+        "You are a supervisor combining answers from specialist agents. "
+        "Synthesize them into a single helpful answer to the user's request. "
+        "When there are no specialist answers, answer the user's request yourself."
+    ),
+)
+
+
+async def run_fanout(user_query: str) -> str:
+    """Plans the sub-agent calls, runs them concurrently and synthesizes a single answer."""
+    response = await planner_agent.run(user_query, response_format=FanoutPlan)
+    plan = response.value or FanoutPlan(weekend_query=user_query, meal_query=user_query)
+    specialists = []
+    if plan.weekend_query:
+        specialists.append(
+            ("Weekend plan", lambda: traced_agent_run("weekend_planner", weekend_agent.run(plan.weekend_query)))
+        )
+    if plan.meal_query:
+        specialists.append(("Meal plan", lambda: traced_agent_run("meal_planner", meal_agent.run(plan.meal_query))))
+    logger.info(f"Fan-out to {len(specialists)} sub-agent(s)")
+    if not specialists:
+        # Nothing to fan out, answer in a single synthesizer turn without tools
+        return (await synthesizer_agent.run(user_query)).text
+
+    results = await gather_bounded(*(run for _, run in specialists), limit=MAX_CONCURRENT_SUBAGENTS)
+    if len(results) == 1:
+        # A single specialist answer needs no extra synthesis turn
+        return results[0].text
+    answers = "\n\n".join(f"## {title}\n{result.text}" for (title, _), result in zip(specialists, results))
+    response = await synthesizer_agent.run(f"User request: {user_query}\n\nSpecialist answers:\n\n{answers}")
+    return response.text
+
+
 async def main():
     user_query = "my kids want pasta for dinner"
-    response = await supervisor_agent.run(user_query)
-    print(response.text)
+    with agent_span("supervisor"):
+        if SUPERVISOR_MODE == "fanout":
+            print(await run_fanout(user_query))
+            return
+        response = await supervisor_agent.run(user_query)
+        print(response.text)
 
 
 if __name__ == "__main__":
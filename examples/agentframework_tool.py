@@ -4,25 +4,31 @@ import os
 import random
 from typing import Annotated
 
-from agent_framework import ChatAgent
+from agent_framework import ChatAgent, TextReasoningContent
 from agent_framework.openai import OpenAIResponsesClient
 from dotenv import load_dotenv
+from nim_cassette import recorded_tool
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer
 from pydantic import Field
 from rich import print
 from rich.logging import RichHandler
+from telemetry import traced_tool
+from tool_cache import cached_tool
 
 load_dotenv(override=True)
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger("weather_assistant")
 
-client = OpenAIResponsesClient(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none",
-    model_id=os.environ["NIM_MODEL"],
-)
+client = OpenAIResponsesClient(async_client=get_async_client(), model_id=os.environ["NIM_MODEL"])
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=600)
 def get_weather(
     city: Annotated[str, Field(description="City name, spelled out fully")],
 ) -> dict:
@@ -46,6 +52,18 @@ agent = ChatAgent(
 
 
 async def main():
+    if STREAM:
+        renderer = StreamRenderer()
+        async for update in agent.run_stream("how's weather today in sf?"):
+            for content in update.contents:
+                event = content.raw_representation
+                # Agent Framework also repeats the complete reasoning text once the item is done
+                if isinstance(content, TextReasoningContent) and event.type == "response.reasoning_text.delta":
+                    renderer.reasoning(content.text, event.item_id)
+            if update.text:
+                renderer.text(update.text)
+        renderer.finish()
+        return
     response = await agent.run("how's weather today in sf?")
     print(response.text)
 
@@ -0,0 +1,357 @@
+"""Runs a JSONL file of prompts through an agent with bounded concurrency.
+
+Each input line is a JSON object holding the prompt in `prompt`, `input` or `body` (after its
+`title`, if any) and an optional `id`, the line number otherwise. Input is read lazily, so files
+of any size work. Every result is appended to the output JSONL as soon as its item finishes, with the output,
+latency, attempts and token usage. A crashed or interrupted run resumes where it left off:
+items whose id already has an `ok` result in the output file are skipped.
+
+Agents:
+    responses          One Responses API call per prompt
+    openai_agents      The Spanish tutor from `openai_agents_basic.py`
+    pydanticai_tools   The weekend planner from `pydanticai_tools.py`
+    supervisor         The supervisor from `pydanticai_supervisor.py` (honours `SUPERVISOR_MODE`)
+
+Items failing with 429 or 503, after the OpenAI SDK's own `NIM_MAX_RETRIES`, are retried with
+exponential backoff and full jitter, waiting at least as long as the `Retry-After` header asks.
+
+Usage:
+    python examples/batch_runner.py prompts.jsonl --output results.jsonl --agent pydanticai_tools --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import asdict, dataclass
+
+import openai
+from dotenv import load_dotenv
+from nim_effort import effort_stats
+from nim_limiter import agent_scope, limiter_stats, retry_after_seconds
+
+logger = logging.getLogger("batch_runner")
+
+AGENTS = ("responses", "openai_agents", "pydanticai_tools", "supervisor")
+RETRYABLE_STATUS_CODES = (429, 503)
+PROMPT_FIELDS = ("prompt", "input", "body")
+
+
+@dataclass
+class Usage:
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+
+
+@dataclass
+class AgentResult:
+    output: str | dict
+    usage: Usage
+    metadata: dict | None = None  # written to the result record when set
+
+
+@dataclass
+class BatchItem:
+    id: str
+    prompt: str
+
+
+AgentRunner = Callable[[str], Awaitable[AgentResult]]
+
+
+def _pydanticai_usage(usage) -> Usage:
+    return Usage(
+        requests=usage.requests,
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        reasoning_tokens=usage.details.get("reasoning_tokens", 0),
+    )
+
+
+def load_agent(name: str) -> AgentRunner:
+    """Returns a coroutine function running one prompt through the named agent.
+
+    The example modules are imported here, so only the chosen framework is loaded.
+    """
+    if name == "responses":
+        from nim_client import get_async_client
+
+        client = get_async_client()
+        model = os.environ["NIM_MODEL"]
+
+        async def run_responses(prompt: str) -> AgentResult:
+            response = await client.responses.create(model=model, input=prompt)
+            usage = response.usage
+            return AgentResult(
+                output=response.output_text,
+                usage=Usage(
+                    requests=1,
+                    input_tokens=usage.input_tokens,
+                    output_tokens=usage.output_tokens,
+                    reasoning_tokens=usage.output_tokens_details.reasoning_tokens,
+                ),
+            )
+
+        return run_responses
+
+    if name == "openai_agents":
+        from agents import Runner
+        from openai_agents_basic import agent
+
+        async def run_openai_agents(prompt: str) -> AgentResult:
+            result = await Runner.run(agent, input=prompt)
+            usage = result.context_wrapper.usage
+            return AgentResult(
+                output=str(result.final_output),
+                usage=Usage(
+                    requests=usage.requests,
+                    input_tokens=usage.input_tokens,
+                    output_tokens=usage.output_tokens,
+                    reasoning_tokens=usage.output_tokens_details.reasoning_tokens,
+                ),
+            )
+
+        return run_openai_agents
+
+    if name == "pydanticai_tools":
+        from pydanticai_tools import agent
+
+        async def run_pydanticai(prompt: str) -> AgentResult:
+            result = await agent.run(prompt)
+            return AgentResult(output=str(result.output), usage=_pydanticai_usage(result.usage()))
+
+        return run_pydanticai
+
+    if name == "supervisor":
+        import pydanticai_supervisor as supervisor
+        from pydantic_ai.usage import RunUsage
+
+        async def run_supervisor(prompt: str) -> AgentResult:
+            if supervisor.SUPERVISOR_MODE == "fanout":
+                usage = RunUsage()
+                output = await supervisor.run_fanout(prompt, usage=usage)
+                return AgentResult(output=output, usage=_pydanticai_usage(usage))
+            result = await supervisor.supervisor_agent.run(prompt)
+            return AgentResult(output=str(result.output), usage=_pydanticai_usage(result.usage()))
+
+        return run_supervisor
+
+    raise ValueError(f"Unknown agent {name!r}, expected one of {AGENTS}")
+
+
+def read_items(path: str) -> Iterator[BatchItem]:
+    """Yields the prompts of a JSONL file one line at a time, skipping blank lines."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            field = next((field for field in PROMPT_FIELDS if record.get(field)), None)
+            if field is None:
+                raise ValueError(f"{path}:{line_number} has none of the prompt fields {PROMPT_FIELDS}")
+            prompt = record[field]
+            if field == "body" and record.get("title"):
+                prompt = f"{record['title']}\n\n{prompt}"
+            item_id = record.get("id", record.get("request_id", line_number))
+            yield BatchItem(id=str(item_id), prompt=prompt)
+
+
+def completed_ids(path: str) -> set[str]:
+    """Ids with a successful result in an existing output file; a torn last line is ignored."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record["id"]))
+    return done
+
+
+def _status_error(error: BaseException) -> openai.APIStatusError | None:
+    """The OpenAI HTTP error behind `error`, also when a framework wrapped it in its own exception."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, openai.APIStatusError):
+            return error
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def retry_delay(error: BaseException, attempt: int, base_delay: float, max_delay: float) -> float | None:
+    """Seconds to wait before retrying after `error`, or None when it should not be retried."""
+    status_error = _status_error(error)
+    if status_error is None or status_error.status_code not in RETRYABLE_STATUS_CODES:
+        return None
+    backoff = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+    return max(backoff, retry_after_seconds(status_error.response.headers) or 0.0)
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        run_agent: AgentRunner,
+        output_path: str,
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.run_agent = run_agent
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latencies: list[float] = []
+        self.usage = Usage()
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+
+    async def run_item(self, item: BatchItem) -> dict:
+        started = time.perf_counter()
+        for attempt in range(self.max_attempts):
+            try:
+                result = await self.run_agent(item.prompt)
+            except Exception as e:
+                delay = retry_delay(e, attempt, self.base_delay, self.max_delay)
+                if delay is None or attempt + 1 == self.max_attempts:
+                    return {
+                        "id": item.id,
+                        "status": "error",
+                        "error": f"{type(e).__name__}: {e}",
+                        "latency_s": round(time.perf_counter() - started, 3),
+                        "attempts": attempt + 1,
+                    }
+                self.retries += 1
+                logger.info("Item %s failed (%s), retrying in %.1fs", item.id, type(e).__name__, delay)
+                await asyncio.sleep(delay)
+            else:
+                record = {
+                    "id": item.id,
+                    "status": "ok",
+                    "output": result.output,
+                    "latency_s": round(time.perf_counter() - started, 3),
+                    "attempts": attempt + 1,
+                    "usage": asdict(result.usage),
+                }
+                if result.metadata is not None:
+                    record["metadata"] = result.metadata
+                return record
+
+    def _record(self, record: dict) -> None:
+        if record["status"] == "ok":
+            self.succeeded += 1
+            self.latencies.append(record["latency_s"])
+            for name, value in record["usage"].items():
+                setattr(self.usage, name, getattr(self.usage, name) + value)
+        else:
+            self.failed += 1
+            logger.warning("Item %s failed: %s", record["id"], record["error"])
+
+    async def run(self, items: Iterator[BatchItem], skip: set[str] = frozenset()) -> None:
+        """Feeds `items` to a fixed pool of workers through a bounded queue, appending each result."""
+        queue: asyncio.Queue[BatchItem | None] = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        with open(self.output_path, "a", encoding="utf-8") as output:
+
+            async def worker() -> None:
+                while (item := await queue.get()) is not None:
+                    record = await self.run_item(item)
+                    # Flush per item, so a crash loses at most the items still in flight
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    self._record(record)
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                for item in items:
+                    if item.id not in skip:
+                        await queue.put(item)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "p50_latency_s": statistics.median(latencies) if latencies else 0.0,
+            "p95_latency_s": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+            **asdict(self.usage),
+        }
+
+
+async def main(args: argparse.Namespace) -> None:
+    skip = completed_ids(args.output)
+    if skip:
+        logger.info("Resuming: %d items already done in %s", len(skip), args.output)
+    runner = BatchRunner(
+        load_agent(args.agent),
+        args.output,
+        concurrency=args.concurrency,
+        max_attempts=args.max_attempts,
+        base_delay=args.base_delay,
+        max_delay=args.max_delay,
+    )
+    started = time.perf_counter()
+    # Batch traffic queues separately from other agents in the process when the adaptive limiter is on
+    with agent_scope("batch"):
+        await runner.run(read_items(args.input), skip)
+    summary = runner.summary()
+    logger.info(
+        "%d ok, %d failed, %d retries in %.1fs; p50 %.2fs, p95 %.2fs; %d requests, %d input / %d output tokens",
+        summary["succeeded"],
+        summary["failed"],
+        summary["retries"],
+        time.perf_counter() - started,
+        summary["p50_latency_s"],
+        summary["p95_latency_s"],
+        summary["requests"],
+        summary["input_tokens"],
+        summary["output_tokens"],
+    )
+    for stats in limiter_stats():
+        logger.info("NIM concurrency limit %d, %d throttled responses", stats["limit"], stats["throttled"])
+    for stats in effort_stats():
+        logger.info(
+            "%s requests at %s effort: %d, %.0f reasoning tokens, p95 %.0f ms",
+            stats["class"],
+            stats["effort"],
+            stats["requests"],
+            stats["mean_reasoning_tokens"],
+            stats["p95_latency_ms"],
+        )
+
+
+if __name__ == "__main__":
+    load_dotenv(override=True)
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through an agent")
+    parser.add_argument("input", help="JSONL file with one prompt per line")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--agent", choices=AGENTS, default="responses")
+    parser.add_argument("--concurrency", type=int, default=4, help="Items processed at the same time")
+    parser.add_argument("--max-attempts", type=int, default=5, help="Attempts per item on 429 and 503")
+    parser.add_argument("--base-delay", type=float, default=1.0, help="Backoff before the first retry, doubling")
+    parser.add_argument("--max-delay", type=float, default=60.0, help="Upper bound of the backoff")
+    asyncio.run(main(parser.parse_args()))
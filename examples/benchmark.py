@@ -0,0 +1,254 @@
+"""Latency/throughput benchmark for the agent framework examples.
+
+Drives the same weekend-planner agent (`openai_agents_tools.py`, `pydanticai_tools.py`,
+`agentframework_tools.py`) and supervisor pattern (`pydanticai_supervisor.py`,
+`agentframework_supervisor.py`) at a configurable concurrency against the local mock NIM
+server, and reports p50/p95/p99 latency, requests/sec, framework overhead per model turn and
+peak RSS. Each variant runs in its own subprocess so memory numbers are not shared.
+
+Usage:
+    python examples/benchmark.py --requests 200 --concurrency 16 --ttft 0.05 --tokens-per-second 500
+
+Framework overhead per turn is the end-to-end latency that was not spent inside the mock
+server (HTTP stack, framework bookkeeping and tool execution), divided by the number of model
+turns the mock served.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import urllib.request
+from dataclasses import asdict, dataclass
+
+from mock_nim_server import MockNIMConfig, serve
+from rich.console import Console
+from rich.table import Table
+
+EXAMPLES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WEEKEND_QUERY = "what can I do this weekend in Seattle?"
+SUPERVISOR_QUERY = "my kids want pasta for dinner and i need a recipe"
+
+VARIANTS = [
+    "responses",
+    "openai_agents_tools",
+    "pydanticai_tools",
+    "agentframework_tools",
+    "pydanticai_supervisor",
+    "agentframework_supervisor",
+]
+
+
+@dataclass
+class VariantResult:
+    variant: str
+    requests: int
+    errors: int
+    concurrency: int
+    wall_seconds: float
+    requests_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    model_turns: int
+    overhead_per_turn_ms: float
+    peak_rss_mb: float
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def mock_base_url() -> str:
+    return os.environ["NIM_ENDPOINT"].rstrip("/").removesuffix("/v1")
+
+
+def mock_stats(reset: bool = False) -> dict:
+    request = urllib.request.Request(
+        mock_base_url() + ("/stats/reset" if reset else "/stats"), method="POST" if reset else "GET"
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def load_variant(variant: str):
+    """Imports the example module for a variant and returns an async callable running one request."""
+    if variant == "responses":
+        from nim_client import get_async_client
+
+        client = get_async_client()
+
+        async def run():
+            await client.responses.create(model=os.environ["NIM_MODEL"], input=WEEKEND_QUERY)
+
+        return run
+
+    module = __import__(variant)
+    if variant == "openai_agents_tools":
+        from agents import Runner
+
+        async def run():
+            await Runner.run(module.agent, input=WEEKEND_QUERY)
+
+        return run
+
+    agent = module.supervisor_agent if variant.endswith("_supervisor") else module.agent
+    query = SUPERVISOR_QUERY if variant.endswith("_supervisor") else WEEKEND_QUERY
+
+    async def run():
+        await agent.run(query)
+
+    return run
+
+
+async def run_worker(variant: str, requests: int, concurrency: int, warmup: int) -> VariantResult:
+    run = load_variant(variant)
+    # The examples log every tool call at INFO level, which would dominate the measurement
+    logging.disable(logging.INFO)
+
+    for _ in range(warmup):
+        await run()
+    mock_stats(reset=True)
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                await run()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_seconds = time.perf_counter() - started
+
+    stats = mock_stats()
+    latencies.sort()
+    turns = stats["requests"]
+    client_seconds = sum(latencies) - stats["server_seconds"]
+    return VariantResult(
+        variant=variant,
+        requests=len(latencies),
+        errors=errors,
+        concurrency=concurrency,
+        wall_seconds=wall_seconds,
+        requests_per_second=len(latencies) / wall_seconds if wall_seconds else 0.0,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p95_ms=percentile(latencies, 95) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+        model_turns=turns,
+        overhead_per_turn_ms=client_seconds / turns * 1000 if turns else 0.0,
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+async def run_variant_subprocess(variant: str, base_url: str, args: argparse.Namespace) -> VariantResult | None:
+    env = {**os.environ, "NIM_ENDPOINT": base_url, "NIM_MODEL": args.model}
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        os.path.join(EXAMPLES_DIR, "benchmark.py"),
+        "--worker",
+        variant,
+        "--requests",
+        str(args.requests),
+        "--concurrency",
+        str(args.concurrency),
+        "--warmup",
+        str(args.warmup),
+        cwd=EXAMPLES_DIR,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        Console(stderr=True).print(f"[red]{variant} failed:[/red]\n{stderr.decode()[-2000:]}")
+        return None
+    return VariantResult(**json.loads(stdout.decode().strip().splitlines()[-1]))
+
+
+def print_results(results: list[VariantResult]) -> None:
+    table = Table(title="NIM agent framework benchmark")
+    for column in (
+        "Variant",
+        "OK",
+        "Err",
+        "Req/s",
+        "p50 ms",
+        "p95 ms",
+        "p99 ms",
+        "Turns",
+        "Overhead/turn ms",
+        "Peak RSS MB",
+    ):
+        table.add_column(column, justify="left" if column == "Variant" else "right")
+    for r in results:
+        table.add_row(
+            r.variant,
+            str(r.requests),
+            str(r.errors),
+            f"{r.requests_per_second:.1f}",
+            f"{r.p50_ms:.1f}",
+            f"{r.p95_ms:.1f}",
+            f"{r.p99_ms:.1f}",
+            str(r.model_turns),
+            f"{r.overhead_per_turn_ms:.2f}",
+            f"{r.peak_rss_mb:.1f}",
+        )
+    Console().print(table)
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = MockNIMConfig(model=args.model, ttft=args.ttft, tokens_per_second=args.tokens_per_second)
+    results = []
+    async with serve(config) as base_url:
+        for variant in args.variants:
+            result = await run_variant_subprocess(variant, base_url, args)
+            if result:
+                results.append(result)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the agent framework examples against the mock NIM server")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=VARIANTS)
+    parser.add_argument("--requests", type=int, default=100, help="Agent runs per variant")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured runs before timing starts")
+    parser.add_argument("--ttft", type=float, default=0.0, help="Mock time-to-first-token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Mock generation speed, 0 is instant")
+    parser.add_argument("--model", default="gpt-oss-20b")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--worker", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = asyncio.run(run_worker(args.worker, args.requests, args.concurrency, args.warmup))
+        print(json.dumps(asdict(result)))
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,29 @@
+"""Bounded concurrency helper shared by the supervisor examples."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+async def gather_bounded(*factories: Callable[[], Awaitable[T]], limit: int) -> list[T]:
+    """Like `asyncio.gather`, but runs at most `limit` of the awaitables at the same time.
+
+    Each awaitable is only created by its factory once it gets a slot, and when one fails the others are
+    cancelled, so nothing is left running or never awaited.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await factory()
+
+    tasks = [asyncio.ensure_future(run(factory)) for factory in factories]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,222 @@
+"""Keeps the input of a long function-calling loop within a token budget.
+
+A Responses API loop that appends every `function_call` and `function_call_output` and resends
+the whole list pays prefill for the full conversation on every turn. `HistoryManager` holds the
+conversation and builds each request's input instead:
+
+    * tool outputs above `max_tool_output_tokens` are summarized (with `summarize`, e.g.
+      `model_summarizer(client, model)`) or truncated to their head and tail when added;
+    * with `keep_reasoning=True`, reasoning items are resent while the tool calls of the current
+      user turn are running, and dropped once the next user message arrives;
+    * above `budget_tokens`, outputs of earlier tool rounds are elided, then whole earlier user
+      turns are dropped, oldest first, keeping system messages;
+    * with `chain=True`, requests send only the new items with `previous_response_id`, and fall
+      back to a fresh, compacted input once the chained conversation exceeds the budget. The
+      server stores the conversation, so this saves upload, not prefill, unless it caches prefixes.
+
+Token counts use `tiktoken` when it is installed, and about 4 characters per token otherwise.
+`history.turns` records, per request, the tokens sent against resending the full history.
+"""
+
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+logger = logging.getLogger("history_manager")
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+except ImportError:
+    _encoding = None
+
+ELIDED_OUTPUT = "[output of an earlier tool call removed to save context]"
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def item_tokens(item: dict) -> int:
+    """Approximate tokens an input item adds to the prompt."""
+    if item.get("type") == "function_call_output":
+        return count_tokens(item["output"]) + 4
+    if item.get("type") == "function_call":
+        return count_tokens(item["name"] + item["arguments"]) + 4
+    if item.get("type") == "reasoning":
+        return sum(count_tokens(part.get("text", "")) for part in item.get("content") or []) + 4
+    content = item.get("content", "")
+    return count_tokens(content if isinstance(content, str) else json.dumps(content)) + 4
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Keeps the head and tail of `text` within about `max_tokens` tokens, marking the cut."""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = max(1, len(text) * max_tokens // tokens // 2)
+    return f"{text[:keep]}\n[... {tokens - max_tokens} tokens truncated ...]\n{text[-keep:]}"
+
+
+def model_summarizer(client, model: str, max_output_tokens: int = 256) -> Callable[[str], Awaitable[str]]:
+    """Summarizes a tool output with one extra, short model call."""
+
+    async def summarize(text: str) -> str:
+        response = await client.responses.create(
+            model=model,
+            instructions="Summarize this tool output. Keep every name, number, date and identifier.",
+            input=text,
+            max_output_tokens=max_output_tokens,
+        )
+        return response.output_text
+
+    return summarize
+
+
+@dataclass
+class TurnStats:
+    turn: int
+    sent_tokens: int  # approximate input tokens sent with the request
+    full_tokens: int  # approximate input tokens of resending the whole, uncompacted history
+    chained: bool
+    reported_input_tokens: int | None = None  # input tokens the server billed, including chained history
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.full_tokens - self.sent_tokens
+
+
+class HistoryManager:
+    def __init__(
+        self,
+        budget_tokens: int | None = None,
+        max_tool_output_tokens: int | None = 2000,
+        keep_reasoning: bool = False,
+        chain: bool = False,
+        summarize: Callable[[str], Awaitable[str]] | None = None,
+    ):
+        self.budget_tokens = budget_tokens
+        self.max_tool_output_tokens = max_tool_output_tokens
+        self.keep_reasoning = keep_reasoning
+        self.chain = chain
+        self.summarize = summarize
+        self.items: list[dict] = []
+        self.turns: list[TurnStats] = []
+        # What a loop resending everything would send: every item, with tool outputs as returned
+        self._full_tokens = 0
+        self._previous_response_id: str | None = None
+        self._chained_tokens = 0
+        self._unsent = 0  # items added since the last response, sent on their own when chaining
+
+    def add(self, item: dict) -> None:
+        """Adds a message or any other input item."""
+        if item.get("role") == "user" and self.keep_reasoning:
+            # The model answered the previous turn, its reasoning is no longer needed
+            self.items = [existing for existing in self.items if existing.get("type") != "reasoning"]
+        self.items.append(item)
+        self._unsent += 1
+        if item.get("type") != "reasoning":
+            self._full_tokens += item_tokens(item)
+
+    async def add_tool_output(self, call_id: str, output: str) -> None:
+        """Adds a `function_call_output`, summarized or truncated when above `max_tool_output_tokens`."""
+        self._full_tokens += count_tokens(output) + 4
+        limit = self.max_tool_output_tokens
+        if limit is not None and count_tokens(output) > limit:
+            if self.summarize is not None:
+                output = await self.summarize(output)
+            output = truncate(output, limit)
+        self.items.append({"type": "function_call_output", "call_id": call_id, "output": output})
+        self._unsent += 1
+
+    def add_response(self, response) -> None:
+        """Records a response's output items and the usage of the request that produced it."""
+        if self.turns:
+            self.turns[-1].reported_input_tokens = response.usage.input_tokens if response.usage else None
+        for item in response.output:
+            if item.type == "function_call":
+                self.add(
+                    {
+                        "type": "function_call",
+                        "call_id": item.call_id,
+                        "name": item.name,
+                        "arguments": item.arguments,
+                        "id": item.id,
+                        "status": None,
+                    }
+                )
+            elif item.type == "reasoning" and self.keep_reasoning:
+                self.add(item.model_dump(exclude_none=True))
+            elif item.type == "message":
+                self.add({"role": "assistant", "content": response.output_text})
+        self._previous_response_id = response.id
+        self._unsent = 0
+        if response.usage is not None:
+            # The server's copy of the conversation also holds what it wrote, reasoning included
+            self._chained_tokens += response.usage.output_tokens
+
+    def _current_turn_start(self) -> int:
+        for index in range(len(self.items) - 1, -1, -1):
+            if self.items[index].get("role") == "user":
+                return index
+        return 0
+
+    def _tokens(self, items: list[dict]) -> int:
+        return sum(item_tokens(item) for item in items)
+
+    def _compact(self) -> list[dict]:
+        """The history fitted into `budget_tokens`, as far as the current user turn allows."""
+        items = list(self.items)
+        if self.budget_tokens is None or self._tokens(items) <= self.budget_tokens:
+            return items
+        # Keep only the latest tool round's outputs in full
+        last_output = max(
+            (index for index, item in enumerate(items) if item.get("type") == "function_call_output"), default=-1
+        )
+        latest_round = last_output
+        while latest_round > 0 and items[latest_round - 1].get("type") == "function_call_output":
+            latest_round -= 1
+        for index, item in enumerate(items[:latest_round]):
+            if item.get("type") == "function_call_output" and item["output"] != ELIDED_OUTPUT:
+                items[index] = {**item, "output": ELIDED_OUTPUT}
+        # Then drop whole earlier turns, oldest first, which keeps tool calls paired with their outputs
+        turn_start = self._current_turn_start()
+        while self._tokens(items) > self.budget_tokens:
+            start = next((i for i in range(turn_start) if items[i].get("role") not in ("system", "developer")), None)
+            if start is None:
+                break
+            end = next((i for i in range(start + 1, turn_start) if items[i].get("role") == "user"), turn_start)
+            del items[start:end]
+            turn_start -= end - start
+        return items
+
+    def request(self) -> dict:
+        """Keyword arguments for `responses.create`: `input`, and `previous_response_id` when chaining."""
+        if self.chain and self._previous_response_id is not None:
+            new_items = self.items[len(self.items) - self._unsent :]
+            chained_tokens = self._chained_tokens + self._tokens(new_items)
+            if self.budget_tokens is None or chained_tokens <= self.budget_tokens:
+                self._chained_tokens = chained_tokens
+                self._record(self._tokens(new_items), chained=True)
+                return {"input": new_items, "previous_response_id": self._previous_response_id}
+            logger.info("Chained history reached %d tokens, starting over from a compacted input", chained_tokens)
+        items = self._compact()
+        self._chained_tokens = self._tokens(items)
+        self._record(self._chained_tokens, chained=False)
+        return {"input": items}
+
+    def _record(self, sent_tokens: int, chained: bool) -> None:
+        stats = TurnStats(len(self.turns) + 1, sent_tokens, self._full_tokens, chained)
+        self.turns.append(stats)
+        logger.info(
+            "Request %d: sent ~%d input tokens, full history ~%d, saved ~%d%s",
+            stats.turn,
+            stats.sent_tokens,
+            stats.full_tokens,
+            stats.saved_tokens,
+            " (chained)" if chained else "",
+        )
@@ -0,0 +1,148 @@
+"""Per-hotel, per-night room availability for the MCP server.
+
+Each hotel with bookings gets a segment tree over the nights of the booking horizon. "Rooms free
+for every night in a range" is a range-minimum query and a booking is a range add, both
+O(log nights). The trees are sparse: only nodes touched by a booking are stored, every other night
+has the hotel's base number of free rooms, so hotels that are only looked at cost nothing.
+Bookings check and update under a lock, so concurrent requests cannot overbook a night.
+
+The store lives in the memory of one process. The seeded availability is the same in every worker
+of a multi-worker server, but bookings are not shared between workers, so booking is only
+consistent with a single worker.
+"""
+
+import itertools
+import threading
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+
+class MinSegmentTree:
+    """Range-add / range-minimum segment tree over `size` slots that all start at `default`.
+
+    Nodes are kept in dicts and only created by `add`, so memory grows with the bookings made rather
+    than with the number of slots.
+    """
+
+    def __init__(self, size: int, default: int):
+        self.size = size
+        self.default = default
+        self._min: dict[int, int] = {}
+        # Pending add for the whole subtree, already included in `_min` of the same node
+        self._add: dict[int, int] = {}
+
+    def query(self, start: int, stop: int) -> int:
+        """Minimum over slots `[start, stop)`."""
+        return self._query(1, 0, self.size, start, stop)
+
+    def _query(self, node: int, lo: int, hi: int, start: int, stop: int) -> float:
+        if stop <= lo or hi <= start:
+            return float("inf")
+        if node not in self._min:
+            # Untouched subtree, but an ancestor's pending add is applied by the caller
+            return self.default
+        if start <= lo and hi <= stop:
+            return self._min[node]
+        mid = (lo + hi) // 2
+        left = self._query(2 * node, lo, mid, start, stop)
+        right = self._query(2 * node + 1, mid, hi, start, stop)
+        return min(left, right) + self._add.get(node, 0)
+
+    def add(self, start: int, stop: int, delta: int) -> None:
+        """Adds `delta` to every slot in `[start, stop)`."""
+        self._update(1, 0, self.size, start, stop, delta)
+
+    def _update(self, node: int, lo: int, hi: int, start: int, stop: int, delta: int) -> None:
+        if stop <= lo or hi <= start:
+            return
+        if start <= lo and hi <= stop:
+            self._min[node] = self._min.get(node, self.default) + delta
+            self._add[node] = self._add.get(node, 0) + delta
+            return
+        mid = (lo + hi) // 2
+        self._update(2 * node, lo, mid, start, stop, delta)
+        self._update(2 * node + 1, mid, hi, start, stop, delta)
+        left = self._min.get(2 * node, self.default)
+        right = self._min.get(2 * node + 1, self.default)
+        self._min[node] = min(left, right) + self._add.get(node, 0)
+
+
+@dataclass
+class Booking:
+    confirmation: str
+    hotel_id: str
+    check_in: str
+    check_out: str
+    rooms: int
+    remaining_rooms: int
+
+
+class AvailabilityStore:
+    """Free rooms per hotel and night, seeded with some existing bookings.
+
+    The horizon covers `past_nights` before and `future_nights` after `today`, by default three
+    years each way, so it moves along with the server's start date.
+    """
+
+    def __init__(
+        self,
+        capacity: Callable[[str], int],
+        today: date | None = None,
+        past_nights: int = 3 * 366,
+        future_nights: int = 3 * 366,
+        seed: int = 0,
+    ):
+        self.capacity = capacity
+        self.horizon_start = (today or date.today()) - timedelta(days=past_nights)
+        self.nights = past_nights + future_nights
+        self.seed = seed
+        self._trees: dict[str, MinSegmentTree] = {}
+        self._lock = threading.Lock()
+        self._confirmations = itertools.count(1)
+
+    def _range(self, check_in: date, check_out: date) -> tuple[int, int]:
+        start = (check_in - self.horizon_start).days
+        stop = (check_out - self.horizon_start).days
+        if start < 0 or stop > self.nights:
+            last_night = self.horizon_start + timedelta(days=self.nights - 1)
+            raise ValueError(f"Availability is only known for nights from {self.horizon_start} to {last_night}")
+        return start, stop
+
+    def _free(self, hotel_id: str) -> int:
+        """Rooms free on nights without new bookings: the capacity less up to half of it already taken."""
+        rooms = self.capacity(hotel_id)
+        return rooms - zlib.crc32(f"{self.seed}|{hotel_id}".encode()) % (rooms // 2 + 1)
+
+    def _tree(self, hotel_id: str) -> MinSegmentTree:
+        tree = self._trees.get(hotel_id)
+        if tree is None:
+            tree = self._trees[hotel_id] = MinSegmentTree(self.nights, self._free(hotel_id))
+        return tree
+
+    def available(self, hotel_id: str, check_in: date, check_out: date) -> int:
+        """Rooms free for every night from `check_in` up to, not including, `check_out`."""
+        start, stop = self._range(check_in, check_out)
+        with self._lock:
+            tree = self._trees.get(hotel_id)
+            return tree.query(start, stop) if tree is not None else self._free(hotel_id)
+
+    def book(self, hotel_id: str, check_in: date, check_out: date, rooms: int = 1) -> Booking:
+        """Takes `rooms` rooms for every night in the range, or raises `ValueError` if any night lacks them."""
+        start, stop = self._range(check_in, check_out)
+        with self._lock:
+            tree = self._tree(hotel_id)
+            free = tree.query(start, stop)
+            if free < rooms:
+                raise ValueError(f"Only {free} rooms are free for every night from {check_in} to {check_out}")
+            tree.add(start, stop, -rooms)
+            confirmation = f"BK{next(self._confirmations):06d}"
+        return Booking(
+            confirmation=confirmation,
+            hotel_id=hotel_id,
+            check_in=check_in.isoformat(),
+            check_out=check_out.isoformat(),
+            rooms=rooms,
+            remaining_rooms=free - rooms,
+        )
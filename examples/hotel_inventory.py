@@ -0,0 +1,261 @@
+"""Indexed mock hotel inventory for the MCP server.
+
+`HotelInventory` backs the `suggest_hotels` and `search_hotels` tools: each location holds
+`hotels_per_location` hotels stored column-wise, with an amenity bitmask per hotel and hotel ids
+sorted by price and by rating, so filtered, paginated searches only walk the hotels inside the
+requested price or rating range.
+
+Hotel ids are the location key and the hotel's number within the location, such as `paris#42`.
+They only depend on the location, so every worker process of a multi-worker server resolves an id
+to the same hotel, whichever locations it happened to generate first.
+
+At most `max_locations` locations are held at once. Clients choose the location strings, so once
+that many are held, the least recently used one is dropped and its storage reused. It is generated
+again, with the same hotels, when it is asked for next. Positions are therefore only valid until
+the next location is generated.
+"""
+
+import bisect
+import itertools
+import random
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from faker import Faker
+
+
+@dataclass
+class Hotel:
+    name: str
+    address: str
+    location: str
+    rating: float
+    price_per_night: float
+    hotel_type: str
+    amenities: list[str]
+    available_rooms: int
+    hotel_id: str | None = None
+
+
+# Lookup tables for the mock data, built once at import
+HOTEL_TYPES = ("Luxury", "Boutique", "Budget", "Business")
+HOTEL_SUFFIXES = ("Hotel", "Inn", "Suites", "Resort", "Plaza")
+AMENITIES = ("Free WiFi", "Pool", "Spa", "Gym", "Restaurant", "Bar", "Room Service", "Parking")
+NEIGHBORHOODS = (
+    "Downtown",
+    "Historic District",
+    "Waterfront",
+    "Business District",
+    "Arts District",
+    "University Area",
+)
+PRICE_RANGES = {
+    "Luxury": (250, 600),
+    "Boutique": (180, 350),
+    "Budget": (80, 150),
+    "Resort": (200, 500),
+    "Business": (150, 300),
+}
+ADDRESS_POOL_SIZE = 1024
+
+
+def _amenity_sets() -> tuple[list[list[str]], list[float]]:
+    """Every 3 to 6 amenity combination, weighted so each size is as likely as the others."""
+    sets, weights = [], []
+    for size in range(3, 7):
+        combos = list(itertools.combinations(AMENITIES, size))
+        sets.extend(list(combo) for combo in combos)
+        weights.extend([1 / len(combos)] * len(combos))
+    return sets, list(itertools.accumulate(weights))
+
+
+AMENITY_SETS, AMENITY_CUM_WEIGHTS = _amenity_sets()
+
+
+def _address_pool(size: int) -> tuple[str, ...]:
+    seeded_fake = Faker()
+    seeded_fake.seed_instance(0)
+    return tuple(seeded_fake.street_address() for _ in range(size))
+
+
+ADDRESS_POOL = _address_pool(ADDRESS_POOL_SIZE)
+
+
+AMENITY_BITS = {amenity: 1 << bit for bit, amenity in enumerate(AMENITIES)}
+SORT_ORDERS = ("rating", "price")
+
+
+def amenity_mask(amenities: list[str]) -> int:
+    """Bitmask of the given amenity names (case-insensitive)."""
+    by_name = {amenity.lower(): bit for amenity, bit in AMENITY_BITS.items()}
+    mask = 0
+    for amenity in amenities:
+        bit = by_name.get(amenity.strip().lower())
+        if bit is None:
+            raise ValueError(f"Unknown amenity: {amenity}. Valid amenities: {', '.join(AMENITIES)}")
+        mask |= bit
+    return mask
+
+
+@dataclass
+class _LocationIndex:
+    start: int
+    by_price: list[int]  # hotel ids in ascending price order
+    prices: list[int]  # prices in `by_price` order, for bisection
+    by_rating: list[int]  # hotel ids in descending rating order
+    negated_ratings: list[float]  # negated ratings in `by_rating` order, for bisection
+    masks: frozenset[int]  # distinct amenity masks present, to answer impossible filters without a scan
+
+
+class HotelInventory:
+    """In-memory hotel inventory, generated per location on first use and indexed for filtered search."""
+
+    def __init__(self, hotels_per_location: int = 5000, seed: int = 0, max_locations: int = 64):
+        self.hotels_per_location = hotels_per_location
+        self.seed = seed
+        self.max_locations = max(1, max_locations)
+        # Least recently used first
+        self._locations: OrderedDict[str, _LocationIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self.names: list[str] = []
+        self.addresses: list[str] = []
+        self.neighborhoods: list[str] = []
+        self.location_names: list[str] = []
+        self.location_keys: list[str] = []
+        self.hotel_types: list[str] = []
+        self.ratings = array("d")
+        self.prices = array("l")
+        self.masks = array("H")
+        self.rooms = array("H")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _index(self, location: str) -> _LocationIndex:
+        key = location.strip().lower()
+        with self._lock:
+            index = self._locations.get(key)
+            if index is None:
+                index = self._build(key, location.strip())
+            else:
+                self._locations.move_to_end(key)
+        return index
+
+    def _build(self, key: str, location: str) -> _LocationIndex:
+        rng = random.Random(f"{self.seed}|{key}")
+        count = self.hotels_per_location
+        if len(self._locations) < self.max_locations:
+            start = len(self.names)
+        else:
+            _, evicted = self._locations.popitem(last=False)
+            start = evicted.start
+        rows = slice(start, start + count)
+        hotel_types = rng.choices(HOTEL_TYPES, k=count)
+        self.names[rows] = [
+            f"{hotel_type} {suffix}" for hotel_type, suffix in zip(hotel_types, rng.choices(HOTEL_SUFFIXES, k=count))
+        ]
+        self.addresses[rows] = rng.choices(ADDRESS_POOL, k=count)
+        self.neighborhoods[rows] = rng.choices(NEIGHBORHOODS, k=count)
+        self.location_names[rows] = [location] * count
+        self.location_keys[rows] = [key] * count
+        self.hotel_types[rows] = hotel_types
+        self.ratings[rows] = array("d", (round(rng.uniform(3.0, 5.0), 1) for _ in range(count)))
+        self.prices[rows] = array(
+            "l", (round(rng.uniform(*PRICE_RANGES.get(hotel_type, (100, 300)))) for hotel_type in hotel_types)
+        )
+        self.masks[rows] = array(
+            "H",
+            (
+                amenity_mask(amenities)
+                for amenities in rng.choices(AMENITY_SETS, cum_weights=AMENITY_CUM_WEIGHTS, k=count)
+            ),
+        )
+        self.rooms[rows] = array("H", (rng.randint(5, 40) for _ in range(count)))
+
+        ids = range(start, start + count)
+        by_price = sorted(ids, key=self.prices.__getitem__)
+        by_rating = sorted(ids, key=lambda hotel_id: -self.ratings[hotel_id])
+        index = _LocationIndex(
+            start=start,
+            by_price=by_price,
+            prices=[self.prices[hotel_id] for hotel_id in by_price],
+            by_rating=by_rating,
+            negated_ratings=[-self.ratings[hotel_id] for hotel_id in by_rating],
+            masks=frozenset(self.masks[start : start + count]),
+        )
+        self._locations[key] = index
+        return index
+
+    def hotel_id(self, position: int) -> str:
+        """Public id of the hotel stored at `position`."""
+        key = self.location_keys[position]
+        return f"{key}#{position - self._locations[key].start}"
+
+    def position(self, hotel_id: str) -> int:
+        """Where the hotel with `hotel_id` is stored, generating its location if needed."""
+        key, _, number = hotel_id.strip().rpartition("#")
+        if not key or not number.isdigit() or int(number) >= self.hotels_per_location:
+            raise ValueError(f"Unknown hotel_id: {hotel_id}. Use an id returned by suggest_hotels or search_hotels.")
+        return self._index(key).start + int(number)
+
+    def sample(self, location: str, key: str, count: int) -> list[int]:
+        """Picks up to `count` hotels of a location, the same ones every time for the same `key`."""
+        index = self._index(location)
+        ids = range(index.start, index.start + self.hotels_per_location)
+        return random.Random(key).sample(ids, min(count, len(ids)))
+
+    def hotel(self, hotel_id: int) -> Hotel:
+        """The hotel stored at position `hotel_id`."""
+        mask = self.masks[hotel_id]
+        return Hotel(
+            name=self.names[hotel_id],
+            address=self.addresses[hotel_id],
+            location=f"{self.neighborhoods[hotel_id]}, {self.location_names[hotel_id]}",
+            rating=self.ratings[hotel_id],
+            price_per_night=self.prices[hotel_id],
+            hotel_type=self.hotel_types[hotel_id],
+            amenities=[amenity for amenity, bit in AMENITY_BITS.items() if mask & bit],
+            available_rooms=self.rooms[hotel_id],
+            hotel_id=self.hotel_id(hotel_id),
+        )
+
+    def search(
+        self,
+        location: str,
+        amenities: list[str] | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_rating: float | None = None,
+        sort_by: str = "rating",
+        limit: int = 10,
+        offset: int = 0,
+    ) -> tuple[list[Hotel], bool]:
+        """Returns one page of matching hotels and whether more matches follow it."""
+        if sort_by not in SORT_ORDERS:
+            raise ValueError(f"sort_by must be one of {SORT_ORDERS}, got: {sort_by}")
+        required = amenity_mask(amenities or [])
+        index = self._index(location)
+        low = min_price if min_price is not None else float("-inf")
+        high = max_price if max_price is not None else float("inf")
+        floor = min_rating if min_rating is not None else float("-inf")
+        if not any(mask & required == required for mask in index.masks):
+            return [], False
+
+        # Walk only the slice of the sorted ids inside the price (or rating) range
+        if sort_by == "price":
+            candidates = itertools.islice(
+                index.by_price, bisect.bisect_left(index.prices, low), bisect.bisect_right(index.prices, high)
+            )
+        else:
+            candidates = itertools.islice(index.by_rating, bisect.bisect_right(index.negated_ratings, -floor))
+        matches = (
+            hotel_id
+            for hotel_id in candidates
+            if self.masks[hotel_id] & required == required
+            and low <= self.prices[hotel_id] <= high
+            and self.ratings[hotel_id] >= floor
+        )
+        page = list(itertools.islice(matches, offset, offset + limit + 1))
+        return [self.hotel(hotel_id) for hotel_id in page[:limit]], len(page) > limit
@@ -0,0 +1,157 @@
+"""Measures tool-call throughput of the hotel MCP server as the number of uvicorn workers grows.
+
+For each worker count, starts `mcp_server_basic.py` in stateless mode, warms it up, fires
+`--calls` tool calls through `MCPClientPool` with `--concurrency` calls in flight, and stops the
+server with SIGTERM so in-flight calls finish (graceful shutdown).
+
+Usage:
+    python examples/mcp_loadtest.py --workers 1 2 4 --calls 2000 --concurrency 64 --tool search_hotels
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+from mcp_pool import MCPClientPool
+from rich.console import Console
+from rich.table import Table
+
+logger = logging.getLogger("mcp_loadtest")
+
+EXAMPLES_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCATIONS = [f"City {i}" for i in range(20)]
+
+
+@dataclass
+class LoadTestResult:
+    workers: int
+    calls: int
+    errors: int
+    seconds: float
+    calls_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def tool_arguments(tool: str, i: int) -> dict:
+    location = LOCATIONS[i % len(LOCATIONS)]
+    if tool == "search_hotels":
+        return {"location": location, "amenities": ["Free WiFi", "Pool"], "max_price": 300, "limit": 5}
+    return {"location": location, "check_in": "2025-06-01", "check_out": "2025-06-04"}
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(EXAMPLES_DIR, "mcp_server_basic.py"), "--stateless"]
+    command += ["--workers", str(workers), "--port", str(port)]
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=35)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+async def connect(url: str, size: int, concurrency: int, timeout: float = 60.0) -> MCPClientPool:
+    """Opens a pool once the freshly started server accepts connections."""
+    deadline = time.monotonic() + timeout
+    while True:
+        pool = MCPClientPool(url, size=size, max_concurrency=concurrency)
+        try:
+            await pool.start()
+            return pool
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def run_workers(workers: int, args: argparse.Namespace) -> LoadTestResult:
+    url = f"http://127.0.0.1:{args.port}/mcp"
+    server = start_server(workers, args.port)
+    try:
+        pool = await connect(url, args.sessions, args.concurrency)
+        try:
+            # Every worker builds its inventory per location on first use, so touch all of them first
+            warmup = [(args.tool, tool_arguments(args.tool, i)) for i in range(len(LOCATIONS) * workers * 2)]
+            await pool.call_tools(warmup)
+            pool.histograms.clear()
+
+            calls = [(args.tool, tool_arguments(args.tool, i)) for i in range(args.calls)]
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(pool.call_tool(name, arguments) for name, arguments in calls), return_exceptions=True
+            )
+            seconds = time.perf_counter() - started
+        finally:
+            await pool.close()
+    finally:
+        stop_server(server)
+
+    errors = sum(isinstance(result, BaseException) or result.isError for result in results)
+    summary = pool.stats()[args.tool]
+    return LoadTestResult(
+        workers=workers,
+        calls=len(results),
+        errors=errors,
+        seconds=seconds,
+        calls_per_second=len(results) / seconds,
+        p50_ms=summary["p50_ms"],
+        p95_ms=summary["p95_ms"],
+        p99_ms=summary["p99_ms"],
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = []
+    for workers in args.workers:
+        logger.info("Load testing %d worker(s)", workers)
+        results.append(await run_workers(workers, args))
+
+    table = Table(title=f"{args.tool}: {args.calls} calls, {args.concurrency} in flight")
+    for column in ("Workers", "Calls", "Errors", "Seconds", "Calls/s", "Speedup", "p50 ms", "p95 ms", "p99 ms"):
+        table.add_column(column, justify="right")
+    baseline = results[0].calls_per_second
+    for result in results:
+        table.add_row(
+            str(result.workers),
+            str(result.calls),
+            str(result.errors),
+            f"{result.seconds:.2f}",
+            f"{result.calls_per_second:.0f}",
+            f"{result.calls_per_second / baseline:.2f}x",
+            f"{result.p50_ms:.0f}",
+            f"{result.p95_ms:.0f}",
+            f"{result.p99_ms:.0f}",
+        )
+    Console().print(table)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description="Tool-call throughput of the hotel MCP server per worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--sessions", type=int, default=4, help="Client sessions (connection pools) to spread calls over"
+    )
+    parser.add_argument("--tool", choices=("suggest_hotels", "search_hotels"), default="search_hotels")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,333 @@
+"""Pooled, concurrent MCP tool-call executor shared by the MCP examples.
+
+`MCPClientPool` keeps a few initialized MCP sessions open for the lifetime of the process, so
+agent runs reuse them instead of reconnecting. Tool calls are spread over the sessions, run
+concurrently up to `max_concurrency`, time out per tool, and feed a latency histogram per tool
+and an OpenTelemetry span each (see `telemetry.py`). Results of read-only tools listed in
+`cache_ttls` are shared through a `tool_cache.ToolCache` per tool, so concurrent agents asking for
+the same lookup make one call; results with `isError` are never cached.
+
+Hook it into the frameworks:
+    * Agent Framework: `MCPStreamableHTTPTool(..., session=pool.session())`
+    * OpenAI Agents: assign `mcp_server.session = pool.session()` instead of calling `connect()`
+    * PydanticAI: `PooledMCPServer(pool)` from `mcp_pool_pydanticai.py` as the agent's toolset
+
+Tuning is read from the environment by `MCPClientPool.from_env` (all optional):
+    MCP_POOL_SIZE                  Sessions kept open (default 2)
+    MCP_MAX_CONCURRENT_TOOL_CALLS  Tool calls in flight across all sessions (default 8)
+    MCP_TOOL_TIMEOUT               Default seconds per tool call (default 30)
+    MCP_TOOL_TIMEOUTS              Per-tool overrides, e.g. `suggest_hotels=10,search_docs=60`
+    MCP_CACHED_TOOLS               Tools whose results are cached, with their TTL, e.g. `get_issue=3600`
+
+Exercise it against the local server:
+    python examples/mcp_server_basic.py
+    python examples/mcp_pool.py --calls 200
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from collections.abc import Awaitable
+from contextlib import AsyncExitStack
+from typing import Any, TypeVar
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.types import CallToolRequest, CallToolResult, ClientRequest, Implementation, ListToolsResult
+from telemetry import mcp_span
+from tool_cache import ToolCache
+
+logger = logging.getLogger("mcp_pool")
+
+T = TypeVar("T")
+
+# Upper bounds in seconds, the last bucket catches everything slower
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one tool."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.timeouts = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile (capped at the slowest observed call)."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class _ToolError(Exception):
+    """Carries an `isError` result past the cache, so it is returned but not stored."""
+
+    def __init__(self, result: CallToolResult):
+        self.result = result
+
+
+def _parse_settings(value: str) -> dict[str, float]:
+    """Parses `name=seconds,name=seconds` into a dict."""
+    return {
+        name.strip(): float(seconds)
+        for name, seconds in (pair.split("=", 1) for pair in value.split(",") if pair.strip())
+    }
+
+
+class PooledSession:
+    """Stands in for an MCP `ClientSession`, routing tool calls through the pool.
+
+    Frameworks that accept an existing session use it as-is. Tool calls are routed through the pool,
+    also when sent as a raw `tools/call` request; anything else is forwarded to one of the pooled
+    sessions.
+    """
+
+    def __init__(self, pool: "MCPClientPool"):
+        self._pool = pool
+
+    async def call_tool(self, name: str, arguments: dict[str, Any] | None = None, *args, **kwargs) -> CallToolResult:
+        return await self._pool.call_tool(name, arguments, *args, **kwargs)
+
+    async def list_tools(self, *args, **kwargs) -> ListToolsResult:
+        return await self._pool.list_tools()
+
+    async def send_request(self, request: ClientRequest, result_type, *args, **kwargs):
+        if isinstance(request.root, CallToolRequest):
+            params = request.root.params
+            meta = params.meta.model_dump(exclude_none=True) if params.meta else None
+            return await self._pool.call_tool(params.name, params.arguments, meta=meta)
+        return await self._pool._pick().send_request(request, result_type, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._pool._pick(), name)
+
+
+class MCPClientPool:
+    def __init__(
+        self,
+        url: str,
+        size: int = 2,
+        max_concurrency: int = 8,
+        timeout: float = 30.0,
+        tool_timeouts: dict[str, float] | None = None,
+        headers: dict[str, str] | None = None,
+        cache_ttls: dict[str, float] | None = None,
+    ):
+        self.url = url
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self.headers = headers
+        self.caches = {name: ToolCache(name, ttl=ttl, maxsize=4096) for name, ttl in (cache_ttls or {}).items()}
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._sessions: list[ClientSession] = []
+        self._in_flight: list[int] = []
+        self._tools: ListToolsResult | None = None
+        self._exit_stack: AsyncExitStack | None = None
+        # What the server sent when the first session was initialized
+        self.server_info: Implementation | None = None
+
+    @classmethod
+    def from_env(cls, url: str, headers: dict[str, str] | None = None, cached_tools: str = "") -> "MCPClientPool":
+        """Builds a pool from the `MCP_*` variables; `cached_tools` is used when `MCP_CACHED_TOOLS` is unset."""
+        return cls(
+            url,
+            size=int(os.getenv("MCP_POOL_SIZE", "2")),
+            max_concurrency=int(os.getenv("MCP_MAX_CONCURRENT_TOOL_CALLS", "8")),
+            timeout=float(os.getenv("MCP_TOOL_TIMEOUT", "30")),
+            tool_timeouts=_parse_settings(os.getenv("MCP_TOOL_TIMEOUTS", "")),
+            headers=headers,
+            cache_ttls=_parse_settings(os.getenv("MCP_CACHED_TOOLS", cached_tools)),
+        )
+
+    async def start(self) -> None:
+        """Opens and initializes all sessions. Must be closed from the same task."""
+        if self._exit_stack is not None:
+            return
+        self._exit_stack = AsyncExitStack()
+        try:
+            for _ in range(self.size):
+                read, write, _ = await self._exit_stack.enter_async_context(
+                    streamablehttp_client(self.url, headers=self.headers)
+                )
+                session = await self._exit_stack.enter_async_context(ClientSession(read, write))
+                result = await session.initialize()
+                self.server_info = self.server_info or result.serverInfo
+                self._sessions.append(session)
+                self._in_flight.append(0)
+        except BaseException:
+            await self.close()
+            raise
+        logger.info("Opened %d MCP sessions to %s", self.size, self.url)
+
+    async def close(self) -> None:
+        if self._exit_stack is not None:
+            exit_stack, self._exit_stack = self._exit_stack, None
+            self._sessions.clear()
+            self._in_flight.clear()
+            self._tools = None
+            await exit_stack.aclose()
+
+    async def __aenter__(self) -> "MCPClientPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def session(self) -> PooledSession:
+        return PooledSession(self)
+
+    def _pick(self) -> ClientSession:
+        if not self._sessions:
+            raise RuntimeError("MCP client pool is not started, use `async with pool:` or `await pool.start()`")
+        return self._sessions[self._in_flight.index(min(self._in_flight))]
+
+    async def run(self, name: str, call: Awaitable[T]) -> T:
+        """Runs one tool call under the pool's concurrency limit and timeout, recording its latency."""
+        timeout = self.tool_timeouts.get(name, self.timeout)
+        histogram = self.histograms.setdefault(name, LatencyHistogram())
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                with mcp_span(name, self.url):
+                    return await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError as e:
+                histogram.timeouts += 1
+                raise TimeoutError(f"MCP tool {name} did not answer within {timeout}s") from e
+            except Exception:
+                histogram.errors += 1
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+    async def call_tool(self, name: str, arguments: dict[str, Any] | None = None, *args, **kwargs) -> CallToolResult:
+        cache = self.caches.get(name)
+        if cache is None:
+            return await self._call_tool(name, arguments, *args, **kwargs)
+
+        async def compute() -> CallToolResult:
+            result = await self._call_tool(name, arguments, *args, **kwargs)
+            if result.isError:
+                raise _ToolError(result)
+            return result
+
+        try:
+            return await cache.call_async(json.dumps(arguments or {}, sort_keys=True), compute)
+        except _ToolError as e:
+            return e.result
+
+    async def _call_tool(self, name: str, arguments: dict[str, Any] | None, *args, **kwargs) -> CallToolResult:
+        session = self._pick()
+        index = self._sessions.index(session)
+        self._in_flight[index] += 1
+        try:
+            return await self.run(name, session.call_tool(name, arguments, *args, **kwargs))
+        finally:
+            if index < len(self._in_flight):
+                self._in_flight[index] -= 1
+
+    async def call_tools(self, calls: list[tuple[str, dict[str, Any]]]) -> list[CallToolResult]:
+        """Runs several tool calls concurrently, returning results in order."""
+        return await asyncio.gather(*(self.call_tool(name, arguments) for name, arguments in calls))
+
+    async def list_tools(self) -> ListToolsResult:
+        if self._tools is None:
+            self._tools = await self._pick().list_tools()
+        return self._tools
+
+    def stats(self) -> dict[str, dict]:
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def cache_stats(self) -> dict[str, dict]:
+        return {name: cache.stats() for name, cache in sorted(self.caches.items())}
+
+    def log_stats(self) -> None:
+        for name, summary in self.stats().items():
+            logger.info(
+                "%s: %d calls, %d errors, %d timeouts, p50 %.0f ms, p95 %.0f ms, max %.0f ms",
+                name,
+                summary["calls"],
+                summary["errors"],
+                summary["timeouts"],
+                summary["p50_ms"],
+                summary["p95_ms"],
+                summary["max_ms"],
+            )
+        for name, stats in self.cache_stats().items():
+            logger.info(
+                "%s cache: %d hits, %d shared in flight, %d misses",
+                name,
+                stats["hits"],
+                stats["coalesced"],
+                stats["misses"],
+            )
+
+
+async def main(args: argparse.Namespace) -> None:
+    from rich.console import Console
+    from rich.table import Table
+
+    async with MCPClientPool.from_env(args.url) as pool:
+        tools = await pool.list_tools()
+        print(f"Tools: {', '.join(tool.name for tool in tools.tools)}")
+        calls = [
+            ("suggest_hotels", {"location": f"City {i % 10}", "check_in": "2025-06-01", "check_out": "2025-06-03"})
+            for i in range(args.calls)
+        ]
+        started = time.perf_counter()
+        results = await pool.call_tools(calls)
+        elapsed = time.perf_counter() - started
+        failed = sum(result.isError for result in results)
+
+    print(f"{len(results)} calls ({failed} failed) in {elapsed:.2f}s, {len(results) / elapsed:.0f} calls/s")
+    table = Table("Tool", "Calls", "Errors", "Timeouts", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms")
+    for name, summary in pool.stats().items():
+        table.add_row(name, *(f"{value:.0f}" if isinstance(value, float) else str(value) for value in summary.values()))
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description="Fire concurrent tool calls at an MCP server through the pool")
+    parser.add_argument("--url", default="http://localhost:8000/mcp/")
+    parser.add_argument("--calls", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
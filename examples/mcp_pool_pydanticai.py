@@ -0,0 +1,56 @@
+"""PydanticAI toolset backed by an `MCPClientPool`.
+
+`MCPServerStreamableHTTP` opens its own MCP session whenever an agent run starts and closes it
+when the run ends. `PooledMCPServer` uses the pool's sessions instead, so agent runs share the
+pool's open sessions, concurrency limit, per-tool timeouts, result caches and latency histograms:
+
+    pool = MCPClientPool.from_env("http://localhost:8000/mcp")
+    agent = Agent(model, toolsets=[PooledMCPServer(pool)])
+    async with pool:
+        await agent.run("...")
+
+`MCPServer` has no public hook for an existing session, so `__aenter__` sets the same private
+state as pydantic-ai's own: `_client`, `_server_info` and the `_running_count` guarded by
+`_enter_lock`. This is written against pydantic-ai 1.9.0, the version pinned in
+`requirements.txt`; check these attributes in `pydantic_ai/mcp.py` before moving the pin.
+"""
+
+import warnings
+from typing import Any
+
+import pydantic_ai
+from mcp_pool import MCPClientPool
+from pydantic_ai.mcp import MCPServerStreamableHTTP
+
+PYDANTIC_AI_VERSION = "1.9.0"
+
+if pydantic_ai.__version__ != PYDANTIC_AI_VERSION:
+    warnings.warn(
+        f"PooledMCPServer relies on MCPServer internals of pydantic-ai {PYDANTIC_AI_VERSION}, "
+        f"found {pydantic_ai.__version__}",
+        stacklevel=2,
+    )
+
+
+class PooledMCPServer(MCPServerStreamableHTTP):
+    """Streamable HTTP MCP toolset whose requests go through a started `MCPClientPool`."""
+
+    def __init__(self, pool: MCPClientPool, **kwargs: Any):
+        super().__init__(pool.url, headers=pool.headers, **kwargs)
+        self.pool = pool
+
+    async def __aenter__(self) -> "PooledMCPServer":
+        async with self._enter_lock:
+            if self._running_count == 0:
+                # Raises when the pool was not started, since the pool owns the connections
+                self.pool._pick()
+                self._client = self.pool.session()
+                self._server_info = self.pool.server_info
+            self._running_count += 1
+        return self
+
+    async def __aexit__(self, *args: Any) -> bool | None:
+        async with self._enter_lock:
+            self._running_count -= 1
+        # The sessions stay open for the next run, until the pool is closed
+        return None
@@ -1,35 +1,64 @@
+"""Local hotel MCP server used by the MCP examples.
+
+Run it for development (one process, stateful sessions):
+    python examples/mcp_server_basic.py
+
+Or in production mode, with stateless streamable HTTP spread over several uvicorn workers:
+    python examples/mcp_server_basic.py --workers 4 --host 0.0.0.0 --limit-concurrency 512
+
+Stateless mode keeps no MCP session state between requests, so any worker can answer any call.
+Hotel ids and the seeded availability are the same in every worker, but bookings are kept in
+memory per worker: with more than one worker, `book_hotel` can overbook a night across workers and
+`check_availability` only sees the bookings of the worker that answers it. Use one worker to try
+bookings.
+"""
+
+import argparse
 import logging
+import os
 import random
 import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Literal
 
-from faker import Faker
+from hotel_availability import AvailabilityStore, Booking
+from hotel_inventory import AMENITIES, Hotel, HotelInventory
 from mcp.server.fastmcp import FastMCP
 from pydantic import Field
 
 app = FastMCP()
-fake = Faker()
 
 logger = logging.getLogger("hotel_mcp_server")
 
 
 @dataclass
-class Hotel:
-    name: str
-    address: str
-    location: str
-    rating: float
-    price_per_night: float
-    hotel_type: str
-    amenities: list[str]
-    available_rooms: int
+class HotelSuggestions:
+    hotels: list[Hotel]
 
 
 @dataclass
-class HotelSuggestions:
+class HotelSearchResults:
     hotels: list[Hotel]
+    offset: int
+    has_more: bool
+
+
+@dataclass
+class Availability:
+    hotel_id: str
+    check_in: str
+    check_out: str
+    available_rooms: int
+
+
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+inventory = HotelInventory(
+    hotels_per_location=int(os.getenv("HOTELS_PER_LOCATION", "5000")),
+    max_locations=int(os.getenv("MAX_LOCATIONS", "64")),
+)
+availability = AvailabilityStore(lambda hotel_id: inventory.rooms[inventory.position(hotel_id)])
 
 
 def validate_iso_date(date_str: str, param_name: str):
@@ -46,8 +75,7 @@ def validate_iso_date(date_str: str, param_name: str):
     Raises:
         ValueError: If the date is not in ISO format or is invalid
     """
-    iso_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}$")
-    if not iso_pattern.match(date_str):
+    if not ISO_DATE.match(date_str):
         raise ValueError(f"{param_name} must be in ISO format (YYYY-MM-DD), got: {date_str}")
 
     try:
@@ -56,72 +84,45 @@ def validate_iso_date(date_str: str, param_name: str):
         raise ValueError(f"Invalid {param_name}: {e}")
 
 
+def validate_stay(check_in: str, check_out: str):
+    """Validates both dates of a stay and returns them parsed, raising ValueError if check_out is not later."""
+    check_in_date = validate_iso_date(check_in, "check_in")
+    check_out_date = validate_iso_date(check_out, "check_out")
+
+    # Ensure check_out is after check_in
+    if check_out_date <= check_in_date:
+        raise ValueError("check_out date must be after check_in date")
+    return check_in_date, check_out_date
+
+
+def validate_hotel_id(hotel_id: str) -> str:
+    """Returns the hotel id in its canonical form, raising ValueError if no hotel has it."""
+    return inventory.hotel_id(inventory.position(hotel_id))
+
+
 @app.tool()
 async def suggest_hotels(
     location: Annotated[str, Field(description="Location (city or area) to search for hotels")],
     check_in: Annotated[str, Field(description="Check-in date in ISO format (YYYY-MM-DD)")],
     check_out: Annotated[str, Field(description="Check-out date in ISO format (YYYY-MM-DD)")],
+    limit: Annotated[
+        int | None,
+        Field(description="Number of hotels to return (default: 3 to 8)", ge=1, le=inventory.hotels_per_location),
+    ] = None,
 ) -> HotelSuggestions:
     """
     Suggest hotels based on location and dates.
     """
     logger.info(f"Received hotel search request for location: {location}, check_in: {check_in}, check_out: {check_out}")
-    # Validate dates
-    check_in_date = validate_iso_date(check_in, "check_in")
-    check_out_date = validate_iso_date(check_out, "check_out")
+    check_in_date, check_out_date = validate_stay(check_in, check_out)
 
-    # Ensure check_out is after check_in
-    if check_out_date <= check_in_date:
-        raise ValueError("check_out date must be after check_in date")
-
-    # Create realistic mock data for hotels
-    hotel_types = ["Luxury", "Boutique", "Budget", "Business"]
-    amenities = ["Free WiFi", "Pool", "Spa", "Gym", "Restaurant", "Bar", "Room Service", "Parking"]
-
-    # Generate a rating between 3.0 and 5.0
-    def generate_rating():
-        return round(random.uniform(3.0, 5.0), 1)
-
-    # Generate a price based on hotel type
-    def generate_price(hotel_type):
-        price_ranges = {
-            "Luxury": (250, 600),
-            "Boutique": (180, 350),
-            "Budget": (80, 150),
-            "Resort": (200, 500),
-            "Business": (150, 300),
-        }
-        min_price, max_price = price_ranges.get(hotel_type, (100, 300))
-        return round(random.uniform(min_price, max_price))
-
-    # Generate between 3 and 8 hotels
-    num_hotels = random.randint(3, 8)
+    # Identical queries pick the same hotels; rooms reflect the bookings made so far
+    key = f"{location}|{check_in}|{check_out}"
+    positions = inventory.sample(location, key, limit or random.Random(key).randint(3, 8))
     hotels = []
-
-    neighborhoods = [
-        "Downtown",
-        "Historic District",
-        "Waterfront",
-        "Business District",
-        "Arts District",
-        "University Area",
-    ]
-
-    for i in range(num_hotels):
-        hotel_type = random.choice(hotel_types)
-        hotel_amenities = random.sample(amenities, random.randint(3, 6))
-        neighborhood = random.choice(neighborhoods)
-
-        hotel = Hotel(
-            name=f"{hotel_type} {['Hotel', 'Inn', 'Suites', 'Resort', 'Plaza'][random.randint(0, 4)]}",
-            address=fake.street_address(),
-            location=f"{neighborhood}, {location}",
-            rating=generate_rating(),
-            price_per_night=generate_price(hotel_type),
-            hotel_type=hotel_type,
-            amenities=hotel_amenities,
-            available_rooms=random.randint(1, 15),
-        )
+    for position in positions:
+        hotel = inventory.hotel(position)
+        hotel.available_rooms = availability.available(hotel.hotel_id, check_in_date, check_out_date)
         hotels.append(hotel)
 
     # Sort by rating to show best hotels first
@@ -129,6 +130,114 @@ async def suggest_hotels(
     return HotelSuggestions(hotels=hotels)
 
 
+@app.tool()
+async def check_availability(
+    hotel_id: Annotated[str, Field(description="Hotel id returned by suggest_hotels or search_hotels")],
+    check_in: Annotated[str, Field(description="Check-in date in ISO format (YYYY-MM-DD)")],
+    check_out: Annotated[str, Field(description="Check-out date in ISO format (YYYY-MM-DD)")],
+) -> Availability:
+    """
+    Check how many rooms of a hotel are free for every night of a stay.
+    """
+    check_in_date, check_out_date = validate_stay(check_in, check_out)
+    free = availability.available(validate_hotel_id(hotel_id), check_in_date, check_out_date)
+    return Availability(hotel_id=hotel_id, check_in=check_in, check_out=check_out, available_rooms=free)
+
+
+@app.tool()
+async def book_hotel(
+    hotel_id: Annotated[str, Field(description="Hotel id returned by suggest_hotels or search_hotels")],
+    check_in: Annotated[str, Field(description="Check-in date in ISO format (YYYY-MM-DD)")],
+    check_out: Annotated[str, Field(description="Check-out date in ISO format (YYYY-MM-DD)")],
+    rooms: Annotated[int, Field(description="Number of rooms to book", ge=1, le=10)] = 1,
+) -> Booking:
+    """
+    Book rooms in a hotel for every night of a stay. Fails if any night does not have enough free rooms.
+    """
+    logger.info(f"Received booking request for hotel: {hotel_id}, check_in: {check_in}, check_out: {check_out}")
+    check_in_date, check_out_date = validate_stay(check_in, check_out)
+    return availability.book(validate_hotel_id(hotel_id), check_in_date, check_out_date, rooms)
+
+
+@app.tool()
+async def search_hotels(
+    location: Annotated[str, Field(description="Location (city or area) to search for hotels")],
+    amenities: Annotated[
+        list[str], Field(description=f"Amenities every hotel must have, any of: {', '.join(AMENITIES)}")
+    ] = [],
+    min_price: Annotated[float | None, Field(description="Minimum price per night")] = None,
+    max_price: Annotated[float | None, Field(description="Maximum price per night")] = None,
+    min_rating: Annotated[float | None, Field(description="Minimum rating, from 3.0 to 5.0")] = None,
+    sort_by: Annotated[Literal["rating", "price"], Field(description="Best rated or cheapest first")] = "rating",
+    limit: Annotated[int, Field(description="Number of hotels to return", ge=1, le=50)] = 5,
+    offset: Annotated[int, Field(description="Number of matching hotels to skip", ge=0)] = 0,
+) -> HotelSearchResults:
+    """
+    Search the hotel inventory for a location, returning only hotels with all the requested amenities
+    within the price and rating bounds. Use offset to page through more results.
+    """
+    logger.info(f"Received hotel inventory search for location: {location}, amenities: {amenities}")
+    hotels, has_more = inventory.search(
+        location,
+        amenities=amenities,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        sort_by=sort_by,
+        limit=limit,
+        offset=offset,
+    )
+    return HotelSearchResults(hotels=hotels, offset=offset, has_more=has_more)
+
+
+def create_http_app():
+    """ASGI app factory used by each uvicorn worker in stateless mode."""
+    # Logging every request costs more than the tool calls themselves
+    logging.getLogger().setLevel(os.getenv("MCP_LOG_LEVEL", "WARNING"))
+    app.settings.stateless_http = True
+    # Plain JSON responses avoid holding an SSE stream open per tool call
+    app.settings.json_response = True
+    if os.getenv("MCP_HOST", "127.0.0.1") not in ("127.0.0.1", "localhost", "::1"):
+        # Requests arrive with the public host name, which the localhost-only DNS rebinding check rejects
+        app.settings.transport_security = None
+    return app.streamable_http_app()
+
+
 if __name__ == "__main__":
-    logger.setLevel(logging.INFO)
-    app.run(transport="streamable-http")
+    parser = argparse.ArgumentParser(description="Hotel MCP server over streamable HTTP")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_WORKERS", "1")))
+    parser.add_argument("--stateless", action="store_true", help="Stateless HTTP, implied by --workers > 1")
+    parser.add_argument("--limit-concurrency", type=int, help="Connections per worker before answering 503")
+    parser.add_argument("--backlog", type=int, default=2048, help="Pending connections queued by the OS")
+    parser.add_argument("--graceful-shutdown", type=float, default=30.0, help="Seconds to finish in-flight calls")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    # Both modes serve through uvicorn so the connection limits apply to either
+    server_options = {
+        "host": args.host,
+        "port": args.port,
+        "limit_concurrency": args.limit_concurrency,
+        "backlog": args.backlog,
+        "timeout_graceful_shutdown": args.graceful_shutdown,
+    }
+    if args.workers == 1 and not args.stateless:
+        logger.setLevel(logging.INFO)
+        app.settings.host = args.host
+        app.settings.port = args.port
+        # Same app and log level as app.run(transport="streamable-http"), which takes no uvicorn options
+        uvicorn.run(app.streamable_http_app(), log_level=app.settings.log_level.lower(), **server_options)
+    else:
+        # Workers import this module again, so they read the settings from the environment
+        os.environ["MCP_HOST"] = args.host
+        uvicorn.run(
+            "mcp_server_basic:create_http_app",
+            factory=True,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            workers=args.workers,
+            log_level="warning",
+            **server_options,
+        )
@@ -0,0 +1,98 @@
+"""Local stand-in for the GitHub MCP server, for running the triage example offline.
+
+Serves the tools `openai_agents_mcp_github.py` allows (`get_issue`, `search_issues`,
+`search_code`, `list_label`) with canned data and a configurable latency, so tool budgets can be
+exercised without a GitHub token or rate limits:
+    python examples/mcp_server_github_stub.py --port 8010 --latency 0.3
+    GITHUB_MCP_URL=http://localhost:8010/mcp/ python examples/openai_agents_mcp_github.py
+
+`/stats` reports the calls per tool.
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import Counter
+
+from mcp.server.fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+app = FastMCP("github")
+
+logger = logging.getLogger("github_mcp_stub")
+
+LABELS = ["bug", "documentation", "enhancement", "question", "stale", "wontfix", "obsolete"]
+calls: Counter[str] = Counter()
+latency = 0.0
+
+
+async def _call(tool: str) -> None:
+    calls[tool] += 1
+    logger.info("%s call #%d", tool, calls[tool])
+    if latency:
+        await asyncio.sleep(latency)
+
+
+def _issue(owner: str, repo: str, number: int) -> dict:
+    return {
+        "number": number,
+        "title": f"Deployment fails with azd up on step {number % 7 + 1}",
+        "state": "open",
+        "labels": [{"name": "stale"}],
+        "created_at": "2023-05-02T10:00:00Z",
+        "updated_at": "2024-01-15T08:30:00Z",
+        "html_url": f"https://github.com/{owner}/{repo}/issues/{number}",
+        "body": "Running `azd up` fails while provisioning the search service. Logs attached.",
+        "comments": 3,
+    }
+
+
+@app.tool()
+async def get_issue(owner: str, repo: str, issue_number: int) -> dict:
+    """Get details of a specific issue in a GitHub repository."""
+    await _call("get_issue")
+    return _issue(owner, repo, issue_number)
+
+
+@app.tool()
+async def search_issues(query: str, sort: str | None = None, order: str | None = None, perPage: int = 30) -> dict:
+    """Search for issues in GitHub repositories using issues search syntax."""
+    await _call("search_issues")
+    items = [_issue("Azure-Samples", "azure-search-openai-demo", 2700 + i * 13) for i in range(min(perPage, 5))]
+    return {"total_count": 42, "incomplete_results": False, "items": items}
+
+
+@app.tool()
+async def search_code(query: str, sort: str | None = None, order: str | None = None, perPage: int = 30) -> dict:
+    """Search for code across GitHub repositories using code search syntax."""
+    await _call("search_code")
+    paths = ["infra/main.bicep", "app/backend/app.py", "docs/deploy_troubleshooting.md"]
+    items = [{"name": path.rsplit("/", 1)[-1], "path": path, "score": 1.0 - i / 10} for i, path in enumerate(paths)]
+    return {"total_count": len(items), "incomplete_results": False, "items": items[:perPage]}
+
+
+@app.tool()
+async def list_label(owner: str, repo: str) -> list[dict]:
+    """List labels for a repository."""
+    await _call("list_label")
+    return [{"name": name} for name in LABELS]
+
+
+@app.custom_route("/stats", methods=["GET"])
+async def stats(request: Request) -> JSONResponse:
+    return JSONResponse(dict(calls))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub MCP server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each tool call takes")
+    args = parser.parse_args()
+    latency = args.latency
+    app.settings.host = args.host
+    app.settings.port = args.port
+    app.run(transport="streamable-http")
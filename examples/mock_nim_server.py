@@ -0,0 +1,679 @@
+"""Local stand-in for a NIM `/v1/responses` endpoint.
+
+Serves scripted `reasoning`, `message` and `function_call` output items with configurable
+time-to-first-token, tokens/sec and serverless cold-start delay, so the examples and the
+benchmarks can run offline without spending GPU minutes.
+
+Usage:
+    python examples/mock_nim_server.py --port 8001 --ttft 0.2 --tokens-per-second 80 --cold-start 5
+
+Then point the examples at it:
+    NIM_ENDPOINT=http://localhost:8001/v1/ NIM_MODEL=gpt-oss-20b python examples/openai_responses.py
+
+Without a `--script`, each turn calls every function tool that has not been called yet in the
+conversation (one per turn when `parallel_tool_calls` is false) and answers with a message once
+all tools have run. Structured output requests (`text.format` of type `json_schema`) get a JSON
+document generated from the schema.
+
+`--prefill-tokens-per-second` adds prompt processing time, skipping prompt prefixes that earlier
+requests already sent, like a KV prefix cache; `usage.input_tokens_details.cached_tokens` reports
+the skipped tokens. Responses are kept for `previous_response_id` chaining unless the request
+sets `store: false`.
+Reasoning length follows `reasoning.effort`: `--reasoning-tokens` is the medium effort length, low
+effort reasons a quarter of it and high effort four times as much.
+`--malformed-json-rate` makes that share of structured outputs come back fenced, truncated,
+with a trailing comma or an unquoted value, unless the request asks for guided decoding with
+`nvext.guided_json`.
+`--max-concurrency` and `--error-rate` simulate an overloaded endpoint that answers 429 and 503
+with a `Retry-After` header.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import copy
+import hashlib
+import itertools
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import web
+
+logger = logging.getLogger("mock_nim_server")
+
+# Responses kept for `previous_response_id` chaining, oldest dropped first
+STORED_RESPONSES = 10_000
+# Prompt prefixes kept by the simulated KV prefix cache
+CACHED_PREFIXES = 100_000
+# Reasoning length per `reasoning.effort`, relative to `reasoning_tokens` (medium)
+REASONING_EFFORT_SCALE = {"low": 0.25, "medium": 1.0, "high": 4.0}
+WORDS = (
+    "the unicorn drifted over silver hills while the moon hummed a quiet song and every star "
+    "leaned closer to listen before the night folded itself into a soft blue dream"
+).split()
+
+
+@dataclass
+class MockNIMConfig:
+    model: str = "gpt-oss-20b"
+    # Seconds before the first output token of every response
+    ttft: float = 0.0
+    # Generation speed; 0 means all tokens are produced instantly
+    tokens_per_second: float = 0.0
+    # Seconds the first request waits while a replica "spins up"
+    cold_start: float = 0.0
+    # Idle seconds after which the replica scales to zero and pays the cold start again
+    scale_to_zero_after: float | None = None
+    # Reasoning tokens at medium effort
+    reasoning_tokens: int = 16
+    output_tokens: int = 24
+    # Optional list of turns, each a list of shorthand output items (see `_expand_item`)
+    script: list[list[dict]] | None = None
+    # Requests in flight above this limit are rejected with 429, like an overloaded replica
+    max_concurrency: int | None = None
+    # Fraction of requests failing with 503, to exercise client retries
+    error_rate: float = 0.0
+    # Seconds sent in the `Retry-After` header of 429 and 503 responses
+    retry_after: float = 1.0
+    # Prompt processing speed; 0 means instant. Prompt prefixes seen before are served from a
+    # simulated KV prefix cache and cost nothing.
+    prefill_tokens_per_second: float = 0.0
+    # Fraction of structured outputs returned as malformed JSON, unless guided decoding is requested
+    malformed_json_rate: float = 0.0
+
+
+@dataclass
+class MockNIMStats:
+    requests: int = 0
+    streaming_requests: int = 0
+    cold_starts: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    server_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+    cached_tokens: int = 0
+    guided_requests: int = 0
+    malformed_outputs: int = 0
+    rejected: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.time)
+
+
+def _sample_from_schema(schema: dict, defs: dict, name: str = "") -> Any:
+    """Builds a small value that validates against a JSON schema."""
+    if "$ref" in schema:
+        return _sample_from_schema(defs.get(schema["$ref"].split("/")[-1], {}), defs, name)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return _sample_from_schema(options[0] if options else {}, defs, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    schema_type = schema.get("type", "string")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "string")
+    if schema_type == "object":
+        return {
+            prop: _sample_from_schema(prop_schema, defs, prop)
+            for prop, prop_schema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [_sample_from_schema(schema.get("items", {}), defs, name)]
+    if schema_type == "integer":
+        return 1
+    if schema_type == "number":
+        return 1.0
+    if schema_type == "boolean":
+        return True
+    if "check_out" in name:
+        return "2024-01-03"
+    if "date" in name or "check_in" in name:
+        return "2024-01-01"
+    if "url" in name:
+        return "https://example.com/"
+    if name in ("city", "city_name", "location"):
+        return "Seattle"
+    return f"sample {name}".strip()
+
+
+def _malform(text: str) -> str:
+    """Breaks a JSON object the way unconstrained models do, sometimes beyond repair."""
+    return random.choice(
+        [
+            f"```json\n{text}\n```",
+            f"Here is the result:\n{text}",
+            text[:-1] + ",}",
+            text[:-1],
+            text.replace('": "', '": ', 1),
+        ]
+    )
+
+
+def _input_items(body: dict) -> list[dict]:
+    input_items = body.get("input") or []
+    if isinstance(input_items, str):
+        return [{"role": "user", "content": input_items}]
+    return list(input_items)
+
+
+def _count_tokens(text: str) -> int:
+    # Roughly 4 characters per token, good enough for usage accounting
+    return max(1, len(text) // 4)
+
+
+def _words(count: int) -> list[str]:
+    return [word + " " for word in itertools.islice(itertools.cycle(WORDS), count)]
+
+
+class MockNIM:
+    def __init__(self, config: MockNIMConfig):
+        self.config = config
+        self.stats = MockNIMStats()
+        self._ids = itertools.count(1)
+        # Conversation (input plus output) of recent responses, for `previous_response_id`
+        self._conversations: OrderedDict[str, list[dict]] = OrderedDict()
+        # Hashes of prompt prefixes, for the simulated prefix cache
+        self._prefixes: OrderedDict[str, None] = OrderedDict()
+        self._warm = config.cold_start <= 0
+        self._warming: asyncio.Task | None = None
+        self._last_request = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Cold start simulation
+    # ------------------------------------------------------------------
+    async def _ensure_warm(self) -> None:
+        now = time.monotonic()
+        idle_limit = self.config.scale_to_zero_after
+        if self._warm and idle_limit is not None and now - self._last_request > idle_limit:
+            self._warm = self.config.cold_start <= 0
+        self._last_request = now
+        if self._warm:
+            return
+        if self._warming is None:
+            logger.info("Cold start: waiting %.1fs for a replica", self.config.cold_start)
+            self.stats.cold_starts += 1
+            self._warming = asyncio.ensure_future(asyncio.sleep(self.config.cold_start))
+        await asyncio.shield(self._warming)
+        self._warm = True
+        self._warming = None
+        self._last_request = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Output planning
+    # ------------------------------------------------------------------
+    def _next_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self._ids):08x}"
+
+    def _expand_item(self, item: dict, reasoning_budget: int) -> dict:
+        """Expands a shorthand script item into a Responses API output item."""
+        if item["type"] == "message":
+            return {
+                "type": "message",
+                "id": self._next_id("msg"),
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": item["text"], "annotations": []}],
+            }
+        if item["type"] == "reasoning":
+            text = item.get("text") or "".join(_words(reasoning_budget)).strip()
+            return {
+                "type": "reasoning",
+                "id": self._next_id("rs"),
+                "summary": [],
+                "content": [{"type": "reasoning_text", "text": text}],
+            }
+        if item["type"] == "function_call":
+            arguments = item.get("arguments", {})
+            return {
+                "type": "function_call",
+                "id": self._next_id("fc"),
+                "call_id": self._next_id("call"),
+                "name": item["name"],
+                "arguments": arguments if isinstance(arguments, str) else json.dumps(arguments),
+                "status": "completed",
+            }
+        return item
+
+    def _plan_output(self, body: dict) -> list[dict]:
+        input_items = body.get("input")
+        if not isinstance(input_items, list):
+            input_items = []
+        effort = (body.get("reasoning") or {}).get("effort") or "medium"
+        reasoning_tokens = round(self.config.reasoning_tokens * REASONING_EFFORT_SCALE.get(effort, 1.0))
+        max_tokens = body.get("max_output_tokens") or (reasoning_tokens + self.config.output_tokens)
+        reasoning_budget = min(reasoning_tokens, max(max_tokens // 2, 1))
+        output_budget = max(min(self.config.output_tokens, max_tokens - reasoning_budget), 1)
+
+        if self.config.script:
+            turn = sum(1 for item in input_items if item.get("type") == "function_call_output")
+            scripted = self.config.script[min(turn, len(self.config.script) - 1)]
+            return [self._expand_item(copy.deepcopy(item), reasoning_budget) for item in scripted]
+
+        items = []
+        if reasoning_budget:
+            items.append(self._expand_item({"type": "reasoning"}, reasoning_budget))
+
+        called = {item.get("name") for item in input_items if item.get("type") == "function_call"}
+        pending = [
+            tool
+            for tool in body.get("tools") or []
+            if tool.get("type") == "function" and tool.get("name") not in called
+        ]
+        if pending and body.get("tool_choice") != "none":
+            if body.get("parallel_tool_calls") is False:
+                pending = pending[:1]
+            for tool in pending:
+                parameters = tool.get("parameters") or {}
+                arguments = _sample_from_schema(parameters, parameters.get("$defs", {}))
+                items.append(
+                    self._expand_item({"type": "function_call", "name": tool["name"], "arguments": arguments}, 0)
+                )
+            return items
+
+        text_format = (body.get("text") or {}).get("format") or {}
+        if text_format.get("type") == "json_schema":
+            schema = text_format.get("schema") or {}
+            text = json.dumps(_sample_from_schema(schema, schema.get("$defs", {})))
+            if (body.get("nvext") or {}).get("guided_json") is not None:
+                self.stats.guided_requests += 1
+            elif self.config.malformed_json_rate and random.random() < self.config.malformed_json_rate:
+                self.stats.malformed_outputs += 1
+                text = _malform(text)
+        else:
+            text = "".join(_words(output_budget)).strip()
+        items.append(self._expand_item({"type": "message", "text": text}, 0))
+        return items
+
+    def _prefill(self, body: dict) -> tuple[int, int]:
+        """Input tokens of the prompt and how many of them the prefix cache holds, caching its prefixes.
+
+        The prompt is split into the instructions, the tool schemas and one segment per input item,
+        in request order and with keys as sent, so a reordered tool list misses the cache.
+        """
+        segments = [json.dumps([body.get("model"), body.get("instructions")]), json.dumps(body.get("tools") or [])]
+        segments += [json.dumps(item) for item in _input_items(body)]
+        digest = hashlib.sha256()
+        input_tokens = cached_tokens = 0
+        hit = True
+        for segment in segments:
+            digest.update(segment.encode())
+            key = digest.hexdigest()
+            tokens = _count_tokens(segment)
+            input_tokens += tokens
+            if hit and key in self._prefixes:
+                cached_tokens += tokens
+                self._prefixes.move_to_end(key)
+            else:
+                hit = False
+                self._prefixes[key] = None
+        while len(self._prefixes) > CACHED_PREFIXES:
+            self._prefixes.popitem(last=False)
+        return input_tokens, cached_tokens
+
+    def _response(
+        self,
+        body: dict,
+        output: list[dict],
+        status: str = "completed",
+        input_tokens: int | None = None,
+        cached_tokens: int = 0,
+    ) -> dict:
+        reasoning_tokens = sum(
+            _count_tokens(part["text"]) for item in output if item["type"] == "reasoning" for part in item["content"]
+        )
+        output_tokens = reasoning_tokens + sum(
+            _count_tokens(item["content"][0]["text"] if item["type"] == "message" else item["arguments"])
+            for item in output
+            if item["type"] in ("message", "function_call")
+        )
+        if input_tokens is None:
+            input_tokens = _count_tokens(json.dumps(body.get("input", "")) + json.dumps(body.get("tools", [])))
+        return {
+            "id": self._next_id("resp"),
+            "object": "response",
+            "created_at": time.time(),
+            "status": status,
+            "model": body.get("model", self.config.model),
+            "instructions": body.get("instructions"),
+            "output": output,
+            "parallel_tool_calls": body.get("parallel_tool_calls", True),
+            "tool_choice": body.get("tool_choice", "auto"),
+            "tools": body.get("tools", []),
+            "text": body.get("text", {"format": {"type": "text"}}),
+            "reasoning": body.get("reasoning"),
+            "max_output_tokens": body.get("max_output_tokens"),
+            "previous_response_id": body.get("previous_response_id"),
+            "metadata": {},
+            "error": None,
+            "incomplete_details": None,
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": cached_tokens},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": reasoning_tokens},
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Token pacing
+    # ------------------------------------------------------------------
+    async def _pace(self, started: float, tokens: int) -> None:
+        """Sleeps until `tokens` tokens would have been generated since `started`."""
+        target = started + self.config.ttft
+        if self.config.tokens_per_second > 0:
+            target += tokens / self.config.tokens_per_second
+        delay = target - time.monotonic()
+        if delay > 0.001:
+            await asyncio.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # HTTP handlers
+    # ------------------------------------------------------------------
+    def _overloaded(self) -> web.Response | None:
+        """429 when over `max_concurrency`, 503 for a random `error_rate` share of requests, else None."""
+        headers = {"Retry-After": f"{self.config.retry_after:g}"}
+        limit = self.config.max_concurrency
+        if limit is not None and self.stats.in_flight >= limit:
+            self.stats.rejected += 1
+            error = {"message": "Too many concurrent requests", "type": "rate_limit_exceeded", "code": 429}
+            return web.json_response({"error": error}, status=429, headers=headers)
+        if self.config.error_rate and random.random() < self.config.error_rate:
+            self.stats.failed += 1
+            error = {"message": "Replica unavailable", "type": "service_unavailable", "code": 503}
+            return web.json_response({"error": error}, status=503, headers=headers)
+        return None
+
+    def _with_history(self, body: dict) -> dict | None:
+        """Prepends the conversation of `previous_response_id` to the input, or None when it is unknown."""
+        previous = body.get("previous_response_id")
+        if not previous:
+            return body
+        history = self._conversations.get(previous)
+        if history is None:
+            return None
+        return {**body, "input": history + _input_items(body)}
+
+    def _store(self, body: dict, response: dict) -> None:
+        if body.get("store") is False:
+            return
+        self._conversations[response["id"]] = _input_items(body) + response["output"]
+        while len(self._conversations) > STORED_RESPONSES:
+            self._conversations.popitem(last=False)
+
+    async def handle_responses(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats.requests += 1
+        if (rejection := self._overloaded()) is not None:
+            return rejection
+        body = self._with_history(body)
+        if body is None:
+            error = {
+                "message": "Previous response not found",
+                "type": "invalid_request_error",
+                "param": "previous_response_id",
+            }
+            return web.json_response({"error": error}, status=404)
+        self.stats.in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+        started = time.monotonic()
+        try:
+            await self._ensure_warm()
+            started = time.monotonic()
+            input_tokens, cached_tokens = self._prefill(body)
+            # Generation starts once the uncached part of the prompt has been processed
+            prefill = 0.0
+            if self.config.prefill_tokens_per_second > 0:
+                prefill = (input_tokens - cached_tokens) / self.config.prefill_tokens_per_second
+            output = self._plan_output(body)
+            response = self._response(body, output, input_tokens=input_tokens, cached_tokens=cached_tokens)
+            self._store(body, response)
+            usage = response["usage"]
+            self.stats.input_tokens += usage["input_tokens"]
+            self.stats.cached_tokens += cached_tokens
+            self.stats.output_tokens += usage["output_tokens"]
+            self.stats.reasoning_tokens += usage["output_tokens_details"]["reasoning_tokens"]
+            if body.get("stream"):
+                self.stats.streaming_requests += 1
+                return await self._stream(request, body, response, started + prefill)
+            await self._pace(started + prefill, usage["output_tokens"])
+            return web.json_response(response)
+        finally:
+            self.stats.in_flight -= 1
+            self.stats.server_seconds += time.monotonic() - started
+
+    async def _stream(self, request: web.Request, body: dict, response: dict, started: float) -> web.StreamResponse:
+        stream = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await stream.prepare(request)
+        sequence = itertools.count()
+        tokens = 0
+
+        async def send(event: dict) -> None:
+            event["sequence_number"] = next(sequence)
+            await stream.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+
+        in_progress = {**response, "status": "in_progress", "output": [], "usage": None}
+        await send({"type": "response.created", "response": in_progress})
+        await send({"type": "response.in_progress", "response": in_progress})
+        for index, item in enumerate(response["output"]):
+            if item["type"] == "message":
+                text = item["content"][0]["text"]
+                await send(
+                    {
+                        "type": "response.output_item.added",
+                        "output_index": index,
+                        "item": {**item, "content": [], "status": "in_progress"},
+                    }
+                )
+                part = {"type": "output_text", "text": "", "annotations": []}
+                await send(
+                    {
+                        "type": "response.content_part.added",
+                        "item_id": item["id"],
+                        "output_index": index,
+                        "content_index": 0,
+                        "part": part,
+                    }
+                )
+                for delta in _split_deltas(text):
+                    tokens += 1
+                    await self._pace(started, tokens)
+                    await send(
+                        {
+                            "type": "response.output_text.delta",
+                            "item_id": item["id"],
+                            "output_index": index,
+                            "content_index": 0,
+                            "delta": delta,
+                            "logprobs": [],
+                        }
+                    )
+                await send(
+                    {
+                        "type": "response.output_text.done",
+                        "item_id": item["id"],
+                        "output_index": index,
+                        "content_index": 0,
+                        "text": text,
+                        "logprobs": [],
+                    }
+                )
+                await send(
+                    {
+                        "type": "response.content_part.done",
+                        "item_id": item["id"],
+                        "output_index": index,
+                        "content_index": 0,
+                        "part": item["content"][0],
+                    }
+                )
+            elif item["type"] == "reasoning":
+                text = item["content"][0]["text"]
+                await send(
+                    {"type": "response.output_item.added", "output_index": index, "item": {**item, "content": []}}
+                )
+                for delta in _split_deltas(text):
+                    tokens += 1
+                    await self._pace(started, tokens)
+                    await send(
+                        {
+                            "type": "response.reasoning_text.delta",
+                            "item_id": item["id"],
+                            "output_index": index,
+                            "content_index": 0,
+                            "delta": delta,
+                        }
+                    )
+                await send(
+                    {
+                        "type": "response.reasoning_text.done",
+                        "item_id": item["id"],
+                        "output_index": index,
+                        "content_index": 0,
+                        "text": text,
+                    }
+                )
+            elif item["type"] == "function_call":
+                await send(
+                    {
+                        "type": "response.output_item.added",
+                        "output_index": index,
+                        "item": {**item, "arguments": "", "status": "in_progress"},
+                    }
+                )
+                tokens += _count_tokens(item["arguments"])
+                await self._pace(started, tokens)
+                await send(
+                    {
+                        "type": "response.function_call_arguments.delta",
+                        "item_id": item["id"],
+                        "output_index": index,
+                        "delta": item["arguments"],
+                    }
+                )
+                await send(
+                    {
+                        "type": "response.function_call_arguments.done",
+                        "item_id": item["id"],
+                        "output_index": index,
+                        "name": item["name"],
+                        "arguments": item["arguments"],
+                    }
+                )
+            await send({"type": "response.output_item.done", "output_index": index, "item": item})
+        await send({"type": "response.completed", "response": response})
+        await stream.write_eof()
+        return stream
+
+    async def handle_models(self, request: web.Request) -> web.Response:
+        await self._ensure_warm()
+        return web.json_response(
+            {
+                "object": "list",
+                "data": [{"id": self.config.model, "object": "model", "created": 0, "owned_by": "mock-nim"}],
+            }
+        )
+
+    async def handle_ready(self, request: web.Request) -> web.Response:
+        await self._ensure_warm()
+        return web.json_response({"object": "health.response", "message": "Service is ready."})
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats.__dict__)
+
+    async def handle_stats_reset(self, request: web.Request) -> web.Response:
+        self.stats = MockNIMStats()
+        return web.json_response(self.stats.__dict__)
+
+
+def _split_deltas(text: str) -> list[str]:
+    """Splits text into word-sized deltas, keeping the separating whitespace."""
+    deltas = [word + " " for word in text.split(" ")]
+    deltas[-1] = deltas[-1][:-1]
+    return deltas
+
+
+def create_app(config: MockNIMConfig) -> web.Application:
+    mock = MockNIM(config)
+    app = web.Application(client_max_size=32 * 1024 * 1024)
+    app["mock"] = mock
+    app.router.add_post("/v1/responses", mock.handle_responses)
+    app.router.add_get("/v1/models", mock.handle_models)
+    app.router.add_get("/v1/health/ready", mock.handle_ready)
+    app.router.add_get("/stats", mock.handle_stats)
+    app.router.add_post("/stats/reset", mock.handle_stats_reset)
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve(config: MockNIMConfig, host: str = "127.0.0.1", port: int = 0):
+    """Runs the mock server inside the current event loop and yields its `/v1/` base URL."""
+    runner = web.AppRunner(create_app(config), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port, backlog=4096)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    try:
+        yield f"http://{host}:{bound_port}/v1/"
+    finally:
+        await runner.cleanup()
+
+
+def load_script(path: str) -> list[list[dict]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local mock NIM Responses server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--model", default="gpt-oss-20b")
+    parser.add_argument("--ttft", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="0 generates instantly")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="Seconds the first request waits")
+    parser.add_argument("--scale-to-zero-after", type=float, default=None, help="Idle seconds before cold again")
+    parser.add_argument("--reasoning-tokens", type=int, default=16)
+    parser.add_argument("--output-tokens", type=int, default=24)
+    parser.add_argument("--script", help="JSON file with a list of turns of shorthand output items")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Reject requests above this with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429 and 503")
+    parser.add_argument(
+        "--prefill-tokens-per-second", type=float, default=0.0, help="Prompt processing speed, 0 is instant"
+    )
+    parser.add_argument(
+        "--malformed-json-rate", type=float, default=0.0, help="Fraction of unguided structured outputs to break"
+    )
+    args = parser.parse_args()
+
+    config = MockNIMConfig(
+        model=args.model,
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        cold_start=args.cold_start,
+        scale_to_zero_after=args.scale_to_zero_after,
+        reasoning_tokens=args.reasoning_tokens,
+        output_tokens=args.output_tokens,
+        script=load_script(args.script) if args.script else None,
+        max_concurrency=args.max_concurrency,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        prefill_tokens_per_second=args.prefill_tokens_per_second,
+        malformed_json_rate=args.malformed_json_rate,
+    )
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(create_app(config), host=args.host, port=args.port, access_log=None, backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Client-side load balancing over several NIM endpoints (replicas or regions).
+
+`BalancingTransport` sends each request of the shared async client to one of the `NIM_ENDPOINTS`,
+rewriting the client's base URL. It picks with power-of-two-choices: two random endpoints that
+are not ejected, keeping the one with the lower latency average times outstanding requests.
+Endpoints are ejected for a while, with exponential backoff, when:
+    * several requests in a row fail with a connection error, a timeout, 429, 502, 503 or 504;
+    * their latency average is `slow_factor` times that of the fastest endpoint (a cold replica).
+Retries done by the OpenAI SDK go through the balancer again, so they usually land on another
+endpoint.
+
+The health probe of `<endpoint>/health/ready` is off by default. Any request keeps a serverless
+replica from scaling to zero, so probing every endpoint would keep them all running, and a replica
+that did scale to zero fails a short probe while it starts. With `NIM_HEALTH_INTERVAL` set, only
+endpoints out of rotation are probed: an ejected endpoint that fails the probe stays out until it
+passes, and one that passes comes back before its ejection ends.
+
+Settings are read from the environment (all optional except `NIM_ENDPOINTS`):
+    NIM_ENDPOINTS            Comma-separated base URLs, e.g. `https://a.../v1/,https://b.../v1/`
+    NIM_HEALTH_INTERVAL      Seconds between health probes of ejected endpoints (default 0, off)
+    NIM_HEALTH_TIMEOUT       Seconds a health probe may take (default 2)
+    NIM_EJECT_AFTER_FAILURES Consecutive failures that eject an endpoint (default 3)
+    NIM_EJECT_SECONDS        First ejection time, doubled for each repeated ejection (default 30)
+    NIM_SLOW_FACTOR          Latency ratio to the fastest endpoint that ejects it (default 3.0)
+
+Try it with mock servers of different speeds:
+    python examples/mock_nim_server.py --port 8001
+    python examples/mock_nim_server.py --port 8003 --ttft 0.2 --tokens-per-second 200
+    NIM_ENDPOINTS=http://localhost:8001/v1/,http://localhost:8003/v1/ python examples/batch_runner.py prompts.jsonl
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import httpx
+from nim_limiter import ReleasingStream
+
+logger = logging.getLogger("nim_balancer")
+
+FAILURE_STATUS_CODES = (429, 502, 503, 504)
+HEALTH_PATH = "health/ready"
+# Latency samples an endpoint needs before it can be ejected as slow
+MIN_SAMPLES = 5
+
+
+@dataclass
+class Endpoint:
+    base_url: httpx.URL
+    outstanding: int = 0
+    latency: float | None = None  # moving average of the time to response headers
+    samples: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ejected_at: float = 0.0
+    ejected_until: float = 0.0
+    healthy: bool = True
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def stats(self) -> dict:
+        return {
+            "endpoint": str(self.base_url),
+            "available": self.available(time.monotonic()),
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "latency_ms": (self.latency or 0.0) * 1000,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+        }
+
+
+class EndpointBalancer:
+    """Power-of-two-choices over endpoints, with failure, latency and health based ejection."""
+
+    def __init__(
+        self,
+        base_urls: list[str],
+        eject_after_failures: int = 3,
+        eject_seconds: float = 30.0,
+        slow_factor: float = 3.0,
+        smoothing: float = 0.2,
+        health_interval: float = 0.0,
+        health_timeout: float = 2.0,
+    ):
+        if not base_urls:
+            raise ValueError("EndpointBalancer needs at least one endpoint")
+        self.endpoints = [Endpoint(httpx.URL(url.rstrip("/") + "/")) for url in base_urls]
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.slow_factor = slow_factor
+        self.smoothing = smoothing
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        _balancers.append(self)
+
+    def _score(self, endpoint: Endpoint, default_latency: float) -> float:
+        latency = endpoint.latency if endpoint.latency is not None else default_latency
+        return latency * (endpoint.outstanding + 1)
+
+    def pick(self) -> Endpoint:
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.available(now)]
+        if not candidates:
+            # Everything is ejected: use the healthy endpoint that comes back first, or any at all
+            candidates = [min(self.endpoints, key=lambda endpoint: (not endpoint.healthy, endpoint.ejected_until))]
+        if len(candidates) == 1:
+            return candidates[0]
+        known = [endpoint.latency for endpoint in candidates if endpoint.latency is not None]
+        # Endpoints without samples yet count as fast as the best one, so they get traffic
+        default_latency = min(known) if known else 1.0
+        first, second = random.sample(candidates, 2)
+        return min(first, second, key=lambda endpoint: self._score(endpoint, default_latency))
+
+    def _eject(self, endpoint: Endpoint, reason: str) -> None:
+        seconds = self.eject_seconds * 2 ** min(endpoint.ejections, 5)
+        endpoint.ejections += 1
+        endpoint.ejected_at = time.monotonic()
+        endpoint.ejected_until = endpoint.ejected_at + seconds
+        # Start afresh when it comes back, a cold replica will be warm by then
+        endpoint.latency = None
+        endpoint.samples = 0
+        endpoint.consecutive_failures = 0
+        logger.warning("Ejecting %s for %.0fs: %s", endpoint.base_url, seconds, reason)
+
+    def on_success(self, endpoint: Endpoint, started: float, latency: float) -> None:
+        if started < endpoint.ejected_at:
+            # Sent before the ejection, it describes the replica as it was then
+            return
+        endpoint.consecutive_failures = 0
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            endpoint.latency = self.smoothing * latency + (1 - self.smoothing) * endpoint.latency
+        endpoint.samples += 1
+        now = time.monotonic()
+        others = [
+            other.latency
+            for other in self.endpoints
+            if other is not endpoint and other.available(now) and other.latency is not None
+        ]
+        if endpoint.samples >= MIN_SAMPLES and others and endpoint.latency > self.slow_factor * min(others):
+            self._eject(endpoint, f"latency {endpoint.latency * 1000:.0f} ms vs {min(others) * 1000:.0f} ms")
+
+    def on_failure(self, endpoint: Endpoint, started: float, reason: str) -> None:
+        endpoint.failures += 1
+        if started < endpoint.ejected_at:
+            return
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.eject_after_failures and endpoint.available(time.monotonic()):
+            self._eject(endpoint, f"{endpoint.consecutive_failures} failures in a row, last {reason}")
+
+    def on_health(self, endpoint: Endpoint, healthy: bool) -> None:
+        if healthy and not endpoint.healthy:
+            logger.info("%s is healthy again", endpoint.base_url)
+            # A passing probe overrides an ejection, the replica answers again
+            endpoint.ejected_until = 0.0
+        elif not healthy and endpoint.healthy:
+            logger.warning("%s failed its health probe", endpoint.base_url)
+        endpoint.healthy = healthy
+
+    def stats(self) -> list[dict]:
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+
+_balancers: list[EndpointBalancer] = []
+
+
+def balancer_stats() -> list[list[dict]]:
+    """Per-endpoint metrics of every balancer in the process."""
+    return [balancer.stats() for balancer in _balancers]
+
+
+class BalancingTransport(httpx.AsyncBaseTransport):
+    """Routes requests for `base_url` to the endpoint the balancer picks, probing endpoint health."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, balancer: EndpointBalancer, base_url: str):
+        self._transport = transport
+        self.balancer = balancer
+        self._base_url = httpx.URL(base_url.rstrip("/") + "/")
+        self._health_task: asyncio.Task | None = None
+
+    def _route(self, request: httpx.Request, endpoint: Endpoint) -> None:
+        path = request.url.raw_path.decode("ascii")
+        prefix = self._base_url.raw_path.decode("ascii")
+        if request.url.host != self._base_url.host or not path.startswith(prefix):
+            return
+        request.url = endpoint.base_url.join(path[len(prefix) :])
+        request.headers["Host"] = request.url.netloc.decode("ascii")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._health_task is None and self.balancer.health_interval > 0:
+            self._health_task = asyncio.create_task(self._probe_forever())
+        endpoint = self.balancer.pick()
+        self._route(request, endpoint)
+        endpoint.requests += 1
+        endpoint.outstanding += 1
+        started = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            endpoint.outstanding -= 1
+            self.balancer.on_failure(endpoint, started, type(e).__name__)
+            raise
+        except BaseException:
+            endpoint.outstanding -= 1
+            raise
+        if response.status_code in FAILURE_STATUS_CODES:
+            self.balancer.on_failure(endpoint, started, f"HTTP {response.status_code}")
+        elif response.status_code < 500:
+            self.balancer.on_success(endpoint, started, time.monotonic() - started)
+
+        def release() -> None:
+            endpoint.outstanding -= 1
+
+        response.stream = ReleasingStream(response.stream, release)
+        return response
+
+    async def _probe(self, endpoint: Endpoint) -> None:
+        request = httpx.Request("GET", endpoint.base_url.join(HEALTH_PATH))
+        try:
+            response = await asyncio.wait_for(
+                self._transport.handle_async_request(request), self.balancer.health_timeout
+            )
+            await response.aclose()
+            healthy = response.status_code == 200
+        except (asyncio.TimeoutError, httpx.HTTPError):
+            healthy = False
+        self.balancer.on_health(endpoint, healthy)
+
+    async def _probe_forever(self) -> None:
+        while True:
+            # Endpoints in rotation are left alone, so idle replicas can still scale to zero
+            now = time.monotonic()
+            out = [endpoint for endpoint in self.balancer.endpoints if not endpoint.available(now)]
+            await asyncio.gather(*(self._probe(endpoint) for endpoint in out))
+            await asyncio.sleep(self.balancer.health_interval)
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+        await self._transport.aclose()
+
+
+def balancer_from_env(env: Mapping[str, str]) -> EndpointBalancer | None:
+    """Builds the balancer for the endpoints listed in `NIM_ENDPOINTS`, or None when there are none."""
+    base_urls = [url.strip() for url in env.get("NIM_ENDPOINTS", "").split(",") if url.strip()]
+    if not base_urls:
+        return None
+    return EndpointBalancer(
+        base_urls,
+        eject_after_failures=int(env.get("NIM_EJECT_AFTER_FAILURES", "3")),
+        eject_seconds=float(env.get("NIM_EJECT_SECONDS", "30")),
+        slow_factor=float(env.get("NIM_SLOW_FACTOR", "3.0")),
+        health_interval=float(env.get("NIM_HEALTH_INTERVAL", "0")),
+        health_timeout=float(env.get("NIM_HEALTH_TIMEOUT", "2")),
+    )
@@ -0,0 +1,299 @@
+"""Response cache in front of the NIM endpoint.
+
+`CachingTransport` sits inside the shared `AsyncOpenAI` client from `nim_client.py`, so it is
+transparent to the OpenAI Agents, PydanticAI and Agent Framework examples. Non-streaming
+`POST /responses` calls are keyed on a hash of the whole canonicalized request body, apart from
+`VOLATILE_FIELDS` such as `stream` and `metadata`, so sampling settings, `previous_response_id`
+or `parallel_tool_calls` all keep requests apart. An optional near-duplicate mode also serves a
+cached response when the conversation text of a new request has a word-shingle Jaccard similarity
+above a threshold with a cached one whose other fields are all the same.
+
+Enable it through the environment:
+    NIM_CACHE=memory|disk              Turns the cache on with the given backend
+    NIM_CACHE_TTL=3600                 Seconds an entry stays valid
+    NIM_CACHE_MAXSIZE=1024             Entries kept before least-recently-used eviction
+    NIM_CACHE_PATH=.nim_cache.sqlite   File used by the disk backend
+    NIM_CACHE_NEAR_DUPLICATE=0.9       Jaccard threshold for near-duplicate hits (off when unset)
+
+Send the header `x-nim-cache: bypass` to skip the cache for one request.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+import httpx
+
+logger = logging.getLogger("nim_cache")
+
+CACHE_HEADER = "x-nim-cache"
+_STORED_HEADERS = ("content-type", "content-encoding")
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+# Request fields that do not change the response, left out of the cache key
+VOLATILE_FIELDS = ("stream", "stream_options", "metadata", "user", "safety_identifier")
+
+
+@dataclass
+class CacheEntry:
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    stored_at: float
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> CacheEntry | None: ...
+
+    def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class MemoryBackend:
+    """Keeps entries in process memory, evicting the least recently used beyond `maxsize`."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class SQLiteBackend:
+    """Keeps entries in a SQLite file so they survive restarts, with least-recently-used eviction."""
+
+    def __init__(self, path: str = ".nim_cache.sqlite", maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, status_code INTEGER, headers TEXT, body BLOB, stored_at REAL, accessed_at REAL)"
+        )
+
+    def get(self, key: str) -> CacheEntry | None:
+        row = self._db.execute(
+            "SELECT status_code, headers, body, stored_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        status_code, headers, body, stored_at = row
+        return CacheEntry(status_code, [tuple(header) for header in json.loads(headers)], body, stored_at)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (key, entry.status_code, json.dumps(entry.headers), entry.body, entry.stored_at, time.time()),
+        )
+        self._db.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    def delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _key_fields(body: dict) -> dict:
+    """The request without `VOLATILE_FIELDS`, with tools in a stable order."""
+    fields = {name: value for name, value in body.items() if name not in VOLATILE_FIELDS}
+    if fields.get("tools"):
+        fields["tools"] = sorted(fields["tools"], key=lambda tool: (tool.get("type", ""), tool.get("name", "")))
+    return fields
+
+
+def _bucket_fields(body: dict) -> dict:
+    """Request fields that must match exactly, even for near-duplicate hits: everything but the input."""
+    fields = _key_fields(body)
+    fields.pop("input", None)
+    return fields
+
+
+def cache_key(body: dict) -> str:
+    """Hash of the canonicalized request, leaving out the fields that do not change the response."""
+    return hashlib.sha256(_canonical(_key_fields(body)).encode()).hexdigest()
+
+
+def _conversation_text(body: dict) -> str | None:
+    """Concatenated message text, or None when the input carries tool calls and must match exactly."""
+    input_items = body.get("input")
+    if isinstance(input_items, str):
+        return input_items
+    parts = []
+    for item in input_items or []:
+        if item.get("type", "message") != "message":
+            return None
+        content = item.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(f"{item.get('role', '')}: {content}")
+    return "\n".join(parts)
+
+
+def shingles(text: str, size: int = 3) -> frozenset[int]:
+    """Hashed word `size`-grams of the lowercased text with punctuation and extra whitespace removed."""
+    words = _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).split()
+    if len(words) < size:
+        return frozenset([zlib.crc32(" ".join(words).encode())])
+    return frozenset(zlib.crc32(" ".join(words[i : i + size]).encode()) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: frozenset[int], b: frozenset[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        ttl: float = 3600.0,
+        near_duplicate_threshold: float | None = None,
+        max_near_duplicates: int = 1024,
+    ):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.max_near_duplicates = max_near_duplicates
+        # bucket hash -> {cache key: shingles}, only kept in memory
+        self._near_index: dict[str, OrderedDict[str, frozenset[int]]] = {}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def _fresh(self, key: str) -> CacheEntry | None:
+        entry = self.backend.get(key)
+        if entry is not None and time.time() - entry.stored_at > self.ttl:
+            self.backend.delete(key)
+            return None
+        return entry
+
+    def _near_lookup(self, body: dict) -> tuple[str | None, str | None, frozenset[int] | None]:
+        text = _conversation_text(body)
+        if self.near_duplicate_threshold is None or text is None:
+            return None, None, None
+        bucket = hashlib.sha256(_canonical(_bucket_fields(body)).encode()).hexdigest()
+        candidate = shingles(text)
+        best_key, best_score = None, self.near_duplicate_threshold
+        for key, cached in self._near_index.get(bucket, {}).items():
+            score = jaccard(candidate, cached)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return bucket, best_key, candidate
+
+    def lookup(self, body: dict) -> tuple[str, CacheEntry | None, str]:
+        """Returns the request's cache key, a cached entry if any, and whether it was an exact or near hit."""
+        key = cache_key(body)
+        entry = self._fresh(key)
+        if entry is not None:
+            self.hits += 1
+            return key, entry, "hit"
+        bucket, near_key, _ = self._near_lookup(body)
+        if near_key is not None:
+            entry = self._fresh(near_key)
+            if entry is not None:
+                self.near_hits += 1
+                return key, entry, "near-hit"
+            self._near_index[bucket].pop(near_key, None)
+        self.misses += 1
+        return key, None, "miss"
+
+    def store(self, key: str, body: dict, entry: CacheEntry) -> None:
+        self.backend.set(key, entry)
+        bucket, _, candidate = self._near_lookup(body)
+        if bucket is not None:
+            index = self._near_index.setdefault(bucket, OrderedDict())
+            index[key] = candidate
+            while len(index) > self.max_near_duplicates:
+                index.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "near_hits": self.near_hits, "misses": self.misses}
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Serves non-streaming `POST .../responses` calls from a `ResponseCache`."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: ResponseCache):
+        self._transport = transport
+        self.cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if (
+            request.method != "POST"
+            or not request.url.path.endswith("/responses")
+            or request.headers.get(CACHE_HEADER) == "bypass"
+        ):
+            return await self._transport.handle_async_request(request)
+        body = json.loads(request.content or b"{}")
+        if body.get("stream") or body.get("background"):
+            return await self._transport.handle_async_request(request)
+
+        key, entry, outcome = self.cache.lookup(body)
+        if entry is not None:
+            logger.debug("Serving %s from cache (%s)", key[:12], outcome)
+            headers = [*entry.headers, (CACHE_HEADER, outcome)]
+            return httpx.Response(entry.status_code, headers=headers, content=entry.body, request=request)
+
+        response = await self._transport.handle_async_request(request)
+        if response.status_code != 200:
+            return response
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        await response.aclose()
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() in _STORED_HEADERS]
+        self.cache.store(key, body, CacheEntry(response.status_code, headers, raw, time.time()))
+        return httpx.Response(
+            response.status_code,
+            headers=[*response.headers.multi_items(), (CACHE_HEADER, "miss")],
+            content=raw,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def cache_from_env(env: dict) -> ResponseCache | None:
+    """Builds a `ResponseCache` from the `NIM_CACHE*` variables, or None when caching is off."""
+    backend_name = env.get("NIM_CACHE")
+    if not backend_name:
+        return None
+    maxsize = int(env.get("NIM_CACHE_MAXSIZE", "1024"))
+    if backend_name == "disk":
+        backend = SQLiteBackend(env.get("NIM_CACHE_PATH", ".nim_cache.sqlite"), maxsize=maxsize)
+    elif backend_name == "memory":
+        backend = MemoryBackend(maxsize=maxsize)
+    else:
+        raise ValueError(f"NIM_CACHE must be 'memory' or 'disk', got: {backend_name}")
+    threshold = env.get("NIM_CACHE_NEAR_DUPLICATE")
+    return ResponseCache(
+        backend,
+        ttl=float(env.get("NIM_CACHE_TTL", "3600")),
+        near_duplicate_threshold=float(threshold) if threshold else None,
+    )
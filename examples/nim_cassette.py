@@ -0,0 +1,348 @@
+"""Record and replay of model calls and tool calls, for deterministic offline benchmarks.
+
+The weekend planner and supervisor tools answer at random (5% sunny weather, a fridge that is empty
+half the time) and the model is remote, so two runs of the same example rarely do the same work.
+A cassette captures one run: every HTTP exchange of the shared async NIM client, with the time to
+response headers and the arrival time of each body chunk, and every call to a tool wrapped in
+`recorded_tool`, with its result and duration. Replaying it serves the same responses and tool
+results again, with the recorded timing, without a NIM endpoint. A framework upgrade or a
+client-side change then runs against exactly the same model and tool behavior.
+
+`nim_client` records or replays according to `NIM_CASSETTE`:
+    record  Pass requests through and write the run to `NIM_CASSETTE_FILE`
+            (default `run.cassette.jsonl.gz`, gzipped JSON lines)
+    replay  Answer from the cassette; nothing is sent to the network
+`NIM_CASSETTE_TIME_SCALE` multiplies the recorded delays on replay: 1 (default) keeps the original
+timing, 0.5 halves it, 0 replays as fast as possible.
+
+Requests are matched by method, path and JSON body, and repeated identical requests get their
+recorded responses in order. A request that was not recorded, for example because the client
+change under test rewrites bodies, gets the next unused response for the same path and counts as
+a miss. Tool calls match by tool name and arguments, falling back to the tool's next unused result.
+MCP tool calls are not recorded; they go to the MCP server as usual.
+
+    NIM_CASSETTE=record python examples/pydanticai_supervisor.py
+    NIM_CASSETTE=replay NIM_CASSETTE_TIME_SCALE=0 python examples/pydanticai_supervisor.py
+    python examples/nim_cassette.py run.cassette.jsonl.gz
+"""
+
+import asyncio
+import atexit
+import base64
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger("nim_cassette")
+
+MODES = ("off", "record", "replay")
+FORMAT_VERSION = 1
+
+
+def _chunk(delay: float, data: bytes) -> list:
+    try:
+        return [round(delay, 4), data.decode()]
+    except UnicodeDecodeError:
+        return [round(delay, 4), base64.b64encode(data).decode(), "base64"]
+
+
+def _chunk_bytes(chunk: list) -> bytes:
+    return base64.b64decode(chunk[1]) if len(chunk) > 2 else chunk[1].encode()
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def request_key(request: httpx.Request) -> str:
+    """Hash of the method, path and body of `request`, ignoring the key order of JSON bodies."""
+    body = request.content
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode() if body else b""
+    except ValueError:
+        pass
+    return _digest(f"{request.method} {request.url.path}\n".encode() + body)
+
+
+def tool_key(name: str, arguments: Mapping[str, Any]) -> str:
+    return _digest(json.dumps([name, arguments], sort_keys=True, default=repr).encode())
+
+
+def read_cassette(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class Cassette:
+    """The HTTP exchanges and tool calls of one run, written to or served from a gzipped JSONL file."""
+
+    def __init__(self, path: str, mode: str, time_scale: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', got: {mode}")
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.counts = {"http": 0, "tool": 0, "http_misses": 0, "tool_misses": 0}
+        # Tools may run in worker threads
+        self._lock = threading.Lock()
+        self._by_key: defaultdict[tuple, deque[dict]] = defaultdict(deque)
+        self._by_group: defaultdict[tuple, deque[dict]] = defaultdict(deque)
+        if mode == "record":
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self.record({"kind": "meta", "version": FORMAT_VERSION, "created": time.time()})
+        else:
+            for entry in read_cassette(path):
+                if entry.get("kind") in ("http", "tool"):
+                    entry["used"] = False
+                    self._by_key[entry["kind"], entry["key"]].append(entry)
+                    self._by_group[entry["kind"], entry["group"]].append(entry)
+        atexit.register(self.close)
+
+    def record(self, entry: dict) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+                self.counts[entry["kind"]] = self.counts.get(entry["kind"], 0) + 1
+
+    def take(self, kind: str, key: str, group: str) -> dict | None:
+        """The next unused entry recorded for `key`, else for `group` (a miss), else None."""
+        with self._lock:
+            for queue, exact in ((self._by_key[kind, key], True), (self._by_group[kind, group], False)):
+                while queue and queue[0]["used"]:
+                    queue.popleft()
+                if queue:
+                    entry = queue.popleft()
+                    entry["used"] = True
+                    self.counts[kind] += 1
+                    if not exact:
+                        self.counts[f"{kind}_misses"] += 1
+                        logger.warning("No %s recorded for this %s call, replaying the next one in order", kind, group)
+                    return entry
+        return None
+
+    async def sleep(self, seconds: float) -> None:
+        if seconds * self.time_scale > 0:
+            await asyncio.sleep(seconds * self.time_scale)
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "path": self.path, **self.counts}
+
+    def close(self) -> None:
+        if self.mode == "record" and not self._file.closed:
+            with self._lock:
+                self._file.close()
+            logger.info(
+                "Recorded %d HTTP exchanges and %d tool calls to %s",
+                self.counts["http"],
+                self.counts["tool"],
+                self.path,
+            )
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes the body through, noting each chunk and its delay, and records the exchange at the end."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, entry: dict, cassette: Cassette):
+        self._stream = stream
+        self._entry = entry
+        self._cassette = cassette
+        self._last = time.monotonic()
+        self._recorded = False
+
+    def _finish(self) -> None:
+        if not self._recorded:
+            self._recorded = True
+            self._cassette.record(self._entry)
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            now = time.monotonic()
+            self._entry["chunks"].append(_chunk(now - self._last, chunk))
+            self._last = now
+            yield chunk
+        self._finish()
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._finish()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: list[list], cassette: Cassette):
+        self._chunks = chunks
+        self._cassette = cassette
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await self._cassette.sleep(chunk[0])
+            yield _chunk_bytes(chunk)
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Records every exchange through `transport` into `cassette`, or replays them without it."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette):
+        self._transport = transport
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        group = f"{request.method} {request.url.path}"
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("http", key, group)
+            if entry is None:
+                raise httpx.ConnectError(f"No recorded response for {group} in {self.cassette.path}", request=request)
+            await self.cassette.sleep(entry["time_to_headers"])
+            return httpx.Response(
+                entry["status"],
+                headers=entry["headers"],
+                stream=_ReplayStream(entry["chunks"], self.cassette),
+                request=request,
+            )
+
+        started = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        entry = {
+            "kind": "http",
+            "key": key,
+            "group": group,
+            "status": response.status_code,
+            "headers": response.headers.multi_items(),
+            "time_to_headers": round(time.monotonic() - started, 4),
+            "chunks": [],
+        }
+        response.stream = _RecordingStream(response.stream, entry, self.cassette)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def cassette_from_env(env: Mapping[str, str]) -> Cassette | None:
+    """The cassette configured by `NIM_CASSETTE*`, or None when recording and replay are off."""
+    mode = env.get("NIM_CASSETTE", "off").strip().lower() or "off"
+    if mode not in MODES:
+        raise ValueError(f"NIM_CASSETTE must be one of {MODES}, got: {mode}")
+    if mode == "off":
+        return None
+    return Cassette(
+        env.get("NIM_CASSETTE_FILE", "run.cassette.jsonl.gz"),
+        mode,
+        time_scale=float(env.get("NIM_CASSETTE_TIME_SCALE", "1")),
+    )
+
+
+@functools.cache
+def get_cassette() -> Cassette | None:
+    """Returns the process-wide cassette shared by the NIM client and the recorded tools."""
+    return cassette_from_env(os.environ)
+
+
+def recorded_tool(func):
+    """Records a sync or async tool's results into the cassette, or serves them from it on replay.
+
+    Results must be JSON-serializable. Put it under `traced_tool`, so replayed calls are still traced,
+    and above `cached_tool`.
+    """
+    signature = inspect.signature(func)
+    name = func.__qualname__
+
+    def arguments(args, kwargs) -> dict:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return bound.arguments
+
+    def replayed(cassette: Cassette, args, kwargs) -> dict | None:
+        entry = cassette.take("tool", tool_key(name, arguments(args, kwargs)), name)
+        if entry is None:
+            logger.warning("No result recorded for %s, calling it", name)
+        return entry
+
+    def record(cassette: Cassette, args, kwargs, result, started: float) -> None:
+        entry = {
+            "kind": "tool",
+            "key": tool_key(name, arguments(args, kwargs)),
+            "group": name,
+            "result": result,
+            "duration": round(time.monotonic() - started, 4),
+        }
+        cassette.record(entry)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            cassette = get_cassette()
+            if cassette is not None and cassette.mode == "replay":
+                entry = replayed(cassette, args, kwargs)
+                if entry is not None:
+                    await cassette.sleep(entry["duration"])
+                    return entry["result"]
+            started = time.monotonic()
+            result = await func(*args, **kwargs)
+            if cassette is not None and cassette.mode == "record":
+                record(cassette, args, kwargs, result, started)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cassette = get_cassette()
+        if cassette is not None and cassette.mode == "replay":
+            entry = replayed(cassette, args, kwargs)
+            if entry is not None:
+                # Blocks like the recorded call did
+                time.sleep(entry["duration"] * cassette.time_scale)
+                return entry["result"]
+        started = time.monotonic()
+        result = func(*args, **kwargs)
+        if cassette is not None and cassette.mode == "record":
+            record(cassette, args, kwargs, result, started)
+        return result
+
+    return wrapper
+
+
+def summarize(path: str) -> dict:
+    """What a cassette holds: exchanges per endpoint with their recorded time, and calls per tool."""
+    http: defaultdict[str, dict] = defaultdict(lambda: {"count": 0, "seconds": 0.0, "bytes": 0})
+    tools: defaultdict[str, dict] = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+    meta = {}
+    for entry in read_cassette(path):
+        if entry["kind"] == "meta":
+            meta = entry
+        elif entry["kind"] == "http":
+            summary = http[f"{entry['group']} {entry['status']}"]
+            summary["count"] += 1
+            summary["seconds"] += entry["time_to_headers"] + sum(chunk[0] for chunk in entry["chunks"])
+            summary["bytes"] += sum(len(_chunk_bytes(chunk)) for chunk in entry["chunks"])
+        elif entry["kind"] == "tool":
+            tools[entry["group"]]["count"] += 1
+            tools[entry["group"]]["seconds"] += entry["duration"]
+    return {"meta": meta, "http": dict(http), "tools": dict(tools), "file_bytes": os.path.getsize(path)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from rich import print
+
+    parser = argparse.ArgumentParser(description="Summarize a recorded cassette")
+    parser.add_argument("path", nargs="?", default="run.cassette.jsonl.gz")
+    print(summarize(parser.parse_args().path))
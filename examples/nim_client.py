@@ -0,0 +1,225 @@
+"""Shared, pooled OpenAI clients for the NIM endpoint.
+
+Every example builds its client through this module, so one process reuses warm connections
+to the Azure Container Apps ingress across the OpenAI Agents, PydanticAI and Agent Framework
+code paths instead of paying a fresh TCP+TLS handshake per client.
+
+Tuning is read from the environment (all optional):
+    NIM_MAX_CONNECTIONS            Connection pool size (default 100)
+    NIM_MAX_KEEPALIVE_CONNECTIONS  Idle connections kept open (default 20)
+    NIM_KEEPALIVE_EXPIRY           Seconds an idle connection stays open (default 60)
+    NIM_HTTP2                      Multiplex requests over HTTP/2 for https endpoints (default true)
+    NIM_CONNECT_TIMEOUT            Seconds to establish a connection (default 10)
+    NIM_FIRST_BYTE_TIMEOUT         Seconds to wait for response headers, covering cold starts (default 300)
+    NIM_READ_TIMEOUT               Seconds between body chunks once the response started (default 60)
+    NIM_MAX_RETRIES                Retries done by the OpenAI SDK (default 2)
+
+The async client also picks up the response cache settings (`NIM_CACHE*`) from `nim_cache.py`,
+the adaptive concurrency limit (`NIM_ADAPTIVE_CONCURRENCY*`) from `nim_limiter.py`, the
+endpoint list (`NIM_ENDPOINTS`) for load balancing from `nim_balancer.py`, prompt prefix
+normalization (`NIM_NORMALIZE`) from `nim_normalize.py`, structured output handling
+(`NIM_STRUCTURED_OUTPUT`) from `structured_output.py`, OpenTelemetry export (`NIM_TELEMETRY`)
+from `telemetry.py`, run recording and replay (`NIM_CASSETTE*`) from `nim_cassette.py`, and the
+reasoning effort policy (`NIM_EFFORT*`) from `nim_effort.py`. The blocking client only picks up the
+reasoning effort policy and OpenTelemetry export.
+"""
+
+import asyncio
+import functools
+import os
+from dataclasses import dataclass
+
+import httpx
+import openai
+from nim_balancer import BalancingTransport, balancer_from_env
+from nim_cache import CachingTransport, cache_from_env
+from nim_cassette import CassetteTransport, get_cassette
+from nim_effort import EffortTransport, effort_mode, effort_policy_from_env
+from nim_limiter import LimitingTransport, limiter_from_env
+from nim_normalize import NormalizingTransport, normalizer_mode
+from nim_warmup import ActivityTransport
+from structured_output import StructuredOutputTransport, structured_output_mode
+from telemetry import TracingTransport, telemetry_from_env
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class NIMClientSettings:
+    base_url: str
+    api_key: str = "none"
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    http2: bool = True
+    connect_timeout: float = 10.0
+    first_byte_timeout: float = 300.0
+    read_timeout: float = 60.0
+    max_retries: int = 2
+
+    @classmethod
+    def from_env(cls) -> "NIMClientSettings":
+        return cls(
+            # With several endpoints the balancer routes every request, the first one is only a placeholder
+            base_url=os.getenv("NIM_ENDPOINT") or os.environ["NIM_ENDPOINTS"].split(",")[0].strip(),
+            max_connections=int(os.getenv("NIM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("NIM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("NIM_KEEPALIVE_EXPIRY", "60")),
+            http2=_env_bool("NIM_HTTP2", True),
+            connect_timeout=float(os.getenv("NIM_CONNECT_TIMEOUT", "10")),
+            first_byte_timeout=float(os.getenv("NIM_FIRST_BYTE_TIMEOUT", "300")),
+            read_timeout=float(os.getenv("NIM_READ_TIMEOUT", "60")),
+            max_retries=int(os.getenv("NIM_MAX_RETRIES", "2")),
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        # The socket read timeout also covers waiting for headers, so it must allow for a cold start.
+        # The async transport enforces the shorter `read_timeout` on the body on its own.
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=max(self.read_timeout, self.first_byte_timeout),
+            write=self.read_timeout,
+            pool=self.first_byte_timeout,
+        )
+
+
+class _ChunkTimeoutStream(httpx.AsyncByteStream):
+    """Raises `httpx.ReadTimeout` when the gap between two body chunks exceeds `timeout`."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, timeout: float, request: httpx.Request):
+        self._stream = stream
+        self._timeout = timeout
+        self._request = request
+
+    async def __aiter__(self):
+        chunks = self._stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), self._timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError as e:
+                raise httpx.ReadTimeout(f"No data received for {self._timeout}s", request=self._request) from e
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class PhaseTimeoutTransport(httpx.AsyncBaseTransport):
+    """Applies separate first-byte and between-chunk read timeouts on top of another transport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, first_byte_timeout: float, read_timeout: float):
+        self._transport = transport
+        self._first_byte_timeout = first_byte_timeout
+        self._read_timeout = read_timeout
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            response = await asyncio.wait_for(self._transport.handle_async_request(request), self._first_byte_timeout)
+        except asyncio.TimeoutError as e:
+            raise httpx.ReadTimeout(f"No response within {self._first_byte_timeout}s", request=request) from e
+        response.stream = _ChunkTimeoutStream(response.stream, self._read_timeout, request)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def build_async_transport(settings: NIMClientSettings) -> httpx.AsyncBaseTransport:
+    transport = httpx.AsyncHTTPTransport(http2=settings.http2, limits=settings.limits)
+    # Innermost, so a replay stands in for the network under every client-side layer
+    cassette = get_cassette()
+    if cassette is not None:
+        transport = CassetteTransport(transport, cassette)
+    transport = PhaseTimeoutTransport(transport, settings.first_byte_timeout, settings.read_timeout)
+    # Under the cache, so only requests that reach the replica count as keeping it busy for `KeepWarm`
+    transport = ActivityTransport(transport)
+    balancer = balancer_from_env(os.environ)
+    if balancer is not None:
+        transport = BalancingTransport(transport, balancer, settings.base_url)
+    # Inside the limiter, so the latency it steers by leaves out the wait for a concurrency slot
+    mode = effort_mode(os.environ)
+    if mode is not None:
+        transport = EffortTransport(transport, effort_policy_from_env(os.environ), mode, os.getenv("NIM_EFFORT_LOG"))
+    limiter = limiter_from_env(os.environ)
+    if limiter is not None:
+        transport = LimitingTransport(transport, limiter)
+    # Inside the cache, which keys on the request as the caller built it
+    mode = normalizer_mode(os.environ)
+    if mode is not None:
+        transport = NormalizingTransport(transport, mode)
+    # Inside the cache, so repaired outputs are what gets cached
+    mode = structured_output_mode(os.environ)
+    if mode is not None:
+        transport = StructuredOutputTransport(transport, mode)
+    # Outermost, so cache hits do not take a concurrency slot
+    cache = cache_from_env(os.environ)
+    if cache is not None:
+        transport = CachingTransport(transport, cache)
+    # Outermost of all, so model call spans cover what the caller waits for, cache hits included
+    if telemetry_from_env(os.environ):
+        transport = TracingTransport(transport)
+    return transport
+
+
+def build_sync_transport(settings: NIMClientSettings) -> httpx.BaseTransport:
+    transport = ActivityTransport(httpx.HTTPTransport(http2=settings.http2, limits=settings.limits))
+    mode = effort_mode(os.environ)
+    if mode is not None:
+        transport = EffortTransport(transport, effort_policy_from_env(os.environ), mode, os.getenv("NIM_EFFORT_LOG"))
+    if telemetry_from_env(os.environ):
+        transport = TracingTransport(transport)
+    return transport
+
+
+def create_async_client(settings: NIMClientSettings | None = None) -> openai.AsyncOpenAI:
+    """Creates a new `AsyncOpenAI` client with its own connection pool."""
+    settings = settings or NIMClientSettings.from_env()
+    http_client = openai.DefaultAsyncHttpxClient(transport=build_async_transport(settings), timeout=settings.timeout)
+    return openai.AsyncOpenAI(
+        base_url=settings.base_url,
+        api_key=settings.api_key,
+        timeout=settings.timeout,
+        max_retries=settings.max_retries,
+        http_client=http_client,
+    )
+
+
+def create_sync_client(settings: NIMClientSettings | None = None) -> openai.OpenAI:
+    """Creates a new blocking `OpenAI` client with its own connection pool."""
+    settings = settings or NIMClientSettings.from_env()
+    http_client = openai.DefaultHttpxClient(transport=build_sync_transport(settings), timeout=settings.timeout)
+    return openai.OpenAI(
+        base_url=settings.base_url,
+        api_key=settings.api_key,
+        timeout=settings.timeout,
+        max_retries=settings.max_retries,
+        http_client=http_client,
+    )
+
+
+@functools.cache
+def get_async_client() -> openai.AsyncOpenAI:
+    """Returns the process-wide `AsyncOpenAI` client shared by all frameworks."""
+    return create_async_client()
+
+
+@functools.cache
+def get_sync_client() -> openai.OpenAI:
+    """Returns the process-wide blocking `OpenAI` client."""
+    return create_sync_client()
@@ -0,0 +1,470 @@
+"""Per-request reasoning effort for gpt-oss on NIM.
+
+Reasoning tokens dominate the latency of gpt-oss-20b, yet the examples either leave the effort to
+the server default or, like `openai_reasoning.py`, fix one level for every call. `EffortTransport`
+sets `reasoning.effort` on each `POST .../responses` call as decided by an `EffortPolicy`, taking
+the first of:
+    1. the override for the agent of the current `nim_limiter.agent_scope`;
+    2. the effort the request already asks for;
+    3. the effort for the request's class, lowered while that class misses the latency target.
+The classes come from the prompt and the previous turn:
+    tool_result   The last input item is a tool result, which the model mostly reports on (low)
+    chat          No tools and a short prompt (low)
+    long_context  A prompt of `NIM_EFFORT_LONG_PROMPT` tokens or more (medium)
+    planning      Anything else, such as an agent's first turn choosing its tools (medium)
+With a latency target, each class keeps a moving average of the latency of the requests whose
+effort it chose, leaving out agent overrides and requested efforts. When it exceeds the target the
+class drops one effort level (down to low), and when it falls below half of it the class climbs
+back towards its default, waiting twice as long after each step down so a level that cannot meet
+the target is not tried over and over.
+
+Each decision is recorded with the reasoning tokens and latency it led to: `effort_stats()`
+aggregates them per class and effort, `NIM_EFFORT_LOG` appends one JSON line per request, and the
+effort sent is returned in the `x-nim-reasoning-effort` response header.
+
+`nim_client` adds it to the async client according to `NIM_EFFORT`:
+    off     Leave requests alone (default)
+    record  Classify and record without changing requests, to measure the baseline
+    on      Set the effort of each request
+configured with:
+    NIM_EFFORT_CLASSES      Efforts per class, for example `chat=low,planning=high`
+    NIM_EFFORT_AGENTS       Efforts per agent, for example `batch=low,supervisor=high`
+    NIM_EFFORT_SLO_MS       Latency target per request in milliseconds (default none)
+    NIM_EFFORT_LONG_PROMPT  Prompt tokens from which a request is long_context (default 8000)
+    NIM_EFFORT_LOG          JSONL file the decisions are appended to (default none)
+
+Compare the modes against the mock, whose reasoning length follows the effort:
+    python examples/mock_nim_server.py --port 8001 --ttft 0.05 --tokens-per-second 200 --reasoning-tokens 200
+    NIM_ENDPOINT=http://localhost:8001/v1/ NIM_MODEL=gpt-oss-20b python examples/nim_effort.py
+"""
+
+import json
+import logging
+import statistics
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from dataclasses import asdict, dataclass
+
+import httpx
+from nim_limiter import current_agent
+
+logger = logging.getLogger("nim_effort")
+
+EFFORT_HEADER = "x-nim-reasoning-effort"
+MODES = ("off", "record", "on")
+EFFORTS = ("low", "medium", "high")
+CLASS_EFFORTS = {"tool_result": "low", "chat": "low", "long_context": "medium", "planning": "medium"}
+SHORT_PROMPT_TOKENS = 500
+# Weight of the newest sample in a class's latency average, and samples needed before changing level
+LATENCY_ALPHA = 0.3
+MIN_SAMPLES = 5
+# Each step down doubles the samples needed before the class tries the higher effort again, up to this many
+MAX_HOLD_SAMPLES = 320
+# Latency samples kept per class and effort for the percentiles
+MAX_SAMPLES = 1000
+
+
+def prompt_tokens(body: dict) -> int:
+    """Rough prompt size: four characters per token, like the mock server counts them."""
+    return len(json.dumps([body.get("instructions"), body.get("input")], ensure_ascii=False)) // 4
+
+
+def classify(body: dict, long_prompt: int = 8000) -> str:
+    items = body.get("input") if isinstance(body.get("input"), list) else []
+    if items and isinstance(items[-1], dict) and items[-1].get("type") == "function_call_output":
+        return "tool_result"
+    tokens = prompt_tokens(body)
+    if tokens >= long_prompt:
+        return "long_context"
+    if not body.get("tools") and tokens < SHORT_PROMPT_TOKENS:
+        return "chat"
+    return "planning"
+
+
+def _check_effort(effort: str, source: str) -> str:
+    if effort not in EFFORTS:
+        raise ValueError(f"{source} effort must be one of {EFFORTS}, got: {effort}")
+    return effort
+
+
+@dataclass
+class EffortDecision:
+    agent: str
+    request_class: str
+    effort: str
+    # "agent", "request", "class", or "slo" when lowered for the latency target
+    reason: str
+    prompt_tokens: int
+
+
+class _EffortRecord:
+    """Reasoning tokens and latency of the requests sent with one class and effort."""
+
+    def __init__(self):
+        self.requests = 0
+        self.reasoning_tokens = 0
+        self.output_tokens = 0
+        self.latencies: deque[float] = deque(maxlen=MAX_SAMPLES)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "mean_reasoning_tokens": self.reasoning_tokens / self.requests if self.requests else 0.0,
+            "mean_output_tokens": self.output_tokens / self.requests if self.requests else 0.0,
+            "mean_latency_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            "p95_latency_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+        }
+
+
+class EffortPolicy:
+    """Chooses the reasoning effort per request and lowers it per class to meet a latency target."""
+
+    def __init__(
+        self,
+        class_efforts: Mapping[str, str] | None = None,
+        agent_efforts: Mapping[str, str] | None = None,
+        slo_ms: float | None = None,
+        long_prompt: int = 8000,
+    ):
+        self.class_efforts = {**CLASS_EFFORTS, **(class_efforts or {})}
+        for request_class, effort in self.class_efforts.items():
+            if request_class not in CLASS_EFFORTS:
+                raise ValueError(f"Unknown request class {request_class}, expected one of {tuple(CLASS_EFFORTS)}")
+            _check_effort(effort, request_class)
+        self.agent_efforts = {agent: _check_effort(effort, agent) for agent, effort in (agent_efforts or {}).items()}
+        self.slo = slo_ms / 1000 if slo_ms else None
+        self.long_prompt = long_prompt
+        # Effort level per class under the latency target, its latency average and sample count
+        self._levels: dict[str, int] = {}
+        self._latency: dict[str, float] = {}
+        self._samples: dict[str, int] = {}
+        self._hold: dict[str, int] = {}
+        self._records: dict[tuple[str, str], _EffortRecord] = {}
+        _policies.append(self)
+
+    def decide(self, body: dict, agent: str) -> EffortDecision:
+        request_class = classify(body, self.long_prompt)
+        tokens = prompt_tokens(body)
+        if agent in self.agent_efforts:
+            return EffortDecision(agent, request_class, self.agent_efforts[agent], "agent", tokens)
+        requested = (body.get("reasoning") or {}).get("effort")
+        if requested:
+            return EffortDecision(agent, request_class, requested, "request", tokens)
+        default = EFFORTS.index(self.class_efforts[request_class])
+        level = min(default, self._levels.get(request_class, default))
+        return EffortDecision(agent, request_class, EFFORTS[level], "class" if level == default else "slo", tokens)
+
+    def observe(self, decision: EffortDecision, effort: str, seconds: float, usage: dict, adjust: bool) -> None:
+        """Records one finished request; with `adjust`, moves the class's effort level towards the target.
+
+        Only requests whose effort came from their class count towards its latency average: the effort
+        of the others was set by an agent override or the request, and lowering the class would not
+        change it.
+        """
+        request_class = decision.request_class
+        record = self._records.setdefault((request_class, effort), _EffortRecord())
+        record.requests += 1
+        record.reasoning_tokens += (usage.get("output_tokens_details") or {}).get("reasoning_tokens") or 0
+        record.output_tokens += usage.get("output_tokens") or 0
+        record.latencies.append(seconds)
+        if not adjust or self.slo is None or decision.reason not in ("class", "slo"):
+            return
+        previous = self._latency.get(request_class)
+        average = seconds if previous is None else LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * previous
+        self._latency[request_class] = average
+        self._samples[request_class] = self._samples.get(request_class, 0) + 1
+        samples = self._samples[request_class]
+        if samples < MIN_SAMPLES:
+            return
+        default = EFFORTS.index(self.class_efforts[request_class])
+        level = min(default, self._levels.get(request_class, default))
+        hold = self._hold.get(request_class, MIN_SAMPLES)
+        if average > self.slo and level > 0:
+            level -= 1
+            self._hold[request_class] = min(hold * 2, MAX_HOLD_SAMPLES)
+        elif average < self.slo / 2 and level < default and samples >= hold:
+            level += 1
+        else:
+            return
+        logger.info(
+            "%s requests average %.0f ms against a %.0f ms target, effort now %s",
+            request_class,
+            average * 1000,
+            self.slo * 1000,
+            EFFORTS[level],
+        )
+        self._levels[request_class] = level
+        # Start over, so the new level is judged on its own latency
+        del self._latency[request_class]
+        self._samples[request_class] = 0
+
+    def stats(self) -> list[dict]:
+        return [
+            {"class": request_class, "effort": effort, **record.stats()}
+            for (request_class, effort), record in sorted(self._records.items())
+        ]
+
+
+_policies: list[EffortPolicy] = []
+
+
+def effort_stats() -> list[dict]:
+    """Requests, reasoning tokens and latency per class and effort, across the policies in the process."""
+    return [row for policy in _policies for row in policy.stats()]
+
+
+class _UsageStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Passes the body through and reports the response's usage once it is complete.
+
+    A compressed body is not parsed: its end is reported with empty usage, so only the latency counts.
+    """
+
+    def __init__(self, stream, streaming: bool, encoding: str, on_done: Callable[[dict], None]):
+        self._stream = stream
+        self._streaming = streaming
+        self._parse = encoding == "identity"
+        self._on_done = on_done
+        self._buffer = b""
+        self._done = False
+
+    def _finish(self, response: dict) -> None:
+        if not self._done:
+            self._done = True
+            self._on_done(response.get("usage") or {})
+
+    def _finish_json(self, data: bytes, key: str | None = None) -> None:
+        try:
+            response = json.loads(data)
+        except ValueError as e:
+            logger.warning("Could not read the usage of a response: %s", e)
+            self._finish({})
+            return
+        self._finish((response.get(key) if key else response) or {})
+
+    def _feed(self, chunk: bytes) -> None:
+        if not self._parse:
+            return
+        self._buffer += chunk
+        if self._streaming:
+            *lines, self._buffer = self._buffer.split(b"\n")
+            for line in lines:
+                if line.startswith(b"data:") and (b'"response.completed"' in line or b'"response.incomplete"' in line):
+                    self._finish_json(line[5:], "response")
+
+    def _end(self) -> None:
+        if not self._parse:
+            self._finish({})
+        elif not self._streaming and self._buffer:
+            self._finish_json(self._buffer)
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._feed(chunk)
+            yield chunk
+        self._end()
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._feed(chunk)
+            yield chunk
+        self._end()
+
+    def close(self) -> None:
+        self._stream.close()
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class EffortTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Sets (or, when recording, only classifies) the reasoning effort of `POST .../responses` calls.
+
+    Like `httpx.MockTransport` it serves both clients: it wraps a sync or an async transport.
+    """
+
+    def __init__(self, transport, policy: EffortPolicy, mode: str = "on", log_path: str | None = None):
+        if mode not in ("record", "on"):
+            raise ValueError(f"EffortTransport mode must be 'record' or 'on', got: {mode}")
+        self._transport = transport
+        self.policy = policy
+        self.mode = mode
+        self.log_path = log_path
+
+    def _done(self, decision: EffortDecision, effort: str, started: float, usage: dict) -> None:
+        seconds = time.monotonic() - started
+        self.policy.observe(decision, effort, seconds, usage, adjust=self.mode == "on")
+        if self.log_path:
+            entry = {
+                "time": time.time(),
+                **asdict(decision),
+                "effort": effort,
+                "suggested_effort": decision.effort,
+                "input_tokens": usage.get("input_tokens"),
+                "reasoning_tokens": (usage.get("output_tokens_details") or {}).get("reasoning_tokens"),
+                "output_tokens": usage.get("output_tokens"),
+                "latency_ms": round(seconds * 1000, 1),
+            }
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _prepare(self, request: httpx.Request) -> tuple[httpx.Request, EffortDecision, str, bool]:
+        """The request to send, the decision, the effort the server is asked for and whether it streams."""
+        body = json.loads(request.content or b"{}")
+        decision = self.policy.decide(body, current_agent.get())
+        requested = (body.get("reasoning") or {}).get("effort")
+        if self.mode == "on" and decision.effort != requested:
+            body["reasoning"] = {**(body.get("reasoning") or {}), "effort": decision.effort}
+            headers = [
+                (name, value) for name, value in request.headers.multi_items() if name.lower() != "content-length"
+            ]
+            request = httpx.Request(
+                request.method,
+                request.url,
+                headers=headers,
+                content=json.dumps(body, ensure_ascii=False).encode(),
+                extensions=request.extensions,
+            )
+        # What the server is asked for; gpt-oss reasons at medium effort by default
+        effort = decision.effort if self.mode == "on" else requested or "medium"
+        return request, decision, effort, bool(body.get("stream"))
+
+    def _usage_stream(
+        self, response: httpx.Response, decision: EffortDecision, effort: str, streaming: bool, started: float
+    ) -> _UsageStream:
+        response.headers[EFFORT_HEADER] = effort
+
+        def done(usage: dict) -> None:
+            self._done(decision, effort, started, usage)
+
+        encoding = response.headers.get("content-encoding", "identity")
+        if encoding != "identity":
+            logger.warning("Not reading the usage of a %s encoded response, only its latency is recorded", encoding)
+        return _UsageStream(response.stream, streaming, encoding, done)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/responses"):
+            return self._transport.handle_request(request)
+        request, decision, effort, streaming = self._prepare(request)
+        started = time.monotonic()
+        response = self._transport.handle_request(request)
+        if response.status_code != 200:
+            return response
+        stream = self._usage_stream(response, decision, effort, streaming, started)
+        if isinstance(response.stream, httpx.ByteStream):
+            # Built from bytes and already read, so the client never iterates it
+            for _ in stream:
+                pass
+        else:
+            response.stream = stream
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/responses"):
+            return await self._transport.handle_async_request(request)
+        request, decision, effort, streaming = self._prepare(request)
+        started = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        if response.status_code != 200:
+            return response
+        stream = self._usage_stream(response, decision, effort, streaming, started)
+        if isinstance(response.stream, httpx.ByteStream):
+            # Built from bytes and already read, so the client never iterates it
+            async for _ in stream:
+                pass
+        else:
+            response.stream = stream
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _parse_efforts(value: str) -> dict[str, str]:
+    """`name=effort` pairs separated by commas."""
+    pairs = (item.split("=", 1) for item in value.split(",") if item.strip())
+    return {name.strip(): effort.strip().lower() for name, effort in pairs}
+
+
+def effort_mode(env: Mapping[str, str]) -> str | None:
+    """The `NIM_EFFORT` mode for `EffortTransport`, or None when it is off."""
+    mode = env.get("NIM_EFFORT", "off").strip().lower() or "off"
+    if mode not in MODES:
+        raise ValueError(f"NIM_EFFORT must be one of {MODES}, got: {mode}")
+    return None if mode == "off" else mode
+
+
+def effort_policy_from_env(env: Mapping[str, str]) -> EffortPolicy:
+    return EffortPolicy(
+        class_efforts=_parse_efforts(env.get("NIM_EFFORT_CLASSES", "")),
+        agent_efforts=_parse_efforts(env.get("NIM_EFFORT_AGENTS", "")),
+        slo_ms=float(env.get("NIM_EFFORT_SLO_MS", "0")) or None,
+        long_prompt=int(env.get("NIM_EFFORT_LONG_PROMPT", "8000")),
+    )
+
+
+if __name__ == "__main__":
+    import asyncio
+    import os
+
+    from dotenv import load_dotenv
+    from rich.console import Console
+    from rich.table import Table
+
+    load_dotenv(override=True)
+    logging.basicConfig(level=logging.WARNING)
+
+    tools = [
+        {
+            "type": "function",
+            "name": "get_weather",
+            "description": "Returns the weather for a city.",
+            "parameters": {"type": "object", "properties": {"city": {"type": "string"}}, "required": ["city"]},
+        }
+    ]
+
+    async def turns(client) -> None:
+        """One agent-like exchange: a chat question, a planning turn with tools and a tool result turn."""
+        model = os.environ["NIM_MODEL"]
+        await client.responses.create(model=model, input="What is a good weekend hobby?")
+        first = await client.responses.create(model=model, input="Plan my weekend in Seattle.", tools=tools)
+        calls = [item for item in first.output if item.type == "function_call"]
+        outputs = [{"type": "function_call_output", "call_id": call.call_id, "output": '"Rainy"'} for call in calls]
+        await client.responses.create(
+            model=model,
+            input=[{"role": "user", "content": "Plan my weekend in Seattle."}, *calls, *outputs],
+            tools=tools,
+        )
+
+    async def run(mode: str, rounds: int) -> None:
+        # Imported by name: as a script this file is `__main__`, the client uses the `nim_effort` module
+        from nim_client import create_async_client
+        from nim_effort import _policies
+
+        os.environ["NIM_EFFORT"] = mode
+        client = create_async_client()
+        started = time.monotonic()
+        await asyncio.gather(*(turns(client) for _ in range(rounds)))
+        table = Table(title=f"NIM_EFFORT={mode}: {rounds * 3} requests in {time.monotonic() - started:.1f}s")
+        for column in ("class", "effort", "requests", "reasoning tokens", "mean ms", "p95 ms"):
+            table.add_column(column)
+        for row in _policies[-1].stats():
+            table.add_row(
+                row["class"],
+                row["effort"],
+                str(row["requests"]),
+                f"{row['mean_reasoning_tokens']:.0f}",
+                f"{row['mean_latency_ms']:.0f}",
+                f"{row['p95_latency_ms']:.0f}",
+            )
+        Console().print(table)
+
+    async def main() -> None:
+        await run("record", 10)
+        await run("on", 10)
+
+    asyncio.run(main())
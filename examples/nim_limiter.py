@@ -0,0 +1,264 @@
+"""Adaptive client-side concurrency limit for the NIM endpoint.
+
+Serverless GPU replicas answer 429/503 or slow down sharply once saturated. `AdaptiveLimiter`
+caps the requests in flight with an AIMD limit: it grows by about one per round of requests that
+succeed at a normal latency, shrinks by `backoff` on 429, 503 or timeouts, and shrinks gently when
+recent latency climbs well above its long-run average. A `Retry-After` header pauses all new
+requests for that long. Requests waiting for a slot are queued per agent and served round-robin,
+so a batch job cannot starve an interactive agent in the same process:
+
+    with agent_scope("batch"):
+        await agent.run(prompt)
+
+`LimitingTransport` applies the limiter to every request of an httpx client. The slot is held
+until a streamed body is fully read. `nim_client` adds it to the async client when enabled:
+    NIM_ADAPTIVE_CONCURRENCY  Enable the limiter (default false)
+    NIM_CONCURRENCY_INITIAL   Starting limit (default 8)
+    NIM_CONCURRENCY_MIN       Lowest limit (default 1)
+    NIM_CONCURRENCY_MAX       Highest limit (default 64)
+    NIM_LATENCY_TOLERANCE     Recent/average latency ratio treated as overload (default 2.0)
+
+The current limit, requests in flight and queue depth per agent are reported by `limiter_stats()`.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import email.utils
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Mapping
+
+import httpx
+
+logger = logging.getLogger("nim_limiter")
+
+OVERLOAD_STATUS_CODES = (429, 503)
+DEFAULT_AGENT = "default"
+
+current_agent: contextvars.ContextVar[str] = contextvars.ContextVar("nim_agent", default=DEFAULT_AGENT)
+
+
+@contextlib.contextmanager
+def agent_scope(name: str):
+    """Queues the NIM requests made inside the block (and tasks started from it) as agent `name`."""
+    token = current_agent.set(name)
+    try:
+        yield
+    finally:
+        current_agent.reset(token)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> float | None:
+    """Seconds asked for by a `Retry-After` header (delay or HTTP date), or None when absent."""
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with per-agent round-robin queues."""
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.decreases = 0
+        # Fast and slow moving averages of the time to response headers
+        self.recent_latency: float | None = None
+        self.average_latency: float | None = None
+        self._queues: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._wakeup: asyncio.TimerHandle | None = None
+        _limiters.append(self)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit) and time.monotonic() >= self._paused_until
+
+    async def acquire(self, agent: str = DEFAULT_AGENT) -> None:
+        """Waits for a free slot; every `acquire` must be paired with a `release`."""
+        self.requests += 1
+        if not self._queues and self._has_capacity():
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(agent, deque()).append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the cancellation, hand it on
+                self.release()
+            else:
+                self._discard(agent, future)
+            raise
+
+    def _discard(self, agent: str, future: asyncio.Future) -> None:
+        queue = self._queues.get(agent)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._queues[agent]
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grants free slots to waiting requests, taking one agent at a time in turn."""
+        while self._queues and self._has_capacity():
+            agent, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(agent)
+            else:
+                del self._queues[agent]
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+        delay = self._paused_until - time.monotonic()
+        if self._queues and delay > 0 and self._wakeup is None:
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._resume)
+
+    def _resume(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    def on_success(self, latency: float) -> None:
+        """Feeds back the time to response headers of a request that was not throttled."""
+        if self.average_latency is None:
+            self.recent_latency = self.average_latency = latency
+        else:
+            self.recent_latency = 0.5 * latency + 0.5 * self.recent_latency
+            self.average_latency = 0.05 * latency + 0.95 * self.average_latency
+        if self.recent_latency > self.latency_tolerance * self.average_latency:
+            self._decrease(0.9)
+        elif self.in_flight >= int(self.limit) - 1 or self._queues:
+            # Only grow while the limit is what holds requests back
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_overload(self, retry_after: float | None = None) -> None:
+        """Feeds back a 429, 503 or timeout, pausing new requests for `retry_after` seconds if given."""
+        self.throttled += 1
+        self._decrease(self.backoff)
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        # Requests already in flight report the same overload, so decrease at most once per round trip
+        if now - self._last_decrease < (self.average_latency or 1.0):
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self.limit = max(self.min_limit, self.limit * factor)
+        logger.info("Concurrency limit lowered to %d", int(self.limit))
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "queued_by_agent": {agent: len(queue) for agent, queue in self._queues.items()},
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "decreases": self.decreases,
+            "average_latency_ms": (self.average_latency or 0.0) * 1000,
+        }
+
+
+_limiters: list[AdaptiveLimiter] = []
+
+
+def limiter_stats() -> list[dict]:
+    """Metrics of every limiter in the process, one per client created with the limiter enabled."""
+    return [limiter.stats() for limiter in _limiters]
+
+
+class ReleasingStream(httpx.AsyncByteStream):
+    """Calls `release` once the response body has been read or closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class LimitingTransport(httpx.AsyncBaseTransport):
+    """Holds an `AdaptiveLimiter` slot for each request, feeding back latency and overload responses."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: AdaptiveLimiter):
+        self._transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.acquire(current_agent.get())
+        started = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TimeoutException:
+            self.limiter.on_overload()
+            self.limiter.release()
+            raise
+        except BaseException:
+            self.limiter.release()
+            raise
+        if response.status_code in OVERLOAD_STATUS_CODES:
+            self.limiter.on_overload(retry_after_seconds(response.headers))
+        elif response.status_code < 500:
+            self.limiter.on_success(time.monotonic() - started)
+        response.stream = ReleasingStream(response.stream, self.limiter.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def limiter_from_env(env: Mapping[str, str]) -> AdaptiveLimiter | None:
+    """Builds the limiter configured by the `NIM_ADAPTIVE_CONCURRENCY*` variables, or None when disabled."""
+    if env.get("NIM_ADAPTIVE_CONCURRENCY", "false").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    return AdaptiveLimiter(
+        initial=int(env.get("NIM_CONCURRENCY_INITIAL", "8")),
+        min_limit=int(env.get("NIM_CONCURRENCY_MIN", "1")),
+        max_limit=int(env.get("NIM_CONCURRENCY_MAX", "64")),
+        latency_tolerance=float(env.get("NIM_LATENCY_TOLERANCE", "2.0")),
+    )
@@ -0,0 +1,333 @@
+"""Request normalization that keeps prompt prefixes stable for the NIM prefix (KV) cache.
+
+NIM reuses the KV cache of a prompt prefix it has already processed, so a request only pays
+prefill for the tokens after the longest prefix it shares with an earlier one. Agent frameworks
+often break that prefix without changing the meaning of the request: tool schemas come out in a
+different order, dictionary keys move around, and a "Current date" line in the system prompt
+changes on every call. `NormalizingTransport` rewrites each `POST .../responses` body so that:
+    * tools are sorted by type and name, and every JSON object in the body has sorted keys, apart
+      from the `properties` of JSON schemas: they keep their declared order, which is the order
+      the model generates the fields in, in tool calls and guided structured output alike;
+    * volatile lines are taken out of `instructions` and the leading system and developer
+      messages, and sent in one system message right after them, so the static instructions and
+      tool schemas come first and stay byte-identical across requests.
+A line is volatile when it is marked as such: it starts with `VOLATILE_MARKER` (which is removed),
+or with a label for an injected timestamp or id, such as `Current date:` or `Today is`, followed by
+a date, time or UUID. Other lines stay where they are, even when they mention a date or a time,
+such as "Office hours 9:00-17:00".
+
+Every request also gets a prefix hash over the model, instructions, tools and leading static
+system messages, returned in the `x-nim-prefix-hash` response header. `prefix_stats()` reports how
+often a prefix was seen before and the mean time to response headers for reused and new prefixes
+(for non-streaming requests this includes prefill; for streaming ones only the time to the first event).
+
+`nim_client` adds it to the async client according to `NIM_NORMALIZE`:
+    off     Leave requests alone (default)
+    record  Only hash prefixes and collect the stats, to measure the baseline
+    on      Normalize requests and collect the stats
+
+Compare both modes against the mock, which simulates prefill time and a prefix cache:
+    python examples/mock_nim_server.py --port 8001 --prefill-tokens-per-second 2000
+    NIM_ENDPOINT=http://localhost:8001/v1/ NIM_MODEL=gpt-oss-20b python examples/nim_normalize.py
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger("nim_normalize")
+
+PREFIX_HEADER = "x-nim-prefix-hash"
+MODES = ("off", "record", "on")
+SYSTEM_ROLES = ("system", "developer")
+# Explicit marker for a line that changes between requests, removed when the line is moved
+VOLATILE_MARKER = "[volatile]"
+# A timestamp or id injected into the prompt: a known label followed by an ISO date, a time or a UUID
+VOLATILE_LINE = re.compile(
+    r"^\s*(current (date|time|date and time|datetime)|today is|today's date|now is|timestamp|request id)\b"
+    r".*(\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}:\d{2}\b|\b[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12}\b)",
+    re.IGNORECASE,
+)
+# Prefix hashes remembered for the reuse ratio
+MAX_PREFIXES = 10_000
+# Objects whose key order means something, here the order in which the model generates schema fields
+ORDERED_KEYS = frozenset({"properties"})
+
+
+def canonical(value: Any, keep_order: bool = False) -> Any:
+    """`value` with the keys of every nested object sorted, except those of schema `properties`."""
+    if isinstance(value, dict):
+        keys = value if keep_order else sorted(value)
+        return {key: canonical(value[key], key in ORDERED_KEYS and not keep_order) for key in keys}
+    if isinstance(value, list):
+        return [canonical(item) for item in value]
+    return value
+
+
+def _tool_key(tool: dict) -> tuple[str, str]:
+    return tool.get("type", ""), tool.get("name") or tool.get("server_label") or ""
+
+
+def split_volatile(text: str) -> tuple[str, list[str]]:
+    """Splits `text` into its static lines and the lines marked as changing between requests."""
+    static, volatile = [], []
+    for line in text.splitlines():
+        if line.lstrip().startswith(VOLATILE_MARKER):
+            volatile.append(line.lstrip()[len(VOLATILE_MARKER) :].strip())
+        elif VOLATILE_LINE.search(line):
+            volatile.append(line)
+        else:
+            static.append(line)
+    return "\n".join(static).strip(), volatile
+
+
+def _leading_system(items: list) -> int:
+    """Number of system or developer messages at the start of `items`."""
+    count = 0
+    while count < len(items) and isinstance(items[count], dict) and items[count].get("role") in SYSTEM_ROLES:
+        count += 1
+    return count
+
+
+def _split_message(message: dict) -> tuple[dict | None, list[str]]:
+    """The message without its volatile lines (None when nothing is left) and those lines."""
+    content = message.get("content")
+    if isinstance(content, str):
+        static, volatile = split_volatile(content)
+        return ({**message, "content": static} if static else None), volatile
+    if isinstance(content, list):
+        parts, volatile = [], []
+        for part in content:
+            if isinstance(part, dict) and isinstance(part.get("text"), str):
+                static, lines = split_volatile(part["text"])
+                volatile += lines
+                if static:
+                    parts.append({**part, "text": static})
+            else:
+                parts.append(part)
+        return ({**message, "content": parts} if parts else None), volatile
+    return message, []
+
+
+def normalize_body(body: dict) -> dict:
+    """The request with a stable prefix: sorted tools and keys, volatile system lines moved after the static ones.
+
+    Schema `properties` keep their declared order; see `canonical`.
+    """
+    body = dict(body)
+    if body.get("tools"):
+        body["tools"] = sorted(body["tools"], key=_tool_key)
+    volatile = []
+    if isinstance(body.get("instructions"), str):
+        instructions, volatile = split_volatile(body["instructions"])
+        if instructions:
+            body["instructions"] = instructions
+        else:
+            del body["instructions"]
+    items = body.get("input")
+    if isinstance(items, str):
+        items = [{"role": "user", "content": items}] if volatile else items
+    if isinstance(items, list):
+        leading = _leading_system(items)
+        system = []
+        for message in items[:leading]:
+            message, lines = _split_message(message)
+            volatile += lines
+            if message is not None:
+                system.append(message)
+        if volatile:
+            system.append({"role": "system", "content": "\n".join(volatile)})
+        body["input"] = [*system, *items[leading:]]
+    return canonical(body)
+
+
+def prefix_hash(body: dict) -> str:
+    """Hash of the part of the prompt that should be identical across requests of one agent, as sent."""
+    items = body.get("input") if isinstance(body.get("input"), list) else []
+    system = items[: _leading_system(items)]
+    if system and any(_split_message(message)[1] for message in system):
+        # A system message with volatile lines ends the static prefix
+        system = system[: next(i for i, message in enumerate(system) if _split_message(message)[1])]
+    prefix = [body.get("model"), body.get("instructions"), body.get("tools") or [], system]
+    return hashlib.sha256(json.dumps(prefix, ensure_ascii=False).encode()).hexdigest()
+
+
+class PrefixStats:
+    """Counts prefix reuse and the time to response headers of reused and new prefixes."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.requests = 0
+        self.reused = 0
+        self._seconds = {True: 0.0, False: 0.0}
+        self._timed = {True: 0, False: 0}
+        self._prefixes: OrderedDict[str, None] = OrderedDict()
+
+    def seen(self, key: str) -> bool:
+        """Records a request with prefix `key`, returning whether the prefix was sent before."""
+        self.requests += 1
+        reused = key in self._prefixes
+        self._prefixes[key] = None
+        self._prefixes.move_to_end(key)
+        while len(self._prefixes) > MAX_PREFIXES:
+            self._prefixes.popitem(last=False)
+        self.reused += reused
+        return reused
+
+    def record_latency(self, reused: bool, seconds: float) -> None:
+        self._seconds[reused] += seconds
+        self._timed[reused] += 1
+
+    def _mean_ms(self, reused: bool) -> float:
+        return self._seconds[reused] / self._timed[reused] * 1000 if self._timed[reused] else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "requests": self.requests,
+            "distinct_prefixes": len(self._prefixes),
+            "reuse_ratio": self.reused / self.requests if self.requests else 0.0,
+            "reused_latency_ms": self._mean_ms(True),
+            "new_latency_ms": self._mean_ms(False),
+        }
+
+
+_stats: list[PrefixStats] = []
+
+
+def prefix_stats() -> list[dict]:
+    """Prefix reuse of every normalizing client in the process."""
+    return [stats.stats() for stats in _stats]
+
+
+class NormalizingTransport(httpx.AsyncBaseTransport):
+    """Hashes the prompt prefix of `POST .../responses` calls and, unless only recording, normalizes them."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, mode: str = "on"):
+        if mode not in ("record", "on"):
+            raise ValueError(f"NormalizingTransport mode must be 'record' or 'on', got: {mode}")
+        self._transport = transport
+        self.mode = mode
+        self.stats = PrefixStats(mode)
+        _stats.append(self.stats)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/responses"):
+            return await self._transport.handle_async_request(request)
+        body = json.loads(request.content or b"{}")
+        if self.mode == "on":
+            body = normalize_body(body)
+            headers = [
+                (name, value) for name, value in request.headers.multi_items() if name.lower() != "content-length"
+            ]
+            request = httpx.Request(
+                request.method,
+                request.url,
+                headers=headers,
+                content=json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode(),
+                extensions=request.extensions,
+            )
+        key = prefix_hash(body)
+        reused = self.stats.seen(key)
+        started = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 200:
+            self.stats.record_latency(reused, time.monotonic() - started)
+        response.headers[PREFIX_HEADER] = key
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def normalizer_mode(env: Mapping[str, str]) -> str | None:
+    """The `NIM_NORMALIZE` mode for `NormalizingTransport`, or None when it is off."""
+    mode = env.get("NIM_NORMALIZE", "off").strip().lower() or "off"
+    if mode not in MODES:
+        raise ValueError(f"NIM_NORMALIZE must be one of {MODES}, got: {mode}")
+    return None if mode == "off" else mode
+
+
+if __name__ == "__main__":
+    import asyncio
+    import os
+    import random
+    from datetime import datetime
+
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    logging.basicConfig(level=logging.WARNING)
+
+    tools = [
+        {
+            "type": "function",
+            "name": name,
+            "description": f"{description} Returns a JSON object; fails with an error message when not found.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": f"What to {name.replace('_', ' ')}"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"},
+                },
+                "required": ["query"],
+                "additionalProperties": False,
+            },
+            "strict": True,
+        }
+        for name, description in [
+            ("search_hotels", "Searches hotels by city and dates."),
+            ("search_flights", "Searches flights between two airports."),
+            ("lookup_weather", "Looks up the weather forecast for a city."),
+            ("convert_currency", "Converts an amount between currencies."),
+            ("find_restaurants", "Finds restaurants near an address."),
+            ("get_exchange_hours", "Gets the opening hours of a currency exchange."),
+        ]
+    ]
+    instructions = "\n".join(
+        [
+            "You are a travel planning assistant for business travellers.",
+            "Answer in short paragraphs, use the tools for anything that depends on live data,",
+            "never invent prices or availability, and ask for missing dates before booking.",
+        ]
+        * 8
+    )
+    questions = ["Plan two days in Lisbon.", "Find a hotel in Oslo.", "Weather in Rome?", "Flights to Tokyo?"]
+
+    async def run(mode: str, requests: int) -> None:
+        # Imported by name: as a script this file is `__main__`, the client uses the `nim_normalize` module
+        from nim_client import create_async_client
+        from nim_normalize import prefix_stats
+
+        os.environ["NIM_NORMALIZE"] = mode
+        client = create_async_client()
+        cached_tokens = input_tokens = 0
+        for index in range(requests):
+            shuffled = random.sample(tools, len(tools))
+            response = await client.responses.create(
+                model=os.environ["NIM_MODEL"],
+                instructions=f"Current time: {datetime.now().isoformat()}\n{instructions}",
+                input=questions[index % len(questions)],
+                tools=shuffled,
+                tool_choice="none",
+            )
+            input_tokens += response.usage.input_tokens
+            cached_tokens += response.usage.input_tokens_details.cached_tokens
+        stats = prefix_stats()[-1]
+        print(
+            f"{mode:>6}: {stats['reuse_ratio']:.0%} prefixes reused, {cached_tokens}/{input_tokens} input tokens "
+            f"cached, time to headers {stats['reused_latency_ms']:.0f} ms reused / {stats['new_latency_ms']:.0f} ms new"
+        )
+
+    async def main() -> None:
+        await run("record", 20)
+        await run("on", 20)
+
+    asyncio.run(main())
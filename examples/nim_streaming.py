@@ -0,0 +1,120 @@
+"""Incremental rendering of streamed reasoning and message deltas, with latency metrics.
+
+Used by the examples' streaming mode (`STREAM=true`) to print tokens as they arrive and to
+record time-to-first-token and inter-token latency for every run.
+"""
+
+import contextlib
+import statistics
+import sys
+import time
+import warnings
+from dataclasses import dataclass, field
+
+# PydanticAI warns once per gpt-oss reasoning delta, which it does not map to a response part
+PYDANTICAI_REASONING_WARNING = r"Handling of this event type is not yet implemented.*ResponseReasoning"
+
+
+@dataclass
+class StreamMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    first_token: float | None = None
+    first_answer_token: float | None = None
+    finished: float | None = None
+    token_times: list[float] = field(default_factory=list)
+
+    def record(self, answer: bool) -> None:
+        now = time.perf_counter()
+        if self.first_token is None:
+            self.first_token = now
+        if answer and self.first_answer_token is None:
+            self.first_answer_token = now
+        self.token_times.append(now)
+
+    @property
+    def ttft(self) -> float | None:
+        """Seconds until the first reasoning or message delta."""
+        return None if self.first_token is None else self.first_token - self.started
+
+    @property
+    def inter_token_latencies(self) -> list[float]:
+        return [later - earlier for earlier, later in zip(self.token_times, self.token_times[1:])]
+
+    def summary(self) -> dict:
+        gaps = sorted(self.inter_token_latencies)
+        finished = self.finished or time.perf_counter()
+        return {
+            "ttft_ms": None if self.ttft is None else self.ttft * 1000,
+            "first_answer_token_ms": (
+                None if self.first_answer_token is None else (self.first_answer_token - self.started) * 1000
+            ),
+            "inter_token_p50_ms": statistics.median(gaps) * 1000 if gaps else None,
+            "inter_token_p95_ms": gaps[int(0.95 * (len(gaps) - 1))] * 1000 if gaps else None,
+            "deltas": len(self.token_times),
+            "total_ms": (finished - self.started) * 1000,
+        }
+
+
+def _ms(value: float | None) -> str:
+    return "n/a" if value is None else f"{value:.1f} ms"
+
+
+class StreamRenderer:
+    """Prints reasoning and message deltas as they arrive and records `StreamMetrics`."""
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.metrics = StreamMetrics()
+        self._section: tuple[str, str | None] | None = None
+
+    def _write(self, kind: str, delta: str, item_id: str | None) -> None:
+        # A new output item (for example reasoning in the next agent turn) starts a new line
+        if (kind, item_id) != self._section:
+            prefix = "💭 Reasoning: " if kind == "reasoning" else "🤖 Response: "
+            self.out.write(("\n" if self._section else "") + prefix)
+            self._section = (kind, item_id)
+        self.out.write(delta)
+        self.out.flush()
+
+    def reasoning(self, delta: str, item_id: str | None = None) -> None:
+        self.metrics.record(answer=False)
+        self._write("reasoning", delta, item_id)
+
+    def text(self, delta: str, item_id: str | None = None) -> None:
+        self.metrics.record(answer=True)
+        self._write("text", delta, item_id)
+
+    def tool_call(self, name: str, arguments: str) -> None:
+        """Prints a tool call on a line of its own; it is not a token, so the metrics leave it out."""
+        self.out.write(("\n" if self._section else "") + f"🔧 Tool Call: {name}({arguments})\n")
+        self.out.flush()
+        self._section = None
+
+    def handle_event(self, event) -> None:
+        """Renders one Responses API stream event (also what OpenAI Agents exposes as raw response events)."""
+        if event.type == "response.output_text.delta":
+            self.text(event.delta, event.item_id)
+        elif event.type in ("response.reasoning_text.delta", "response.reasoning_summary_text.delta"):
+            self.reasoning(event.delta, event.item_id)
+        elif event.type == "response.output_item.done" and event.item.type == "function_call":
+            self.tool_call(event.item.name, event.item.arguments)
+
+    def finish(self) -> dict:
+        """Ends the output and prints the latency summary."""
+        self.metrics.finished = time.perf_counter()
+        summary = self.metrics.summary()
+        self.out.write(
+            f"\n⏱️ TTFT {_ms(summary['ttft_ms'])}, first answer token {_ms(summary['first_answer_token_ms'])}, "
+            f"inter-token p50 {_ms(summary['inter_token_p50_ms'])} / p95 {_ms(summary['inter_token_p95_ms'])}, "
+            f"{summary['deltas']} deltas in {_ms(summary['total_ms'])}\n"
+        )
+        self.out.flush()
+        return summary
+
+
+@contextlib.contextmanager
+def quiet_pydanticai_reasoning():
+    """Silences PydanticAI's warning for each reasoning delta while streaming an agent run."""
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=PYDANTICAI_REASONING_WARNING, category=UserWarning)
+        yield
@@ -0,0 +1,371 @@
+"""Cold-start aware warm-up for NIM on Azure Serverless GPUs.
+
+Serverless GPU replicas scale to zero, so the first request after an idle period can wait
+minutes for a replica. This module provides:
+
+* `wait_until_ready` / `wait_until_ready_sync`: a pre-flight probe that blocks until a replica
+  answers, either via `/v1/models` or a tiny `max_output_tokens` response.
+* `KeepWarm`: an optional background loop that pings the endpoint on a schedule.
+* `ColdStartDetector`: records time-to-ready separately from inference latency.
+* `ActivityTransport`: tells the detector when requests reach the replica; `nim_client` adds it
+  to both clients, under the response cache, so `KeepWarm` skips its pings while the replica is busy.
+
+Try it against the mock server with a simulated cold start:
+    python examples/mock_nim_server.py --port 8001 --cold-start 10 --scale-to-zero-after 30
+    NIM_ENDPOINT=http://localhost:8001/v1/ NIM_MODEL=gpt-oss-20b python examples/nim_warmup.py --keep-warm 20
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import httpx
+import openai
+from nim_cache import CACHE_HEADER
+
+logger = logging.getLogger("nim_warmup")
+
+PROBES = ("models", "responses")
+# Marks keep-warm probes, which `ActivityTransport` does not count as traffic
+KEEPWARM_HEADER = "x-nim-keepwarm"
+
+
+@dataclass
+class ReadinessReport:
+    ready: bool
+    cold_start: bool
+    time_to_ready: float
+    attempts: int
+    probe: str
+
+
+@dataclass
+class ColdStartDetector:
+    """Separates replica spin-up time from inference latency.
+
+    A request counts as a cold start when it is the first one seen, or the endpoint has been idle
+    longer than `scale_down_after`, and it took longer than `cold_threshold` seconds.
+    """
+
+    cold_threshold: float = 5.0
+    scale_down_after: float = 300.0
+    time_to_ready: list[float] = field(default_factory=list)
+    inference_latency: list[float] = field(default_factory=list)
+    last_activity: float | None = None
+    # Requests seen by `ActivityTransport`: in flight now, and when the last one finished
+    in_flight: int = 0
+    last_request: float | None = None
+
+    def busy_within(self, seconds: float) -> bool:
+        """Whether a request is in flight or one finished in the last `seconds`."""
+        if self.in_flight:
+            return True
+        return self.last_request is not None and time.monotonic() - self.last_request < seconds
+
+    def maybe_cold(self) -> bool:
+        return self.last_activity is None or time.monotonic() - self.last_activity > self.scale_down_after
+
+    def record_ready(self, report: ReadinessReport) -> None:
+        if report.cold_start:
+            self.time_to_ready.append(report.time_to_ready)
+        self.last_activity = time.monotonic()
+
+    def observe(self, latency: float) -> bool:
+        """Records one inference call and returns whether it was classified as a cold start."""
+        cold = self.maybe_cold() and latency > self.cold_threshold
+        if cold:
+            self.time_to_ready.append(latency)
+        else:
+            self.inference_latency.append(latency)
+        self.last_activity = time.monotonic()
+        return cold
+
+    def summary(self) -> dict:
+        return {
+            "cold_starts": len(self.time_to_ready),
+            "time_to_ready_max_s": max(self.time_to_ready, default=0.0),
+            "inference_requests": len(self.inference_latency),
+            "inference_p50_s": statistics.median(self.inference_latency) if self.inference_latency else 0.0,
+        }
+
+
+@functools.cache
+def get_cold_start_detector() -> ColdStartDetector:
+    """Returns the process-wide detector, configured from `NIM_COLD_START_THRESHOLD` and `NIM_SCALE_DOWN_AFTER`."""
+    return ColdStartDetector(
+        cold_threshold=float(os.getenv("NIM_COLD_START_THRESHOLD", "5")),
+        scale_down_after=float(os.getenv("NIM_SCALE_DOWN_AFTER", "300")),
+    )
+
+
+def _probe_kwargs(probe: str) -> dict:
+    if probe not in PROBES:
+        raise ValueError(f"probe must be one of {PROBES}, got: {probe}")
+    if probe == "models":
+        return {}
+    return {"model": os.environ["NIM_MODEL"], "input": "ping", "max_output_tokens": 16}
+
+
+def _report(started: float, attempts: int, probe: str, ready: bool, detector: ColdStartDetector) -> ReadinessReport:
+    elapsed = time.monotonic() - started
+    report = ReadinessReport(
+        ready=ready,
+        cold_start=ready and (attempts > 1 or elapsed > detector.cold_threshold),
+        time_to_ready=elapsed,
+        attempts=attempts,
+        probe=probe,
+    )
+    if ready:
+        detector.record_ready(report)
+    logger.info("NIM %s after %.1fs (%d attempts)", "ready" if ready else "not ready", elapsed, attempts)
+    return report
+
+
+async def wait_until_ready(
+    client: openai.AsyncOpenAI,
+    probe: str = "models",
+    timeout: float | None = None,
+    interval: float = 5.0,
+    detector: ColdStartDetector | None = None,
+) -> ReadinessReport:
+    """Blocks until the endpoint answers a probe request or `timeout` seconds have passed."""
+    kwargs = _probe_kwargs(probe)
+    timeout = timeout or float(os.getenv("NIM_WARMUP_TIMEOUT", "600"))
+    detector = detector or get_cold_start_detector()
+    started = time.monotonic()
+    attempts = 0
+    while True:
+        attempts += 1
+        remaining = timeout - (time.monotonic() - started)
+        probe_client = client.with_options(max_retries=0, timeout=max(remaining, 1.0))
+        try:
+            if probe == "models":
+                await probe_client.models.list()
+            else:
+                await probe_client.responses.create(**kwargs)
+            return _report(started, attempts, probe, True, detector)
+        except (openai.APIConnectionError, openai.APIStatusError) as e:
+            logger.info("Waiting for NIM replica (attempt %d): %s", attempts, e)
+        if time.monotonic() - started + interval >= timeout:
+            return _report(started, attempts, probe, False, detector)
+        await asyncio.sleep(interval)
+
+
+def wait_until_ready_sync(
+    client: openai.OpenAI,
+    probe: str = "models",
+    timeout: float | None = None,
+    interval: float = 5.0,
+    detector: ColdStartDetector | None = None,
+) -> ReadinessReport:
+    """Blocking version of `wait_until_ready` for the synchronous examples."""
+    kwargs = _probe_kwargs(probe)
+    timeout = timeout or float(os.getenv("NIM_WARMUP_TIMEOUT", "600"))
+    detector = detector or get_cold_start_detector()
+    started = time.monotonic()
+    attempts = 0
+    while True:
+        attempts += 1
+        remaining = timeout - (time.monotonic() - started)
+        probe_client = client.with_options(max_retries=0, timeout=max(remaining, 1.0))
+        try:
+            if probe == "models":
+                probe_client.models.list()
+            else:
+                probe_client.responses.create(**kwargs)
+            return _report(started, attempts, probe, True, detector)
+        except (openai.APIConnectionError, openai.APIStatusError) as e:
+            logger.info("Waiting for NIM replica (attempt %d): %s", attempts, e)
+        if time.monotonic() - started + interval >= timeout:
+            return _report(started, attempts, probe, False, detector)
+        time.sleep(interval)
+
+
+class _ActivityStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Calls `done` once the response body has been read or closed."""
+
+    def __init__(self, stream, done: Callable[[], None]):
+        self._stream = stream
+        self._done = done
+
+    def _finish(self) -> None:
+        done, self._done = self._done, None
+        if done is not None:
+            done()
+
+    def __iter__(self):
+        yield from self._stream
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._finish()
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._finish()
+
+
+class ActivityTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Counts the requests in flight to the replica on a `ColdStartDetector`, apart from keep-warm probes.
+
+    Like `httpx.MockTransport` it serves both clients: it wraps a sync or an async transport.
+    """
+
+    def __init__(self, transport, detector: ColdStartDetector | None = None):
+        self._transport = transport
+        self.detector = detector or get_cold_start_detector()
+
+    def _finished(self) -> None:
+        self.detector.in_flight -= 1
+        self.detector.last_request = time.monotonic()
+
+    def _track(self, response: httpx.Response) -> httpx.Response:
+        if isinstance(response.stream, httpx.ByteStream):
+            # Built from bytes and already read, so the client never closes it
+            self._finished()
+        else:
+            response.stream = _ActivityStream(response.stream, self._finished)
+        return response
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if KEEPWARM_HEADER in request.headers:
+            return self._transport.handle_request(request)
+        self.detector.in_flight += 1
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            self._finished()
+            raise
+        return self._track(response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if KEEPWARM_HEADER in request.headers:
+            return await self._transport.handle_async_request(request)
+        self.detector.in_flight += 1
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._finished()
+            raise
+        return self._track(response)
+
+    def close(self) -> None:
+        self._transport.close()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class KeepWarm:
+    """Pings the endpoint every `interval` seconds so the replica does not scale to zero.
+
+    Pings are skipped while other requests keep the replica busy, or did during the last interval,
+    as counted by `ActivityTransport`, and outside of `active_hours` (a `(start, end)` pair of local
+    hours) when given. Pings bypass the response cache, so a cached answer cannot stand in for one.
+    """
+
+    def __init__(
+        self,
+        client: openai.AsyncOpenAI,
+        interval: float = 240.0,
+        active_hours: tuple[int, int] | None = None,
+        probe: str = "models",
+        detector: ColdStartDetector | None = None,
+    ):
+        self.client = client.with_options(default_headers={KEEPWARM_HEADER: "1", CACHE_HEADER: "bypass"})
+        self.interval = interval
+        self.active_hours = active_hours
+        self.probe = probe
+        self.detector = detector or get_cold_start_detector()
+        self.pings = 0
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def from_env(cls, client: openai.AsyncOpenAI) -> "KeepWarm | None":
+        """Builds a loop from `NIM_KEEPWARM_INTERVAL` and `NIM_KEEPWARM_HOURS` (e.g. `8-18`), if set."""
+        interval = os.getenv("NIM_KEEPWARM_INTERVAL")
+        if not interval:
+            return None
+        hours = os.getenv("NIM_KEEPWARM_HOURS")
+        active_hours = tuple(int(hour) for hour in hours.split("-")) if hours else None
+        return cls(client, interval=float(interval), active_hours=active_hours)
+
+    def _in_active_hours(self) -> bool:
+        if self.active_hours is None:
+            return True
+        start, end = self.active_hours
+        hour = datetime.now().hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.detector.busy_within(self.interval):
+                continue
+            if not self._in_active_hours():
+                continue
+            report = await wait_until_ready(self.client, probe=self.probe, detector=self.detector)
+            self.pings += 1
+            if report.cold_start:
+                logger.warning("Keep-warm ping hit a cold replica (%.1fs to ready)", report.time_to_ready)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self) -> "KeepWarm":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+async def main(args: argparse.Namespace) -> None:
+    from nim_client import get_async_client
+
+    client = get_async_client()
+    report = await wait_until_ready(client, probe=args.probe, timeout=args.timeout)
+    print(report)
+    if args.keep_warm:
+        async with KeepWarm(client, interval=args.keep_warm, probe=args.probe) as keep_warm:
+            await asyncio.sleep(args.duration)
+        print(f"Keep-warm pings: {keep_warm.pings}")
+    print(get_cold_start_detector().summary())
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Wait for the NIM endpoint to be ready and optionally keep it warm")
+    parser.add_argument("--probe", choices=PROBES, default="models")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--keep-warm", type=float, help="Ping interval in seconds")
+    parser.add_argument("--duration", type=float, default=120.0, help="Seconds to keep the endpoint warm")
+    asyncio.run(main(parser.parse_args()))
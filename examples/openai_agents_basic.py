@@ -1,18 +1,23 @@
 import asyncio
 import logging
 import os
+import time
 
-import openai
 from agents import Agent, OpenAIResponsesModel, Runner, set_tracing_disabled
 from dotenv import load_dotenv
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer
+from nim_warmup import get_cold_start_detector, wait_until_ready
 
 logging.basicConfig(level=logging.WARNING)
 # Disable tracing since we're not connected to a supported tracing provider
 set_tracing_disabled(disabled=True)
 
 load_dotenv(override=True)
-client = openai.AsyncOpenAI(base_url=os.environ["NIM_ENDPOINT"], api_key="none")
+client = get_async_client()
 MODEL_NAME = os.environ["NIM_MODEL"]
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
 
 agent = Agent(
     name="Spanish tutor",
@@ -22,8 +27,24 @@ agent = Agent(
 
 
 async def main():
-    result = await Runner.run(agent, input="hi how are you?")
-    print(result.final_output)
+    # Serverless GPU replicas scale to zero, so wait for one before timing the agent run
+    readiness = await wait_until_ready(client)
+    print(f"⏱️ Ready after {readiness.time_to_ready:.1f}s{' (cold start)' if readiness.cold_start else ''}")
+
+    started = time.perf_counter()
+    if STREAM:
+        result = Runner.run_streamed(agent, input="hi how are you?")
+        renderer = StreamRenderer()
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                renderer.handle_event(event.data)
+        renderer.finish()
+    else:
+        result = await Runner.run(agent, input="hi how are you?")
+        print(result.final_output)
+    latency = time.perf_counter() - started
+    get_cold_start_detector().observe(latency)
+    print(f"⏱️ Inference latency: {latency:.1f}s")
 
 
 if __name__ == "__main__":
@@ -2,45 +2,65 @@
 
 This script demonstrates how to use the OpenAI Agents SDK with the GitHub MCP
 server to triage stale issues in a repository.
+
+Each run is capped by a `RunBudget` (see `run_budget.py`) on tool calls, model turns, tokens and
+seconds, set with TRIAGE_MAX_TOOL_CALLS, TRIAGE_MAX_TURNS, TRIAGE_MAX_TOKENS and TRIAGE_MAX_SECONDS.
+Set GITHUB_MCP_URL to run it against the local stand-in `mcp_server_github_stub.py`.
+
+Pipeline mode triages a file of issue references (`owner/repo#123` or issue URLs, one per line)
+with `--concurrency` labeler agents at a time, sharing one MCP connection pool whose cache
+serves repeated `get_issue`, `search_code` and `list_label` lookups. Each `LabelOutput` is
+appended to the `--output` JSONL as soon as its issue is done, and a rerun skips issues
+already labeled:
+    python examples/openai_agents_mcp_github.py --issues stale_issues.txt --output labels.jsonl --concurrency 8
 """
 
+import argparse
 import asyncio
 import logging
 import os
+import re
+from collections.abc import Iterator
 
-import openai
-from agents import Agent, OpenAIResponsesModel, Runner, set_tracing_disabled
-from agents.mcp import create_static_tool_filter
-from agents.mcp.server import MCPServerStreamableHttp
+from agents import Agent, OpenAIResponsesModel, set_tracing_disabled
+from batch_runner import AgentResult, BatchItem, BatchRunner, Usage, completed_ids
 from dotenv import load_dotenv
+from mcp_pool import MCPClientPool
+from nim_client import get_async_client
+from nim_limiter import agent_scope
 from pydantic import BaseModel, Field
 from rich import print
+from run_budget import BudgetedMCPServer, RunBudget, budget_tool_filter, run_with_budget
+from structured_output import log_structured_output_stats
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger("issue_labeler")
+logging.getLogger("run_budget").setLevel(logging.INFO)
+logging.getLogger("mcp_pool").setLevel(logging.INFO)
+logging.getLogger("structured_output").setLevel(logging.INFO)
 
 # Disable tracing since we're not connected to a supported tracing provider
 set_tracing_disabled(disabled=True)
 
 load_dotenv(override=True)
 
-client = openai.AsyncOpenAI(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none",
-)
+client = get_async_client()
 MODEL_NAME = os.environ["NIM_MODEL"]
 
 
-# Setup GitHub MCP server
-mcp_server = MCPServerStreamableHttp(
+# Setup GitHub MCP server; the local stand-in needs no token
+GITHUB_MCP_URL = os.getenv("GITHUB_MCP_URL", "https://api.githubcopilot.com/mcp/")
+github_token = os.getenv("GITHUB_TOKEN")
+headers = {"Authorization": f"Bearer {github_token}"} if github_token else {}
+# Sessions shared by all agent runs; lookups that do not change during a run are cached
+pool = MCPClientPool.from_env(
+    GITHUB_MCP_URL, headers=headers, cached_tools="get_issue=3600,search_code=3600,list_label=3600"
+)
+mcp_server = BudgetedMCPServer(
     name="github",
-    params={
-        "url": "https://api.githubcopilot.com/mcp/",
-        "headers": {"Authorization": f"Bearer {os.environ['GITHUB_TOKEN']}"},
-    },
-    tool_filter=create_static_tool_filter(
-        allowed_tool_names=["get_issue", "search_code", "search_issues", "list_label"]
-    ),
+    params={"url": GITHUB_MCP_URL, "headers": headers},
+    # Hides the tools once the run's budget is used up
+    tool_filter=budget_tool_filter(allowed_tool_names=["get_issue", "search_code", "search_issues", "list_label"]),
 )
 
 
@@ -60,20 +80,77 @@ agent = Agent(
 )
 
 
-async def main() -> None:
-    await mcp_server.connect()
+ISSUE_REF = re.compile(r"(?:https://github\.com/)?([\w.-]+)/([\w.-]+)(?:#|/issues/)(\d+)")
+
+
+def budget_from_env() -> RunBudget:
+    return RunBudget(
+        max_tool_calls=int(os.getenv("TRIAGE_MAX_TOOL_CALLS", "6")),
+        max_turns=int(os.getenv("TRIAGE_MAX_TURNS", "10")),
+        max_tokens=int(os.getenv("TRIAGE_MAX_TOKENS", "0")) or None,
+        max_seconds=float(os.getenv("TRIAGE_MAX_SECONDS", "0")) or None,
+    )
+
 
-    message = (
-        "Get issue #2759 from Azure-Samples/azure-search-openai-demo. Decide on the most appropriate label for it."
+def triage_message(owner: str, repo: str, number: int) -> str:
+    return f"Get issue #{number} from {owner}/{repo}. Decide on the most appropriate label for it."
+
+
+def read_issue_refs(path: str) -> Iterator[BatchItem]:
+    """Yields one item per issue reference in the file, keyed `owner/repo#number`, skipping repeats."""
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            match = ISSUE_REF.search(line)
+            if match is None:
+                raise ValueError(f"{path}:{line_number} is not an issue reference: {line.strip()}")
+            owner, repo, number = match.group(1), match.group(2), int(match.group(3))
+            ref = f"{owner}/{repo}#{number}"
+            if ref not in seen:
+                seen.add(ref)
+                yield BatchItem(id=ref, prompt=triage_message(owner, repo, number))
+
+
+async def label_issue(message: str) -> AgentResult:
+    run = await run_with_budget(agent, message, budget_from_env())
+    budget = run.budget
+    return AgentResult(
+        output=run.final_output.model_dump(),
+        usage=Usage(requests=budget.turns, input_tokens=budget.input_tokens, output_tokens=budget.output_tokens),
+        metadata={"budget": budget.usage()},
     )
 
-    result = await Runner.run(starting_agent=agent, input=message)
 
-    # Print the structured response
-    print(result.final_output)
-    await mcp_server.cleanup()
+async def main(args: argparse.Namespace) -> None:
+    async with pool:
+        # Use the pool's persistent sessions instead of connecting a session for this server
+        mcp_server.session = pool.session()
+        if args.issues is None:
+            run = await run_with_budget(
+                agent, triage_message("Azure-Samples", "azure-search-openai-demo", 2759), budget_from_env()
+            )
+            # Print the structured response and what the run used of its budget
+            print(run.final_output)
+            print(run.budget.usage())
+        else:
+            skip = completed_ids(args.output)
+            if skip:
+                logger.info("Resuming: %d issues already labeled in %s", len(skip), args.output)
+            runner = BatchRunner(label_issue, args.output, concurrency=args.concurrency)
+            with agent_scope("triage"):
+                await runner.run(read_issue_refs(args.issues), skip)
+            logger.info("Triage done: %s", runner.summary())
+    pool.log_stats()
+    # Valid, repaired and invalid LabelOutput documents, with NIM_STRUCTURED_OUTPUT set
+    log_structured_output_stats()
 
 
 if __name__ == "__main__":
     logger.setLevel(logging.INFO)
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Label GitHub issues with an agent using the GitHub MCP server")
+    parser.add_argument("--issues", help="File with one issue reference per line; without it, one sample issue")
+    parser.add_argument("--output", default="triage_labels.jsonl", help="JSONL file labels are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Issues triaged at the same time")
+    asyncio.run(main(parser.parse_args()))
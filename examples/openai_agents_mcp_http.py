@@ -9,22 +9,29 @@ import asyncio
 import logging
 import os
 
-import openai
 from agents import Agent, OpenAIResponsesModel, Runner, set_tracing_disabled
 from agents.mcp.server import MCPServerStreamableHttp
 from dotenv import load_dotenv
+from mcp_pool import MCPClientPool
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer
 
 logging.basicConfig(level=logging.WARNING)
+logging.getLogger("mcp_pool").setLevel(logging.INFO)
 # Disable tracing since we're not connected to a supported tracing provider
 set_tracing_disabled(disabled=True)
 
 # Setup the OpenAI client to use either Azure OpenAI or GitHub Models
 load_dotenv(override=True)
 
-client = openai.AsyncOpenAI(base_url=os.environ["NIM_ENDPOINT"], api_key="none")
+client = get_async_client()
 MODEL_NAME = os.environ["NIM_MODEL"]
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
 
-mcp_server = MCPServerStreamableHttp(name="weather", params={"url": "http://localhost:8000/mcp/"})
+MCP_URL = "http://localhost:8000/mcp/"
+pool = MCPClientPool.from_env(MCP_URL)
+mcp_server = MCPServerStreamableHttp(name="weather", params={"url": MCP_URL})
 
 agent = Agent(
     name="Assistant",
@@ -35,11 +42,24 @@ agent = Agent(
 
 
 async def main():
-    await mcp_server.connect()
-    message = "Find me a hotel in San Francisco for 2 nights starting from 2024-01-01. I need a hotel with free WiFi and a pool."
-    result = await Runner.run(starting_agent=agent, input=message)
-    print(result.final_output)
-    await mcp_server.cleanup()
+    async with pool:
+        # Use the pool's persistent sessions instead of connecting a session for this server
+        mcp_server.session = pool.session()
+        message = (
+            "Find me a hotel in San Francisco for 2 nights starting from 2024-01-01. "
+            "I need a hotel with free WiFi and a pool."
+        )
+        if STREAM:
+            result = Runner.run_streamed(starting_agent=agent, input=message)
+            renderer = StreamRenderer()
+            async for event in result.stream_events():
+                if event.type == "raw_response_event":
+                    renderer.handle_event(event.data)
+            renderer.finish()
+        else:
+            result = await Runner.run(starting_agent=agent, input=message)
+            print(result.final_output)
+    pool.log_stats()
 
 
 if __name__ == "__main__":
@@ -4,10 +4,14 @@ import os
 import random
 from datetime import datetime
 
-import openai
 from agents import Agent, OpenAIResponsesModel, Runner, function_tool, set_tracing_disabled
 from dotenv import load_dotenv
+from nim_cassette import recorded_tool
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer
 from rich.logging import RichHandler
+from telemetry import traced_tool
+from tool_cache import cached_tool
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger("weekend_assistant")
@@ -16,11 +20,16 @@ logger = logging.getLogger("weekend_assistant")
 set_tracing_disabled(disabled=True)
 
 load_dotenv(override=True)
-client = openai.AsyncOpenAI(base_url=os.environ["NIM_ENDPOINT"], api_key="none")
+client = get_async_client()
 MODEL_NAME = os.environ["NIM_MODEL"]
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
 
 
 @function_tool
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=600)
 def get_weather(city: str) -> str:
     logger.info(f"Getting weather for {city}")
     if random.random() < 0.05:
@@ -38,6 +47,9 @@ def get_weather(city: str) -> str:
 
 
 @function_tool
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=3600)
 def get_activities(city: str, date: str) -> list:
     logger.info(f"Getting activities for {city} on {date}")
     return [
@@ -48,6 +60,8 @@ def get_activities(city: str, date: str) -> list:
 
 
 @function_tool
+@traced_tool
+@recorded_tool
 def get_current_date() -> str:
     """Gets the current date and returns as a string in format YYYY-MM-DD."""
     logger.info("Getting current date")
@@ -67,6 +81,14 @@ agent = Agent(
 
 
 async def main():
+    if STREAM:
+        result = Runner.run_streamed(agent, input="hii what can I do this weekend in Seattle?")
+        renderer = StreamRenderer()
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                renderer.handle_event(event.data)
+        renderer.finish()
+        return
     result = await Runner.run(agent, input="hii what can I do this weekend in Seattle?")
     print(result.final_output)
 
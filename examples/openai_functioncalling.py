@@ -1,15 +1,16 @@
-import os
 import json
+import os
 
-import openai
 from dotenv import load_dotenv
+from nim_client import get_sync_client
+from nim_streaming import StreamRenderer
 
 load_dotenv(override=True)
 
-client = openai.OpenAI(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none")
+client = get_sync_client()
 model_name = os.environ["NIM_MODEL"]
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+stream = os.getenv("STREAM", "false").lower() == "true"
 
 tools = [
     {
@@ -31,22 +32,30 @@ tools = [
     },
 ]
 
+# Created before the request, so time-to-first-token includes queueing and prompt processing
+renderer = StreamRenderer()
 response = client.responses.create(
     model=model_name,
     input=[
         {"role": "user", "content": "What is the weather like in Paris today?"},
     ],
     tools=tools,
+    stream=stream,
 )
 
-for item in response.output:
-    if item.type == "message":
-        print(f"🤖 Response: {item.content[0].text}")
-    elif item.type == "reasoning":
-        for content in item.content:
-            print(f"💭 Reasoning: {content.text}")
-    elif item.type == "function_call":
-        arguments = ", ".join(
-            f"{k}='{v}'" for k, v in json.loads(item.arguments).items()
-        )
-        print(f"🔧 Tool Call: {item.name}({arguments})")
\ No newline at end of file
+if stream:
+    for event in response:
+        renderer.handle_event(event)
+    renderer.finish()
+else:
+    for item in response.output:
+        if item.type == "message":
+            print(f"🤖 Response: {item.content[0].text}")
+        elif item.type == "reasoning":
+            for content in item.content:
+                print(f"💭 Reasoning: {content.text}")
+        elif item.type == "function_call":
+            arguments = ", ".join(
+                f"{k}='{v}'" for k, v in json.loads(item.arguments).items()
+            )
+            print(f"🔧 Tool Call: {item.name}({arguments})")
\ No newline at end of file
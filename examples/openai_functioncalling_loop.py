@@ -1,17 +1,30 @@
-import os
+import asyncio
+import inspect
 import json
 import logging
+import os
 
-import openai
 from dotenv import load_dotenv
+from history_manager import HistoryManager, model_summarizer
+from nim_client import get_async_client
+from telemetry import tool_span
 
 logging.basicConfig(level=logging.WARNING)
+logging.getLogger("history_manager").setLevel(logging.INFO)
 load_dotenv(override=True)
 
-client = openai.OpenAI(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none")
+client = get_async_client()
 model_name = os.environ["NIM_MODEL"]
+# When enabled, the model may request several tools in one response; they run concurrently and
+# all outputs go back in a single follow-up request. Set PARALLEL_TOOL_CALLS=false for one tool per turn.
+parallel_tool_calls = os.getenv("PARALLEL_TOOL_CALLS", "true").lower() == "true"
+# History compaction, see history_manager.py. HISTORY_BUDGET_TOKENS caps the input sent per request,
+# HISTORY_CHAIN=true sends only new items with previous_response_id (the endpoint must store responses).
+history_budget_tokens = int(os.getenv("HISTORY_BUDGET_TOKENS", "0")) or None
+max_tool_output_tokens = int(os.getenv("MAX_TOOL_OUTPUT_TOKENS", "2000"))
+history_chain = os.getenv("HISTORY_CHAIN", "false").lower() == "true"
+history_keep_reasoning = os.getenv("HISTORY_KEEP_REASONING", "false").lower() == "true"
+history_summarize = os.getenv("HISTORY_SUMMARIZE", "false").lower() == "true"
 
 
 tools = [
@@ -57,9 +70,8 @@ tools = [
 # ---------------------------------------------------------------------------
 # Tool (function) implementations
 # ---------------------------------------------------------------------------
-def lookup_weather(city_name: str | None = None, zip_code: str | None = None) -> str:
-    """Looks up the weather for given city_name and zip_code."""
-    location = city_name or zip_code or "unknown"
+def lookup_weather(location: str) -> str:
+    """Looks up the weather for the given location."""
     # In a real implementation, call an external weather API here.
     return {
         "location": location,
@@ -90,71 +102,76 @@ tool_mapping = {
 
 
 # ---------------------------------------------------------------------------
-# Conversation loop
+# Tool execution
 # ---------------------------------------------------------------------------
-messages = [
-    {"role": "system", "content": "You are a tourism chatbot."},
-    {"role": "user", "content": "Is it rainy enough in Sydney to watch movies and which ones are on?"},
-]
+async def execute_tool_call(tool_call) -> dict:
+    """Runs one function call, awaiting async tools and running sync tools in a worker thread."""
+    print(f"\nEXECUTING FUNCTION: {tool_call.name}({tool_call.arguments})")
+    try:
+        # Standardize argument parsing assuming JSON format
+        args = json.loads(tool_call.arguments) if tool_call.arguments else {}
+        function = tool_mapping.get(tool_call.name)
+        with tool_span(tool_call.name):
+            if function is None:
+                function_result = f"Error: Function {tool_call.name} not found"
+            elif inspect.iscoroutinefunction(function):
+                function_result = await function(**args)
+            else:
+                function_result = await asyncio.to_thread(function, **args)
+    except Exception as e:
+        function_result = f"Error during function execution: {e}"
+    print(f"FUNCTION RESULT: {function_result}")
+    return {
+        "type": "function_call_output",
+        "call_id": tool_call.call_id,
+        "output": str(function_result),
+    }
 
-while True:
-    response = client.responses.create(
-        model=model_name,
-        input=messages,  # includes prior tool outputs
-        tools=tools,
-        tool_choice="auto",
-        parallel_tool_calls=False,  # ensure sequential tool calls
+
+# ---------------------------------------------------------------------------
+# Conversation loop
+# ---------------------------------------------------------------------------
+async def main():
+    history = HistoryManager(
+        budget_tokens=history_budget_tokens,
+        max_tool_output_tokens=max_tool_output_tokens,
+        keep_reasoning=history_keep_reasoning,
+        chain=history_chain,
+        summarize=model_summarizer(client, model_name) if history_summarize else None,
     )
-    for item in response.output:
-        if item.type == "reasoning":
+    history.add({"role": "system", "content": "You are a tourism chatbot."})
+    history.add({"role": "user", "content": "Is it rainy enough in Sydney to watch movies and which ones are on?"})
+
+    round_trips = 0
+    while True:
+        response = await client.responses.create(
+            model=model_name,
+            **history.request(),  # prior tool outputs, compacted to the budget
+            tools=tools,
+            tool_choice="auto",
+            parallel_tool_calls=parallel_tool_calls,
+        )
+        round_trips += 1
+        # Records the function calls (and the final answer) in the conversation
+        history.add_response(response)
+
+        tool_calls = [item for item in response.output if item.type == "function_call"]
+        if not tool_calls:
+            print(f"\nFINAL RESPONSE: '{response.output_text}'")
+            break
+
+        if any(item.type == "reasoning" for item in response.output):
             print("REASONING STEP")
-        if (item and hasattr(item, "type") and item.type == "function_call"):
-            tool_call = item
-            print(f"\nFUNCTION CALL DETECTED: {tool_call.name}")
-            print(f"FUNCTION ARGUMENTS: {tool_call.arguments}")
-            
-            try:
-                # Standardize argument parsing assuming JSON format
-                args = json.loads(tool_call.arguments) if tool_call.arguments else {}
-                print(f"PARSED ARGUMENTS: {args}")
-                
-                # Append the function call to the conversation
-                messages.append({
-                    "type": "function_call",
-                    "call_id": tool_call.call_id,
-                    "name": tool_call.name,
-                    "arguments": tool_call.arguments,
-                    "id": tool_call.id,
-                    "status": None
-                })
-            
-                
-                # Execute the function
-                if tool_call.name in tool_mapping:
-                    print(f"\nEXECUTING FUNCTION: {tool_call.name}")
-                    
-                    # Call the function with the parsed arguments
-                    function_result = tool_mapping[tool_call.name](**args)
-                    print(f"FUNCTION RESULT: {function_result}")
-                else:
-                    function_result = f"Error: Function {tool_call.name} not found"
-                    print(f"ERROR: {function_result}")
-                
-                # Add the function result to the conversation
-                messages.append({
-                    "type": "function_call_output",
-                    "call_id": tool_call.call_id,
-                    "output": str(function_result)
-                })
-                
-                # Continue to the next iteration to process any more function calls
-                continue
-            except Exception as e:
-                error_msg = f"Error during function execution: {e}"
-        else:
-            # No more function calls, capture the final assistant response
-            if hasattr(response, 'output_text') and response.output_text:
-                assistant_response = response.output_text
-                messages.append({"role": "assistant", "content": assistant_response})
-                print(f"\nFINAL RESPONSE: '{assistant_response}'")
-                break
\ No newline at end of file
+        print(f"\nFUNCTION CALLS DETECTED: {', '.join(tool_call.name for tool_call in tool_calls)}")
+
+        # Execute all requested functions concurrently and send every result back in one request
+        outputs = await asyncio.gather(*(execute_tool_call(tool_call) for tool_call in tool_calls))
+        for output in outputs:
+            await history.add_tool_output(output["call_id"], output["output"])
+
+    saved = sum(turn.saved_tokens for turn in history.turns)
+    print(f"MODEL ROUND TRIPS: {round_trips}, INPUT TOKENS SAVED: ~{saved}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
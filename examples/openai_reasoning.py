@@ -1,26 +1,34 @@
 import os
 
-import openai
 from dotenv import load_dotenv
+from nim_client import get_sync_client
+from nim_streaming import StreamRenderer
+from openai import NOT_GIVEN
 
 load_dotenv(override=True)
 
-client = openai.OpenAI(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none")
+client = get_sync_client()
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+stream = os.getenv("STREAM", "false").lower() == "true"
 
+# Created before the request, so time-to-first-token includes queueing and prompt processing
+renderer = StreamRenderer()
 response = client.responses.create(
     model=os.environ["NIM_MODEL"],
     input="If a city starts offering free bike rentals during rush hour, how might different rental durations and locations impact the way people commute?",
-    reasoning={
-        "effort": "low",
-    }
+    # A fixed effort would override the NIM_EFFORT policy, so only ask for one when it is off
+    reasoning={"effort": "low"} if os.getenv("NIM_EFFORT", "off").lower() == "off" else NOT_GIVEN,
+    stream=stream,
 )
 
-
-for item in response.output:
-    if item.type == "message":
-        print(f"🤖 Response: {item.content[0].text}")
-    elif item.type == "reasoning":
-        for content in item.content:
-            print(f"💭 Reasoning: {content.text}")
\ No newline at end of file
+if stream:
+    for event in response:
+        renderer.handle_event(event)
+    renderer.finish()
+else:
+    for item in response.output:
+        if item.type == "message":
+            print(f"🤖 Response: {item.content[0].text}")
+        elif item.type == "reasoning":
+            for content in item.content:
+                print(f"💭 Reasoning: {content.text}")
@@ -1,17 +1,35 @@
 import os
+import time
 
-import openai
 from dotenv import load_dotenv
+from nim_client import get_sync_client
+from nim_streaming import StreamRenderer
+from nim_warmup import get_cold_start_detector, wait_until_ready_sync
 
 load_dotenv(override=True)
 
-client = openai.OpenAI(
-    base_url=os.environ["NIM_ENDPOINT"],
-    api_key="none")
+client = get_sync_client()
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+stream = os.getenv("STREAM", "false").lower() == "true"
 
+# Serverless GPU replicas scale to zero, so wait for one before timing the actual request
+readiness = wait_until_ready_sync(client)
+print(f"⏱️ Ready after {readiness.time_to_ready:.1f}s{' (cold start)' if readiness.cold_start else ''}")
+
+started = time.perf_counter()
+# Created before the request, so time-to-first-token includes queueing and prompt processing
+renderer = StreamRenderer()
 response = client.responses.create(
     model=os.environ["NIM_MODEL"],
-    input="Write a one-sentence bedtime story about a unicorn."
+    input="Write a one-sentence bedtime story about a unicorn.",
+    stream=stream,
 )
-
-print(response.output_text)
\ No newline at end of file
+if stream:
+    for event in response:
+        renderer.handle_event(event)
+    renderer.finish()
+else:
+    print(response.output_text)
+latency = time.perf_counter() - started
+get_cold_start_detector().observe(latency)
+print(f"⏱️ Inference latency: {latency:.1f}s")
@@ -10,9 +10,11 @@ import logging
 import os
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from mcp_pool import MCPClientPool
+from mcp_pool_pydanticai import PooledMCPServer
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer, quiet_pydanticai_reasoning
 from pydantic_ai import Agent
-from pydantic_ai.mcp import MCPServerStreamableHTTP
 from pydantic_ai.models.openai import OpenAIResponsesModel
 from pydantic_ai.profiles.openai import OpenAIModelProfile
 from pydantic_ai.providers.openai import OpenAIProvider
@@ -20,7 +22,10 @@ from pydantic_ai.providers.openai import OpenAIProvider
 # Setup the OpenAI client to use either Azure OpenAI or GitHub Models
 load_dotenv(override=True)
 
-client = AsyncOpenAI(base_url=os.environ["NIM_ENDPOINT"], api_key="none")
+client = get_async_client()
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
+MESSAGE = "Find me a hotel in San Francisco for 2 nights starting from 2024-01-01. I need free WiFi and a pool."
 
 model = OpenAIResponsesModel(
     os.environ["NIM_MODEL"],
@@ -28,7 +33,8 @@ model = OpenAIResponsesModel(
     profile=OpenAIModelProfile(openai_responses_requires_function_call_status_none=True),
 )
 
-server = MCPServerStreamableHTTP(url="http://localhost:8000/mcp")
+pool = MCPClientPool.from_env("http://localhost:8000/mcp")
+server = PooledMCPServer(pool)
 
 agent: Agent[None, str] = Agent(
     model,
@@ -38,12 +44,23 @@ agent: Agent[None, str] = Agent(
 
 
 async def main():
-    result = await agent.run(
-        "Find me a hotel in San Francisco for 2 nights starting from 2024-01-01. I need free WiFi and a pool."
-    )
-    print(result.output)
+    # The pool's sessions stay open across agent runs, until the pool is closed
+    async with pool:
+        if STREAM:
+            # PydanticAI does not surface gpt-oss raw reasoning text, so only message deltas are rendered
+            renderer = StreamRenderer()
+            with quiet_pydanticai_reasoning():
+                async with agent.run_stream(MESSAGE) as result:
+                    async for delta in result.stream_text(delta=True, debounce_by=None):
+                        renderer.text(delta)
+            renderer.finish()
+        else:
+            result = await agent.run(MESSAGE)
+            print(result.output)
+    pool.log_stats()
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("mcp_pool").setLevel(logging.INFO)
     asyncio.run(main())
@@ -14,16 +14,19 @@ import os
 from typing import Any
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from mcp_pool import MCPClientPool
+from mcp_pool_pydanticai import PooledMCPServer
+from nim_client import get_async_client
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent, NativeOutput, RunContext
-from pydantic_ai.mcp import CallToolFunc, MCPServerStreamableHTTP, ToolResult
+from pydantic_ai.mcp import CallToolFunc, ToolResult
 from pydantic_ai.models.openai import OpenAIResponsesModel
 from pydantic_ai.profiles.openai import OpenAIModelProfile
 from pydantic_ai.providers.openai import OpenAIProvider
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.markdown import Markdown
+from structured_output import log_structured_output_stats
 
 # Setup the OpenAI client to use either Azure OpenAI or GitHub Models
 load_dotenv(override=True)
@@ -31,8 +34,10 @@ load_dotenv(override=True)
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
+logging.getLogger("mcp_pool").setLevel(logging.INFO)
+logging.getLogger("structured_output").setLevel(logging.INFO)
 
-client = AsyncOpenAI(base_url=os.environ["NIM_ENDPOINT"], api_key="none")
+client = get_async_client()
 
 model = OpenAIResponsesModel(
     os.environ["NIM_MODEL"],
@@ -50,10 +55,13 @@ async def process_tool_call(
     tool_args: dict[str, Any],
 ) -> ToolResult:
     logger.info(f"Processing tool call to {name} with args {tool_args}")
+    # Concurrency limit, per-tool timeout and latency histogram come from the pool the server calls through
     return await call_tool(name, tool_args, {"deps": ctx.deps})
 
 
-server = MCPServerStreamableHTTP(url="https://learn.microsoft.com/api/mcp", process_tool_call=process_tool_call)
+MCP_URL = "https://learn.microsoft.com/api/mcp"
+pool = MCPClientPool.from_env(MCP_URL)
+server = PooledMCPServer(pool, process_tool_call=process_tool_call)
 
 
 class Citation(BaseModel):
@@ -75,7 +83,8 @@ agent = Agent(
 )
 
 async def main():
-    result = await agent.run("Does Azure offer serverless GPUs?")
+    async with pool:
+        result = await agent.run("Does Azure offer serverless GPUs?")
     
     console = Console()
     console.print(Markdown(result.output.answer))
@@ -83,6 +92,9 @@ async def main():
         f"- [{citation.title}]({citation.url})" for citation in result.output.citations
     )
     console.print(Markdown(citations_md))
+    pool.log_stats()
+    # Valid, repaired and retried outputs of the Answer schema, with NIM_STRUCTURED_OUTPUT set
+    log_structured_output_stats()
 
 
 if __name__ == "__main__":
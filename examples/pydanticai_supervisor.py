@@ -6,13 +6,18 @@ from datetime import datetime
 from typing import Annotated
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from pydantic import Field
+from fanout import gather_bounded
+from nim_cassette import recorded_tool
+from nim_client import get_async_client
+from pydantic import BaseModel, Field
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIResponsesModel
 from pydantic_ai.profiles.openai import OpenAIModelProfile
 from pydantic_ai.providers.openai import OpenAIProvider
+from pydantic_ai.usage import RunUsage
 from rich.logging import RichHandler
+from telemetry import agent_span, traced_agent_run, traced_tool
+from tool_cache import cached_tool
 
 load_dotenv(override=True)
 
@@ -20,7 +25,7 @@ logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]",
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-client = AsyncOpenAI(base_url=os.environ["NIM_ENDPOINT"], api_key="none")
+client = get_async_client()
 
 model = OpenAIResponsesModel(
     os.environ["NIM_MODEL"],
@@ -37,6 +42,9 @@ model = OpenAIResponsesModel(
 # ----------------------------------------------------------------------------------
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=600)
 def get_weather(
     city: Annotated[str, Field(description="The city to get the weather for.")],
     date: Annotated[str, Field(description="The date to get weather for in format YYYY-MM-DD.")],
@@ -50,6 +58,9 @@ def get_weather(
         return {"temperature": 60, "description": "Rainy"}
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=3600)
 def get_activities(
     city: Annotated[str, Field(description="The city to get activities for.")],
     date: Annotated[str, Field(description="The date to get activities for in format YYYY-MM-DD.")],
@@ -63,6 +74,8 @@ def get_activities(
     ]
 
 
+@traced_tool
+@recorded_tool
 def get_current_date() -> str:
     """Gets the current date from the system (YYYY-MM-DD)."""
     logger.info("Getting current date")
@@ -83,7 +96,8 @@ weekend_agent = Agent(
 async def plan_weekend(ctx: RunContext[None], query: str) -> str:
     """Plan a weekend based on user query and return the final response."""
     logger.info("Tool: plan_weekend invoked")
-    res = await weekend_agent.run(query)
+    with agent_span("weekend_planner"):
+        res = await weekend_agent.run(query, usage=ctx.usage)
     return res.output
 
 
@@ -92,6 +106,9 @@ async def plan_weekend(ctx: RunContext[None], query: str) -> str:
 # ----------------------------------------------------------------------------------
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=3600)
 def find_recipes(query: Annotated[str, Field(description="User query or desired meal/ingredient")]) -> list[dict]:
     """Returns recipes (JSON) based on a query."""
     logger.info(f"Finding recipes for '{query}'")
@@ -122,6 +139,9 @@ def find_recipes(query: Annotated[str, Field(description="User query or desired
     return recipes
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=60)
 def check_fridge() -> list[str]:
     """Returns a JSON list of ingredients currently in the fridge."""
     logger.info("Checking fridge for current ingredients")
@@ -146,7 +166,8 @@ meal_agent = Agent(
 async def plan_meal(ctx: RunContext[None], query: str) -> str:
     """Plan a meal based on user query and return the final response."""
     logger.info("Tool: plan_meal invoked")
-    res = await meal_agent.run(query)
+    with agent_span("meal_planner"):
+        res = await meal_agent.run(query, usage=ctx.usage)
     return res.output
 
 
@@ -165,10 +186,85 @@ supervisor_agent = Agent(
 )
 
 
+# ----------------------------------------------------------------------------------
+# Fan-out supervisor: plan once, run sub-agents concurrently, synthesize once
+# ----------------------------------------------------------------------------------
+
+# "tools" lets the supervisor call sub-agents as tools, one model turn each.
+# "fanout" plans up front and runs the needed sub-agents concurrently.
+SUPERVISOR_MODE = os.getenv("SUPERVISOR_MODE", "tools")
+MAX_CONCURRENT_SUBAGENTS = int(os.getenv("MAX_CONCURRENT_SUBAGENTS", "2"))
+
+
+class FanoutPlan(BaseModel):
+    weekend_query: str | None = Field(
+        default=None, description="Query for the weekend planning agent, or null if it is not needed."
+    )
+    meal_query: str | None = Field(
+        default=None, description="Query for the meal planning agent, or null if it is not needed."
+    )
+
+
+planner_agent = Agent(
+    model,
+    output_type=FanoutPlan,
+    system_prompt=(
+        "You are a supervisor managing two specialist agents: a weekend planning agent and a meal planning agent. "
+        "Break down the user's request into a clear, concise query for each specialist that is needed. "
+        "Leave the query empty for a specialist that is not needed."
+    ),
+)
+
+synthesizer_agent = Agent(
+    model,
+    system_prompt=(
+        "You are a supervisor combining answers from specialist agents. "
+        "Synthesize them into a single helpful answer to the user's request. "
+        "When there are no specialist answers, answer the user's request yourself."
+    ),
+)
+
+
+async def run_fanout(user_query: str, usage: RunUsage | None = None) -> str:
+    """Plans the sub-agent calls, runs them concurrently and synthesizes a single answer.
+
+    Token usage of every model call is added to `usage` when given.
+    """
+    plan = (await planner_agent.run(user_query, usage=usage)).output
+    specialists = []
+    if plan.weekend_query:
+        specialists.append(
+            (
+                "Weekend plan",
+                lambda: traced_agent_run("weekend_planner", weekend_agent.run(plan.weekend_query, usage=usage)),
+            )
+        )
+    if plan.meal_query:
+        specialists.append(
+            ("Meal plan", lambda: traced_agent_run("meal_planner", meal_agent.run(plan.meal_query, usage=usage)))
+        )
+    logger.info(f"Fan-out to {len(specialists)} sub-agent(s)")
+    if not specialists:
+        # Nothing to fan out, answer in a single synthesizer turn without tools
+        return (await synthesizer_agent.run(user_query, usage=usage)).output
+
+    results = await gather_bounded(*(run for _, run in specialists), limit=MAX_CONCURRENT_SUBAGENTS)
+    if len(results) == 1:
+        # A single specialist answer needs no extra synthesis turn
+        return results[0].output
+    answers = "\n\n".join(f"## {title}\n{result.output}" for (title, _), result in zip(specialists, results))
+    res = await synthesizer_agent.run(f"User request: {user_query}\n\nSpecialist answers:\n\n{answers}", usage=usage)
+    return res.output
+
+
 async def main():
     user_query = "my kids want pasta for dinner and i need a recipe"
-    result = await supervisor_agent.run(user_query)
-    print(result.output)
+    with agent_span("supervisor"):
+        if SUPERVISOR_MODE == "fanout":
+            print(await run_fanout(user_query))
+            return
+        result = await supervisor_agent.run(user_query)
+        print(result.output)
 
 
 if __name__ == "__main__":
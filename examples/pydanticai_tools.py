@@ -5,7 +5,9 @@ import random
 from datetime import datetime
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from nim_cassette import recorded_tool
+from nim_client import get_async_client
+from nim_streaming import StreamRenderer, quiet_pydanticai_reasoning
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIResponsesModel
 from pydantic_ai.profiles.openai import OpenAIModelProfile
@@ -13,12 +15,16 @@ from pydantic_ai.providers.openai import OpenAIProvider
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.markdown import Markdown
+from telemetry import traced_tool
+from tool_cache import cached_tool
 
 load_dotenv(override=True)
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger(__name__)
 
-client = AsyncOpenAI(base_url=os.environ["NIM_ENDPOINT"], api_key="none")
+client = get_async_client()
+# Set STREAM=true to print tokens as they arrive and report time-to-first-token
+STREAM = os.getenv("STREAM", "false").lower() == "true"
 
 model = OpenAIResponsesModel(
     os.environ["NIM_MODEL"],
@@ -29,6 +35,9 @@ model = OpenAIResponsesModel(
 )
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=600)
 def get_weather(city: str) -> dict:
     """Returns weather data for a given city, a dictionary with temperature and description."""
     logger.info(f"Getting weather for {city}")
@@ -46,6 +55,9 @@ def get_weather(city: str) -> dict:
         }
 
 
+@traced_tool
+@recorded_tool
+@cached_tool(ttl=3600)
 def get_activities(city: str, date: str) -> list:
     """Returns a list of activities for a given city and date."""
     logger.info(f"Getting activities for {city} on {date}")
@@ -56,6 +68,8 @@ def get_activities(city: str, date: str) -> list:
     ]
 
 
+@traced_tool
+@recorded_tool
 def get_current_date() -> str:
     """Gets the current date from the system and returns as a string in format YYYY-MM-DD."""
     logger.info("Getting current date")
@@ -74,6 +88,15 @@ agent = Agent(
 
 
 async def main():
+    if STREAM:
+        # PydanticAI does not surface gpt-oss raw reasoning text, so only message deltas are rendered
+        renderer = StreamRenderer()
+        with quiet_pydanticai_reasoning():
+            async with agent.run_stream("what can I do for funzies this weekend in Seattle?") as result:
+                async for delta in result.stream_text(delta=True, debounce_by=None):
+                    renderer.text(delta)
+        renderer.finish()
+        return
     result = await agent.run("what can I do for funzies this weekend in Seattle?")
     console = Console()
     console.print(Markdown(result.output))
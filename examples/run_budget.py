@@ -0,0 +1,191 @@
+"""Hard per-run budgets for OpenAI Agents runs that call MCP tools.
+
+A prompt asking the model to stay within a few tool calls is a request, not a limit. `run_with_budget`
+enforces `RunBudget` caps on tool calls, model turns, tokens and wall-clock time:
+    * `budget_tool_filter` hides every MCP tool once the budget is used up (or the next turn is the
+      last one), so the model answers with its final output instead of another search;
+    * `BudgetedMCPServer` refuses tool calls beyond the cap, also when the model asks for several
+      at once, answering the model with an error instead of calling the server;
+    * when the run still reaches the turn or time cap, the agent is run once more without tools
+      on what it gathered so far, forcing a final output of its `output_type`.
+
+    budget = RunBudget(max_tool_calls=6, max_turns=8, max_tokens=50_000, max_seconds=120)
+    run = await run_with_budget(agent, message, budget)
+    print(run.final_output, run.budget.usage())
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from agents import Agent, ItemHelpers, RunContextWrapper, RunHooks, Runner
+from agents.exceptions import MaxTurnsExceeded
+from agents.items import ModelResponse
+from agents.mcp import MCPServerStreamableHttp, ToolFilterContext
+from mcp.types import CallToolResult, TextContent
+from mcp.types import Tool as MCPTool
+
+logger = logging.getLogger("run_budget")
+
+BUDGET_EXHAUSTED = "Tool budget exhausted: no more tool calls are allowed. Give your final answer now."
+FINALIZE_INSTRUCTIONS = (
+    "The research budget for this task is used up and no tools are available. "
+    "Give your final answer now, based only on the information gathered so far."
+)
+
+
+@dataclass
+class RunBudget:
+    max_tool_calls: int | None = 6
+    max_turns: int = 10
+    max_tokens: int | None = None
+    max_seconds: float | None = None
+    tool_calls: int = 0
+    refused_tool_calls: int = 0
+    turns: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    forced_final: bool = False
+    exhausted: str | None = None  # the first cap that was reached
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def _check(self) -> str | None:
+        if self.max_tool_calls is not None and self.tool_calls >= self.max_tool_calls:
+            return "tool_calls"
+        if self.max_tokens is not None and self.input_tokens + self.output_tokens >= self.max_tokens:
+            return "tokens"
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            return "time"
+        return None
+
+    def tools_allowed(self, next_turn: bool = False) -> bool:
+        """Whether tools may still be called; with `next_turn`, whether to offer them to the turn about to start."""
+        reason = self._check()
+        if reason is None and next_turn and self.turns + 1 >= self.max_turns:
+            # The last turn is kept for the final output
+            reason = "turns"
+        if reason is not None and self.exhausted is None:
+            self.exhausted = reason
+            logger.info("Run budget reached (%s), no more tool calls", reason)
+        return reason is None
+
+    def take_tool_call(self) -> bool:
+        """Counts one tool call, or returns False when the budget allows no more."""
+        if not self.tools_allowed():
+            self.refused_tool_calls += 1
+            return False
+        self.tool_calls += 1
+        return True
+
+    def usage(self) -> dict:
+        return {
+            "tool_calls": self.tool_calls,
+            "refused_tool_calls": self.refused_tool_calls,
+            "turns": self.turns,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "seconds": round(self.elapsed, 2),
+            "exhausted": self.exhausted,
+            "forced_final": self.forced_final,
+        }
+
+
+current_budget: contextvars.ContextVar[RunBudget | None] = contextvars.ContextVar("run_budget", default=None)
+
+
+def budget_tool_filter(allowed_tool_names: list[str] | None = None):
+    """MCP tool filter keeping `allowed_tool_names` (all when None) while the current run's budget lasts."""
+    allowed = set(allowed_tool_names) if allowed_tool_names is not None else None
+
+    def tool_filter(context: ToolFilterContext, tool: MCPTool) -> bool:
+        if allowed is not None and tool.name not in allowed:
+            return False
+        budget = current_budget.get()
+        return budget is None or budget.tools_allowed(next_turn=True)
+
+    return tool_filter
+
+
+class BudgetedMCPServer(MCPServerStreamableHttp):
+    """Streamable HTTP MCP server whose tool calls count against the current run's budget."""
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None) -> CallToolResult:
+        budget = current_budget.get()
+        if budget is not None and not budget.take_tool_call():
+            logger.info("Refused %s call, the run budget is used up", tool_name)
+            return CallToolResult(content=[TextContent(type="text", text=BUDGET_EXHAUSTED)], isError=True)
+        return await super().call_tool(tool_name, arguments)
+
+
+class BudgetHooks(RunHooks):
+    """Counts model turns and tokens against the budget."""
+
+    def __init__(self, budget: RunBudget):
+        self.budget = budget
+        self.tool_results: list[str] = []
+
+    async def on_llm_start(self, context: RunContextWrapper, agent: Agent, system_prompt, input_items) -> None:
+        self.budget.turns += 1
+
+    async def on_llm_end(self, context: RunContextWrapper, agent: Agent, response: ModelResponse) -> None:
+        self.budget.input_tokens += response.usage.input_tokens
+        self.budget.output_tokens += response.usage.output_tokens
+
+    async def on_tool_end(self, context: RunContextWrapper, agent: Agent, tool, result: str) -> None:
+        self.tool_results.append(f"{tool.name}: {result}")
+
+
+@dataclass
+class BudgetedRun:
+    final_output: Any
+    budget: RunBudget
+
+
+async def _finalize(agent: Agent, input_items: list, budget: RunBudget, hooks: BudgetHooks) -> Any:
+    """Runs `agent` once more without tools on `input_items`, returning its final output."""
+    budget.forced_final = True
+    instructions = FINALIZE_INSTRUCTIONS
+    if isinstance(agent.instructions, str) and agent.instructions:
+        instructions = f"{agent.instructions}\n\n{FINALIZE_INSTRUCTIONS}"
+    final_agent = agent.clone(instructions=instructions, tools=[], mcp_servers=[], handoffs=[])
+    result = await Runner.run(final_agent, input_items, max_turns=1, hooks=hooks)
+    return result.final_output
+
+
+async def run_with_budget(agent: Agent, input: str | list, budget: RunBudget | None = None) -> BudgetedRun:
+    """Runs `agent` within `budget`, always ending with a final output unless the model call itself fails."""
+    budget = budget or RunBudget()
+    budget.started = time.monotonic()
+    hooks = BudgetHooks(budget)
+    token = current_budget.set(budget)
+    try:
+        try:
+            result = await asyncio.wait_for(
+                Runner.run(agent, input, max_turns=budget.max_turns, hooks=hooks), budget.max_seconds
+            )
+            return BudgetedRun(result.final_output, budget)
+        except MaxTurnsExceeded as e:
+            budget.exhausted = budget.exhausted or "turns"
+            logger.info("Run reached %d turns, forcing a final output", budget.max_turns)
+            run_data = e.run_data
+            input_items = ItemHelpers.input_to_new_input_list(run_data.input if run_data else input)
+            if run_data is not None:
+                input_items += [item.to_input_item() for item in run_data.new_items]
+        except asyncio.TimeoutError:
+            budget.exhausted = "time"
+            logger.info("Run reached %.1fs, forcing a final output", budget.max_seconds)
+            # The cancelled run's items are lost, hand over the tool results seen so far instead
+            input_items = ItemHelpers.input_to_new_input_list(input)
+            if hooks.tool_results:
+                research = "\n".join(hooks.tool_results)
+                input_items.append({"role": "user", "content": f"Tool results so far:\n{research}"})
+        return BudgetedRun(await _finalize(agent, input_items, budget, hooks), budget)
+    finally:
+        current_budget.reset(token)
@@ -0,0 +1,744 @@
+"""Structured output for NIM: guided decoding, early validation and JSON repair.
+
+`NativeOutput(Answer)` in PydanticAI and `output_type=LabelOutput` in the OpenAI Agents SDK send a
+JSON schema in `text.format` and only validate the answer once it is complete. A fenced or truncated
+document then costs a full extra turn (PydanticAI retries with the validation errors) or fails the
+run (the Agents SDK). `StructuredOutputTransport` handles every `POST .../responses` call that has
+a `json_schema` format:
+    * it asks NIM to constrain decoding to the schema with `nvext.guided_json`;
+    * streamed output is checked as it arrives by `IncrementalValidator`, and the stream is closed
+      at the first character that no valid document can start with, so the GPU stops generating
+      it and the caller gets a `StructuredOutputError` right away;
+    * output that is only trivially broken (code fences or text around the document, trailing
+      commas, Python literals, control characters in strings) is fixed by `repair_json`
+      without a model round-trip. Streamed responses are repaired in their `.done` and
+      `response.completed` events, not in the deltas already passed on. Truncated output is
+      never closed up: it is reported as invalid, since the missing part may be most of it;
+    * per schema, `structured_output_stats()` counts the outputs that were valid, repaired,
+      invalid or cut off, and the requests that retry after an invalid output.
+The outcome of non-streaming calls is returned in the `x-nim-structured-output` response header.
+Validation covers what pydantic and the agent SDKs put in their schemas: types, properties,
+required and additional properties, items, enum and const, `$ref` and `anyOf`/`oneOf`.
+
+`nim_client` adds it to the async client according to `NIM_STRUCTURED_OUTPUT`:
+    off     Leave requests alone (default)
+    record  Only validate outputs and count the outcomes, to measure the baseline
+    repair  Repair and cut off outputs, for servers without guided decoding
+    on      Guided decoding, repair and cut-off
+
+Compare the modes against the mock, which breaks a share of the structured outputs it is not asked
+to guide:
+    python examples/mock_nim_server.py --port 8001 --malformed-json-rate 0.3
+    NIM_ENDPOINT=http://localhost:8001/v1/ NIM_MODEL=gpt-oss-20b python examples/structured_output.py
+"""
+
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger("structured_output")
+
+OUTCOME_HEADER = "x-nim-structured-output"
+MODES = ("off", "record", "repair", "on")
+# Hashes of invalid outputs remembered to recognize the requests that retry them
+MAX_INVALID_OUTPUTS = 10_000
+WHITESPACE = " \t\r\n"
+LITERALS = ("true", "false", "null")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_VALUE_TYPES = {"{": "object", "[": "array", '"': "string", "t": "boolean", "f": "boolean", "n": "null"}
+
+
+class SchemaViolation(ValueError):
+    """Output that cannot become a document valid against the schema."""
+
+    def __init__(self, message: str, path: str, offset: int):
+        super().__init__(f"{message} at {path} (offset {offset})")
+        self.path = path
+        self.offset = offset
+
+
+class StructuredOutputError(Exception):
+    """Raised while reading a streamed response whose structured output was cut off."""
+
+    def __init__(self, schema_name: str, violation: SchemaViolation):
+        super().__init__(f"Structured output for {schema_name} cut off: {violation}")
+        self.schema_name = schema_name
+        self.violation = violation
+
+
+def _allows(schema: dict, value_type: str) -> bool:
+    types = schema.get("type")
+    if types is None:
+        return True
+    types = {types} if isinstance(types, str) else set(types)
+    return value_type in types or (value_type == "number" and "integer" in types)
+
+
+@dataclass
+class _Frame:
+    kind: str  # "object" or "array"
+    schema: dict | None
+    state: str
+    keys: set[str] = field(default_factory=set)
+    key: str | None = None
+    value_schema: dict | None = None
+    index: int = 0
+
+
+class IncrementalValidator:
+    """Checks a JSON document against a schema as it arrives, raising `SchemaViolation` at the first bad character.
+
+    `lenient` accepts what `repair_json` can fix: text around the document, trailing commas and
+    Python literals.
+    """
+
+    def __init__(self, schema: dict, lenient: bool = False):
+        self.root = schema
+        self.lenient = lenient
+        self.done = False
+        self._offset = -1
+        self._stack: list[_Frame] = []
+        self._string: list[str] | None = None
+        self._escape = False
+        self._string_is_key = False
+        self._literal: str | None = None
+        self._scalar_schema: dict | None = None
+
+    def _path(self) -> str:
+        parts = ["$"]
+        for frame in self._stack:
+            if frame.kind == "object" and frame.key is not None:
+                parts.append(f".{frame.key}")
+            elif frame.kind == "array":
+                parts.append(f"[{frame.index}]")
+        return "".join(parts)
+
+    def _fail(self, message: str):
+        raise SchemaViolation(message, self._path(), self._offset)
+
+    def _resolve(self, schema: Any) -> dict | None:
+        while isinstance(schema, dict) and isinstance(schema.get("$ref"), str):
+            if not schema["$ref"].startswith("#/"):
+                return None
+            node: Any = self.root
+            for part in schema["$ref"][2:].split("/"):
+                node = node.get(part) if isinstance(node, dict) else None
+            schema = node
+        return schema if isinstance(schema, dict) else None
+
+    def _narrow(self, schema: Any, value_type: str) -> dict | None:
+        """The schema a value of `value_type` must satisfy, None when it cannot be checked."""
+        schema = self._resolve(schema)
+        if schema is None:
+            return None
+        for key in ("anyOf", "oneOf"):
+            if isinstance(schema.get(key), list):
+                branches = [self._resolve(branch) for branch in schema[key]]
+                if any(branch is None for branch in branches):
+                    return None
+                branches = [branch for branch in branches if _allows(branch, value_type)]
+                if not branches:
+                    self._fail(f"unexpected {value_type}")
+                return branches[0] if len(branches) == 1 else None
+        if not _allows(schema, value_type):
+            self._fail(f"unexpected {value_type}")
+        return schema
+
+    def _can_start(self, value_type: str) -> bool:
+        """Whether the document may be a value of `value_type`."""
+        schema = self._resolve(self.root)
+        if schema is None:
+            return True
+        for key in ("anyOf", "oneOf"):
+            if isinstance(schema.get(key), list):
+                branches = [self._resolve(branch) for branch in schema[key]]
+                return any(branch is None or _allows(branch, value_type) for branch in branches)
+        return _allows(schema, value_type)
+
+    def feed(self, text: str) -> None:
+        for char in text:
+            self._offset += 1
+            self._step(char)
+
+    def close(self) -> None:
+        """Checks that the document is complete."""
+        if self._literal is not None and not self._stack:
+            self._end_literal()
+        if not self.done:
+            self._fail("incomplete document")
+
+    def _step(self, char: str) -> None:
+        if self._string is not None:
+            self._string_char(char)
+            return
+        if self._literal is not None:
+            if char not in WHITESPACE and char not in ",]}":
+                self._literal += char
+                self._check_literal()
+                return
+            self._end_literal()
+        if self.done:
+            if char not in WHITESPACE and not self.lenient:
+                self._fail("text after the document")
+            return
+        if char in WHITESPACE:
+            return
+        if not self._stack:
+            # Leading text such as a code fence is skipped when lenient, up to a bracket the schema allows
+            if not self.lenient or (char in "{[" and self._can_start(_VALUE_TYPES[char])):
+                self._start_value(char, self.root)
+            return
+        frame = self._stack[-1]
+        if frame.kind == "object":
+            self._object_char(frame, char)
+        else:
+            self._array_char(frame, char)
+
+    def _object_char(self, frame: _Frame, char: str) -> None:
+        if frame.state in ("key_or_end", "key"):
+            if char == '"':
+                frame.key = None
+                self._string, self._string_is_key = [], True
+            elif char == "}" and (frame.state == "key_or_end" or self.lenient):
+                self._end_container()
+            else:
+                self._fail(f"expected a key, got {char!r}")
+        elif frame.state == "colon":
+            if char != ":":
+                self._fail(f"expected ':', got {char!r}")
+            frame.state = "value"
+        elif frame.state == "value":
+            self._start_value(char, frame.value_schema)
+        elif char == ",":
+            frame.state = "key"
+        elif char == "}":
+            self._end_container()
+        else:
+            self._fail(f"expected ',' or '}}', got {char!r}")
+
+    def _array_char(self, frame: _Frame, char: str) -> None:
+        if frame.state in ("value_or_end", "value"):
+            if char == "]" and (frame.state == "value_or_end" or self.lenient):
+                self._end_container()
+            else:
+                self._start_value(char, frame.schema.get("items") if frame.schema else None)
+        elif char == ",":
+            frame.index += 1
+            frame.state = "value"
+        elif char == "]":
+            self._end_container()
+        else:
+            self._fail(f"expected ',' or ']', got {char!r}")
+
+    def _start_value(self, char: str, schema: Any) -> None:
+        value_type = _VALUE_TYPES.get(char)
+        if char == "-" or char.isdigit():
+            value_type = "number"
+        elif self.lenient and char in "TFN":
+            value_type = "null" if char == "N" else "boolean"
+        if value_type is None:
+            self._fail(f"unexpected {char!r}")
+        schema = self._narrow(schema, value_type)
+        if value_type == "object":
+            self._stack.append(_Frame("object", schema, "key_or_end"))
+        elif value_type == "array":
+            self._stack.append(_Frame("array", schema, "value_or_end"))
+        elif value_type == "string":
+            self._string, self._string_is_key, self._scalar_schema = [], False, schema
+        else:
+            self._literal, self._scalar_schema = char, schema
+            self._check_literal()
+
+    def _candidates(self) -> list[str] | None:
+        """The strings the current string must be one of, when the schema limits them."""
+        if self._string_is_key:
+            schema = self._stack[-1].schema
+            if schema is None or schema.get("additionalProperties", True) is not False:
+                return None
+            return list(schema.get("properties", {}))
+        schema = self._scalar_schema
+        if schema is None:
+            return None
+        if "const" in schema:
+            return [schema["const"]] if isinstance(schema["const"], str) else []
+        if isinstance(schema.get("enum"), list):
+            return [value for value in schema["enum"] if isinstance(value, str)]
+        return None
+
+    def _string_char(self, char: str) -> None:
+        raw = self._string
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._end_string()
+            return
+        elif char < " " and not self.lenient:
+            self._fail("control character in string")
+        raw.append(char)
+        if char != "\\" and "\\" not in raw:
+            candidates = self._candidates()
+            prefix = "".join(raw)
+            if candidates is not None and not any(candidate.startswith(prefix) for candidate in candidates):
+                self._fail(f"unexpected {'key' if self._string_is_key else 'value'} {prefix!r}...")
+
+    def _end_string(self) -> None:
+        raw, self._string = "".join(self._string), None
+        try:
+            value = json.loads(f'"{raw}"', strict=False)
+        except ValueError:
+            self._fail("invalid string escape")
+        if self._string_is_key:
+            frame = self._stack[-1]
+            frame.key = value
+            schema = frame.schema or {}
+            properties = schema.get("properties", {})
+            additional = schema.get("additionalProperties", True)
+            if value not in properties and additional is False:
+                self._fail("unexpected key")
+            frame.keys.add(value)
+            frame.value_schema = properties.get(value, additional if isinstance(additional, dict) else None)
+            frame.state = "colon"
+            return
+        self._check_value(value)
+        self._value_done()
+
+    def _check_literal(self) -> None:
+        literal = self._literal
+        if literal[0] in "-0123456789":
+            if not set(literal) <= set("-+.eE0123456789"):
+                self._fail(f"invalid number {literal!r}")
+            return
+        words = (*LITERALS, *PYTHON_LITERALS) if self.lenient else LITERALS
+        if not any(word.startswith(literal) for word in words):
+            self._fail(f"invalid literal {literal!r}")
+
+    def _end_literal(self) -> None:
+        literal, self._literal = self._literal, None
+        literal = PYTHON_LITERALS.get(literal, literal) if self.lenient else literal
+        if literal not in LITERALS and not NUMBER.fullmatch(literal):
+            self._fail(f"invalid literal {literal!r}")
+        value = json.loads(literal)
+        types = (self._scalar_schema or {}).get("type") or []
+        types = {types} if isinstance(types, str) else set(types)
+        # JSON Schema and pydantic take 1.0 as an integer
+        if isinstance(value, float) and not value.is_integer() and "integer" in types and "number" not in types:
+            self._fail("expected an integer")
+        self._check_value(value)
+        self._value_done()
+
+    def _check_value(self, value: Any) -> None:
+        schema = self._scalar_schema
+        if schema is None:
+            return
+        if "const" in schema and value != schema["const"]:
+            self._fail(f"expected {schema['const']!r}")
+        if isinstance(schema.get("enum"), list) and value not in schema["enum"]:
+            self._fail(f"{value!r} is not one of {schema['enum']}")
+
+    def _end_container(self) -> None:
+        frame = self._stack[-1]
+        if frame.kind == "object" and frame.schema is not None:
+            frame.key = None
+            missing = [key for key in frame.schema.get("required", []) if key not in frame.keys]
+            if missing:
+                self._fail(f"missing required {missing}")
+        self._stack.pop()
+        self._value_done()
+
+    def _value_done(self) -> None:
+        if not self._stack:
+            self.done = True
+            return
+        self._stack[-1].state = "comma_or_end"
+
+
+def validate(text: str, schema: dict) -> None:
+    """Raises `SchemaViolation` unless `text` is a JSON document valid against `schema`."""
+    validator = IncrementalValidator(schema)
+    validator.feed(text)
+    validator.close()
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    end = len(out)
+    while end and out[end - 1] in WHITESPACE:
+        end -= 1
+    if end and out[end - 1] == ",":
+        del out[end - 1 :]
+
+
+def repair_json(text: str) -> str | None:
+    """`text` as a compact JSON document when only trivial fixes are needed, else None.
+
+    The document is the first `{` or `[` from which one can be repaired, so brackets in leading
+    prose are skipped.
+    """
+    for match in re.finditer(r"[{\[]", text):
+        repaired = _repair_from(text, match.start())
+        if repaired is not None:
+            return repaired
+    return None
+
+
+def _repair_from(text: str, index: int) -> str | None:
+    out: list[str] = []
+    closers: list[str] = []
+    in_string = escape = False
+    while index < len(text):
+        char = text[index]
+        index += 1
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif char < " ":
+                char = json.dumps(char)[1:-1]
+            out.append(char)
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            if not closers or closers.pop() != char:
+                return None
+            _drop_trailing_comma(out)
+            out.append(char)
+            if not closers:
+                break
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z]+", text[index - 1 :]).group()
+            index += len(word) - 1
+            out.append(PYTHON_LITERALS.get(word, word))
+        else:
+            out.append(char)
+    if in_string or closers:
+        # Truncated: closing it would pass off a partial answer as a complete one
+        return None
+    try:
+        value = json.loads("".join(out))
+    except ValueError:
+        return None
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def check_output(text: str, schema: dict, repair: bool = True) -> tuple[str, str]:
+    """The outcome (`valid`, `repaired` or `invalid`) of an output and the text to pass on."""
+    try:
+        validate(text, schema)
+        return "valid", text
+    except SchemaViolation:
+        pass
+    if repair:
+        repaired = repair_json(text)
+        if repaired is not None:
+            try:
+                validate(repaired, schema)
+                return "repaired", repaired
+            except SchemaViolation:
+                pass
+    return "invalid", text
+
+
+@dataclass
+class SchemaStats:
+    name: str
+    requests: int = 0
+    guided: int = 0
+    valid: int = 0
+    repaired: int = 0
+    invalid: int = 0
+    cut_off: int = 0
+    # Requests sending an invalid output back to the model, i.e. validation retries
+    retries: int = 0
+
+
+_stats: dict[str, SchemaStats] = {}
+_invalid_outputs: OrderedDict[str, None] = OrderedDict()
+
+
+def structured_output_stats() -> list[dict]:
+    """Outcomes of the structured outputs per schema name, across all clients in the process."""
+    return [asdict(stats) for stats in _stats.values()]
+
+
+def log_structured_output_stats() -> None:
+    for stats in _stats.values():
+        logger.info(
+            "%s: %d requests (%d guided), %d valid, %d repaired, %d invalid, %d cut off, %d validation retries",
+            stats.name,
+            stats.requests,
+            stats.guided,
+            stats.valid,
+            stats.repaired,
+            stats.invalid,
+            stats.cut_off,
+            stats.retries,
+        )
+
+
+def _output_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _record(stats: SchemaStats, outcome: str, text: str) -> None:
+    setattr(stats, outcome, getattr(stats, outcome) + 1)
+    if outcome == "invalid":
+        logger.debug("Invalid %s output: %.200s", stats.name, text)
+        _invalid_outputs[_output_hash(text)] = None
+        while len(_invalid_outputs) > MAX_INVALID_OUTPUTS:
+            _invalid_outputs.popitem(last=False)
+
+
+def _is_retry(body: dict) -> bool:
+    """Whether the request sends back an invalid output seen earlier, as frameworks do to retry."""
+    items = body.get("input") if isinstance(body.get("input"), list) else []
+    for item in items:
+        if not isinstance(item, dict) or item.get("role") != "assistant":
+            continue
+        content = item.get("content")
+        parts = [content] if isinstance(content, str) else [part.get("text") for part in content or []]
+        for text in parts:
+            if isinstance(text, str) and _output_hash(text) in _invalid_outputs:
+                # Counted once; later turns keep sending the same history
+                del _invalid_outputs[_output_hash(text)]
+                return True
+    return False
+
+
+def _replace_texts(value: Any, repairs: dict[str, str]) -> bool:
+    """Replaces repaired `output_text` parts inside `value`, returning whether any was replaced."""
+    replaced = False
+    if isinstance(value, dict):
+        if value.get("type") == "output_text" and value.get("text") in repairs:
+            value["text"] = repairs[value["text"]]
+            replaced = True
+        for child in value.values():
+            replaced = _replace_texts(child, repairs) or replaced
+    elif isinstance(value, list):
+        for child in value:
+            replaced = _replace_texts(child, repairs) or replaced
+    return replaced
+
+
+class _ValidatingStream(httpx.AsyncByteStream):
+    """Validates the output text deltas of a streamed response and repairs its final events."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, schema: dict, stats: SchemaStats, mode: str):
+        self._stream = stream
+        self._schema = schema
+        self._stats = stats
+        self._repair = mode != "record"
+        self._validators: dict[tuple, IncrementalValidator] = {}
+        self._repairs: dict[str, str] = {}
+        self._buffer = b""
+
+    def _event(self, event: bytes) -> bytes:
+        lines = event.split(b"\n")
+        for index, line in enumerate(lines):
+            if line.startswith(b"data:") and b'"response.' in line:
+                data = json.loads(line[5:])
+                if self._handle(data):
+                    lines[index] = b"data: " + json.dumps(data, ensure_ascii=False).encode()
+        return b"\n".join(lines)
+
+    def _handle(self, data: dict) -> bool:
+        """Checks one event, returning whether it was changed."""
+        event_type = data.get("type")
+        if event_type == "response.output_text.delta":
+            if self._repair:
+                key = (data.get("item_id"), data.get("content_index"))
+                validator = self._validators.setdefault(key, IncrementalValidator(self._schema, lenient=True))
+                try:
+                    validator.feed(data.get("delta", ""))
+                except SchemaViolation as e:
+                    self._stats.cut_off += 1
+                    raise StructuredOutputError(self._stats.name, e) from None
+            return False
+        if event_type == "response.output_text.done":
+            outcome, text = check_output(data.get("text", ""), self._schema, self._repair)
+            _record(self._stats, outcome, data.get("text", ""))
+            if outcome == "repaired":
+                self._repairs[data["text"]] = text
+                data["text"] = text
+                return True
+            return False
+        return bool(self._repairs) and _replace_texts(data, self._repairs)
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._buffer += chunk
+            *events, self._buffer = self._buffer.split(b"\n\n")
+            if events:
+                try:
+                    yield b"".join(self._event(event) + b"\n\n" for event in events)
+                except StructuredOutputError as e:
+                    logger.info("%s", e)
+                    # Closing the connection stops the generation on the server
+                    await self._stream.aclose()
+                    raise
+        if self._buffer:
+            yield self._buffer
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+def _with_body(request: httpx.Request, body: dict) -> httpx.Request:
+    headers = [(name, value) for name, value in request.headers.multi_items() if name.lower() != "content-length"]
+    return httpx.Request(
+        request.method,
+        request.url,
+        headers=headers,
+        content=json.dumps(body, ensure_ascii=False).encode(),
+        extensions=request.extensions,
+    )
+
+
+class StructuredOutputTransport(httpx.AsyncBaseTransport):
+    """Validates, repairs and asks for guided decoding of `json_schema` outputs of `POST .../responses` calls."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, mode: str = "on"):
+        if mode not in ("record", "repair", "on"):
+            raise ValueError(f"StructuredOutputTransport mode must be 'record', 'repair' or 'on', got: {mode}")
+        self._transport = transport
+        self.mode = mode
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/responses"):
+            return await self._transport.handle_async_request(request)
+        body = json.loads(request.content or b"{}")
+        text_format = (body.get("text") or {}).get("format") or {}
+        schema = text_format.get("schema")
+        if text_format.get("type") != "json_schema" or not isinstance(schema, dict):
+            return await self._transport.handle_async_request(request)
+
+        name = text_format.get("name") or "output"
+        stats = _stats.setdefault(name, SchemaStats(name))
+        stats.requests += 1
+        if _is_retry(body):
+            stats.retries += 1
+        nvext = body.get("nvext") or {}
+        if self.mode == "on" and "guided_json" not in nvext:
+            nvext = body["nvext"] = {**nvext, "guided_json": schema}
+            request = _with_body(request, body)
+        if "guided_json" in nvext:
+            stats.guided += 1
+
+        response = await self._transport.handle_async_request(request)
+        encoding = response.headers.get("content-encoding", "identity")
+        if response.status_code != 200:
+            return response
+        if body.get("stream"):
+            if encoding == "identity":
+                response.stream = _ValidatingStream(response.stream, schema, stats, self.mode)
+            return response
+
+        content = await response.aread()
+        await response.aclose()
+        data = json.loads(content)
+        outcomes = []
+        messages = [item for item in data.get("output") or [] if item.get("type") == "message"]
+        for message in messages:
+            for part in message.get("content") or []:
+                if part.get("type") == "output_text":
+                    outcome, text = check_output(part["text"], schema, self.mode != "record")
+                    _record(stats, outcome, part["text"])
+                    outcomes.append(outcome)
+                    part["text"] = text
+        if "repaired" in outcomes:
+            content = json.dumps(data, ensure_ascii=False).encode()
+        # The body is decoded here, so it goes out without its content encoding
+        headers = [
+            (key, value)
+            for key, value in response.headers.multi_items()
+            if key.lower() not in ("content-length", "content-encoding")
+        ]
+        if outcomes:
+            headers.append((OUTCOME_HEADER, ",".join(outcomes)))
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request, extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def structured_output_mode(env: Mapping[str, str]) -> str | None:
+    """The `NIM_STRUCTURED_OUTPUT` mode for `StructuredOutputTransport`, or None when it is off."""
+    mode = env.get("NIM_STRUCTURED_OUTPUT", "off").strip().lower() or "off"
+    if mode not in MODES:
+        raise ValueError(f"NIM_STRUCTURED_OUTPUT must be one of {MODES}, got: {mode}")
+    return None if mode == "off" else mode
+
+
+if __name__ == "__main__":
+    import asyncio
+    import os
+
+    from dotenv import load_dotenv
+    from pydantic import BaseModel, Field, ValidationError
+
+    load_dotenv(override=True)
+    logging.basicConfig(level=logging.WARNING)
+
+    class LabelOutput(BaseModel):
+        url: str = Field(description="URL of the issue")
+        title: str = Field(description="Title of the issue")
+        label: str = Field(description="Label to apply to the issue")
+        reasoning: str = Field(description="Reasoning behind the label decision")
+
+    schema = {**LabelOutput.model_json_schema(), "additionalProperties": False}
+    text_format = {"format": {"type": "json_schema", "name": "LabelOutput", "schema": schema, "strict": True}}
+
+    async def label(client, stream: bool) -> str:
+        request = dict(model=os.environ["NIM_MODEL"], input="Label issue #2759.", text=text_format)
+        if not stream:
+            return (await client.responses.create(**request)).output_text
+        async with await client.responses.create(**request, stream=True) as events:
+            async for event in events:
+                if event.type == "response.completed":
+                    return event.response.output_text
+        return ""
+
+    async def run(mode: str, requests: int) -> None:
+        # Imported by name: as a script this file is `__main__`, the client uses the `structured_output` module
+        from nim_client import create_async_client
+        from structured_output import StructuredOutputError, _stats
+
+        os.environ["NIM_STRUCTURED_OUTPUT"] = mode
+        _stats.clear()
+        client = create_async_client()
+        parsed = failed = 0
+        for index in range(requests):
+            try:
+                LabelOutput.model_validate_json(await label(client, stream=index % 2 == 1))
+                parsed += 1
+            except (ValidationError, StructuredOutputError, ValueError):
+                failed += 1
+        stats = _stats["LabelOutput"]
+        print(
+            f"{mode:>6}: {parsed}/{requests} outputs parsed, {failed} would need another turn "
+            f"({stats.guided} guided, {stats.valid} valid, {stats.repaired} repaired, {stats.invalid} invalid, "
+            f"{stats.cut_off} cut off)"
+        )
+
+    async def main() -> None:
+        for mode in ("record", "repair", "on"):
+            await run(mode, 40)
+
+    asyncio.run(main())
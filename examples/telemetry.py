@@ -0,0 +1,367 @@
+"""OpenTelemetry traces and metrics for the examples' hot paths, without Azure Monitor.
+
+`nim_client` turns this on for every example that uses the shared client, according to
+`NIM_TELEMETRY`:
+    otlp     Export over OTLP/gRPC to `OTEL_EXPORTER_OTLP_ENDPOINT` (default http://localhost:4317),
+             e.g. the collector configured in `otel-collector.yaml`
+    file     Append spans and metrics as JSON lines to `NIM_TELEMETRY_FILE` (default telemetry.jsonl)
+    console  Print spans and metrics to stdout
+The service name is `OTEL_SERVICE_NAME`, or the script's name.
+
+What is recorded:
+    * model calls (`TracingTransport`): one `chat <model>` span per `POST .../responses` with the
+      time to first token of streamed responses, total latency, input/output/reasoning tokens, the
+      response cache outcome, the structured output outcome and a cold-start flag, plus the
+      matching histograms;
+    * tool calls: `execute_tool <name>` spans from `traced_tool` or `tool_span`;
+    * MCP round-trips: `mcp <tool>` spans from `MCPClientPool`;
+    * sub-agents: `invoke_agent <name>` spans from `agent_span` in the supervisors.
+Spans nest through the async context, so a sub-agent span holds its model and tool calls.
+Without `NIM_TELEMETRY` the spans go to OpenTelemetry's no-op provider and cost next to nothing.
+"""
+
+import contextlib
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+from collections.abc import Awaitable, Mapping
+from typing import TypeVar
+
+import httpx
+from nim_warmup import get_cold_start_detector
+from opentelemetry import metrics, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+T = TypeVar("T")
+
+EXPORTERS = ("otlp", "file", "console")
+
+tracer = trace.get_tracer("nim_examples")
+meter = metrics.get_meter("nim_examples")
+
+operation_duration = meter.create_histogram(
+    "gen_ai.client.operation.duration", unit="s", description="Duration of NIM model calls"
+)
+time_to_first_token = meter.create_histogram(
+    "gen_ai.client.time_to_first_token", unit="s", description="Time to the first streamed token of NIM model calls"
+)
+token_usage = meter.create_histogram(
+    "gen_ai.client.token.usage", unit="{token}", description="Tokens used per NIM model call, by token type"
+)
+cold_starts = meter.create_counter("nim.client.cold_starts", description="Model calls that waited for a cold replica")
+tool_duration = meter.create_histogram("agent.tool.duration", unit="s", description="Duration of local tool calls")
+mcp_duration = meter.create_histogram("mcp.client.call.duration", unit="s", description="Duration of MCP tool calls")
+
+_configured: str | None = None
+
+
+def setup_telemetry(exporter: str = "otlp", path: str = "telemetry.jsonl", service_name: str | None = None) -> None:
+    """Installs the global tracer and meter providers, once per process."""
+    global _configured
+    if _configured is not None:
+        return
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        span_exporter, metric_exporter = OTLPSpanExporter(), OTLPMetricExporter()
+    elif exporter == "file":
+        # Left open for the exporters, which write to it until the providers shut down at exit
+        out = open(path, "a", encoding="utf-8")
+        span_exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+        metric_exporter = ConsoleMetricExporter(out=out, formatter=lambda data: data.to_json(indent=None) + "\n")
+    elif exporter == "console":
+        span_exporter, metric_exporter = ConsoleSpanExporter(), ConsoleMetricExporter()
+    else:
+        raise ValueError(f"Telemetry exporter must be one of {EXPORTERS}, got: {exporter}")
+
+    service_name = service_name or os.getenv("OTEL_SERVICE_NAME") or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    resource = Resource.create({"service.name": service_name or "nim-examples"})
+    tracer_provider = TracerProvider(resource=resource)
+    tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(tracer_provider)
+    metrics.set_meter_provider(
+        MeterProvider(resource=resource, metric_readers=[PeriodicExportingMetricReader(metric_exporter)])
+    )
+    _configured = exporter
+
+
+def telemetry_from_env(env: Mapping[str, str]) -> bool:
+    """Sets up telemetry as configured by `NIM_TELEMETRY`, returning whether it is on."""
+    exporter = env.get("NIM_TELEMETRY", "").strip().lower()
+    if exporter in ("", "off", "false", "0"):
+        return False
+    setup_telemetry(exporter, path=env.get("NIM_TELEMETRY_FILE", "telemetry.jsonl"))
+    return True
+
+
+@contextlib.contextmanager
+def tool_span(name: str):
+    """Traces one local tool call."""
+    started = time.perf_counter()
+    with tracer.start_as_current_span(
+        f"execute_tool {name}", attributes={"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": name}
+    ) as span:
+        try:
+            yield span
+        finally:
+            tool_duration.record(time.perf_counter() - started, {"gen_ai.tool.name": name})
+
+
+def traced_tool(func):
+    """Wraps a sync or async tool in a `tool_span`, keeping its name, docstring and signature."""
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with tool_span(func.__name__):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with tool_span(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def agent_span(name: str):
+    """Traces a (sub-)agent run; the model and tool calls made inside it become its children."""
+    with tracer.start_as_current_span(
+        f"invoke_agent {name}", attributes={"gen_ai.operation.name": "invoke_agent", "gen_ai.agent.name": name}
+    ) as span:
+        yield span
+
+
+async def traced_agent_run(name: str, run: Awaitable[T]) -> T:
+    """Awaits an agent run inside an `agent_span`, for runs started concurrently."""
+    with agent_span(name):
+        return await run
+
+
+@contextlib.contextmanager
+def mcp_span(name: str, url: str):
+    """Traces one MCP tool call round-trip."""
+    started = time.perf_counter()
+    with tracer.start_as_current_span(
+        f"mcp {name}", kind=SpanKind.CLIENT, attributes={"gen_ai.tool.name": name, "server.address": url}
+    ) as span:
+        try:
+            yield span
+        finally:
+            mcp_duration.record(time.perf_counter() - started, {"gen_ai.tool.name": name})
+
+
+class _ModelCall:
+    """Span and metrics of one model call, finished when its response body is done."""
+
+    def __init__(self, span: trace.Span, started: float, attributes: dict):
+        self.span = span
+        self.started = started
+        self.attributes = attributes
+        self._finished = False
+
+    def first_token(self) -> None:
+        seconds = time.monotonic() - self.started
+        self.span.set_attribute("gen_ai.response.time_to_first_token_ms", seconds * 1000)
+        time_to_first_token.record(seconds, self.attributes)
+
+    def usage(self, response: dict) -> None:
+        if response.get("id"):
+            self.span.set_attribute("gen_ai.response.id", response["id"])
+        usage = response.get("usage") or {}
+        tokens = {
+            "input": usage.get("input_tokens"),
+            "output": usage.get("output_tokens"),
+            "reasoning": (usage.get("output_tokens_details") or {}).get("reasoning_tokens"),
+        }
+        for token_type, count in tokens.items():
+            if count is not None:
+                self.span.set_attribute(f"gen_ai.usage.{token_type}_tokens", count)
+                token_usage.record(count, {**self.attributes, "gen_ai.token.type": token_type})
+
+    def finish(self, error: BaseException | None = None) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        if error is not None:
+            self.span.record_exception(error)
+            self.span.set_status(Status(StatusCode.ERROR, type(error).__name__))
+        operation_duration.record(time.monotonic() - self.started, self.attributes)
+        self.span.end()
+
+
+class _TracedStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Reads usage (and, for server-sent events, the first token) from the body as it passes through."""
+
+    def __init__(self, stream, call: _ModelCall, streaming: bool):
+        self._stream = stream
+        self._call = call
+        self._streaming = streaming
+        self._buffer = b""
+        self._body: list[bytes] = []
+        self._seen_token = False
+
+    def _scan_events(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            if not line.startswith(b"data:"):
+                continue
+            if not self._seen_token and b'.delta"' in line:
+                self._seen_token = True
+                self._call.first_token()
+            elif b'"response.completed"' in line or b'"response.incomplete"' in line:
+                self._call.usage(json.loads(line[5:]).get("response") or {})
+                # Clients may stop reading here without closing the body
+                self._call.finish()
+
+    def _feed(self, chunk: bytes) -> None:
+        if self._streaming:
+            self._scan_events(chunk)
+        else:
+            self._body.append(chunk)
+
+    def _end(self) -> None:
+        if self._body:
+            with contextlib.suppress(ValueError):
+                self._call.usage(json.loads(b"".join(self._body)))
+        self._call.finish()
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                self._feed(chunk)
+                yield chunk
+        except BaseException as e:
+            self._call.finish(e)
+            raise
+        self._end()
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                self._feed(chunk)
+                yield chunk
+        except BaseException as e:
+            self._call.finish(e)
+            raise
+        self._end()
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._call.finish()
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._call.finish()
+
+
+class TracingTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Records a span and latency/token metrics for each `POST .../responses` call.
+
+    Like `httpx.MockTransport` it serves both clients: it wraps a sync or an async transport.
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+        self._last_activity: float | None = None
+
+    def _cold(self, time_to_headers: float) -> bool:
+        # Same rule as `nim_warmup.ColdStartDetector`, without feeding the examples' own detector
+        detector = get_cold_start_detector()
+        idle = self._last_activity is None or time.monotonic() - self._last_activity > detector.scale_down_after
+        self._last_activity = time.monotonic()
+        return idle and time_to_headers > detector.cold_threshold
+
+    def _start(self, request: httpx.Request) -> tuple[_ModelCall, bool]:
+        try:
+            body = json.loads(request.content or b"{}")
+        except ValueError:
+            body = {}
+        streaming = bool(body.get("stream"))
+        model = body.get("model", "")
+        attributes = {"gen_ai.operation.name": "chat", "gen_ai.request.model": model, "nim.streaming": streaming}
+        span = tracer.start_span(
+            f"chat {model}",
+            kind=SpanKind.CLIENT,
+            attributes={**attributes, "gen_ai.system": "nim", "server.address": request.url.host},
+        )
+        return _ModelCall(span, time.monotonic(), attributes), streaming
+
+    def _traced_stream(self, response: httpx.Response, call: _ModelCall, streaming: bool) -> _TracedStream:
+        span, attributes = call.span, call.attributes
+        time_to_headers = time.monotonic() - call.started
+        cold = self._cold(time_to_headers)
+        span.set_attribute("http.response.status_code", response.status_code)
+        span.set_attribute("nim.cold_start", cold)
+        span.set_attribute("nim.time_to_headers_ms", time_to_headers * 1000)
+        if "x-nim-cache" in response.headers:
+            span.set_attribute("nim.cache", response.headers["x-nim-cache"])
+        if "x-nim-structured-output" in response.headers:
+            span.set_attribute("nim.structured_output", response.headers["x-nim-structured-output"])
+        if "x-nim-reasoning-effort" in response.headers:
+            span.set_attribute("nim.reasoning_effort", response.headers["x-nim-reasoning-effort"])
+        if cold:
+            cold_starts.add(1, attributes)
+        if response.status_code >= 400:
+            span.set_status(Status(StatusCode.ERROR, f"HTTP {response.status_code}"))
+        return _TracedStream(response.stream, call, streaming)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/responses"):
+            return self._transport.handle_request(request)
+        call, streaming = self._start(request)
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException as e:
+            call.finish(e)
+            raise
+        traced = self._traced_stream(response, call, streaming)
+        if isinstance(response.stream, httpx.ByteStream):
+            # Built from bytes (cache hits, rewritten bodies) and already read, so the client never iterates it
+            for _ in traced:
+                pass
+        else:
+            response.stream = traced
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/responses"):
+            return await self._transport.handle_async_request(request)
+        call, streaming = self._start(request)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException as e:
+            call.finish(e)
+            raise
+        traced = self._traced_stream(response, call, streaming)
+        if isinstance(response.stream, httpx.ByteStream):
+            # Built from bytes (cache hits, rewritten bodies) and already read, so the client never iterates it
+            async for _ in traced:
+                pass
+        else:
+            response.stream = traced
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
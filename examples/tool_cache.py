@@ -0,0 +1,181 @@
+"""Memoization for deterministic agent tools.
+
+`cached_tool` caches a tool's result per argument set with a TTL and a size-bounded LRU. Concurrent
+identical calls share one execution (single flight). The wrapper keeps the tool's name, docstring
+and signature, so it works as a plain function tool for PydanticAI and Agent Framework and under
+`@function_tool` for OpenAI Agents:
+
+    @function_tool
+    @cached_tool(ttl=600)
+    def get_weather(city: str) -> dict: ...
+
+Hit and miss counters are available per tool through `wrapper.cache.stats()` or `cache_stats()`.
+"""
+
+import asyncio
+import concurrent.futures
+import copy
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+_MISSING = object()
+
+
+class ToolCache:
+    """TTL + LRU result cache for one tool, with single-flight for concurrent identical calls."""
+
+    def __init__(self, name: str, ttl: float = 300.0, maxsize: int = 128):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._async_inflight: dict[str, asyncio.Future] = {}
+        self._sync_inflight: dict[str, concurrent.futures.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value, or `_MISSING` when absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    async def call_async(self, key: str, compute: Callable[[], Any]) -> Any:
+        while True:
+            value = self.get(key)
+            if value is not _MISSING:
+                return value
+            inflight = self._async_inflight.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                return copy.deepcopy(await asyncio.shield(inflight))
+            except asyncio.CancelledError:
+                # Only the call that computes it was cancelled: the next waiter takes over
+                if not inflight.cancelled():
+                    raise
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._async_inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it
+            future.exception()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._async_inflight[key]
+
+    def call_sync(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            inflight = self._sync_inflight.get(key)
+            if inflight is None:
+                self.misses += 1
+                future = self._sync_inflight[key] = concurrent.futures.Future()
+            else:
+                self.coalesced += 1
+        if inflight is not None:
+            return copy.deepcopy(inflight.result())
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._sync_inflight[key]
+
+
+_caches: dict[str, ToolCache] = {}
+
+
+def cache_stats() -> dict[str, dict]:
+    """Counters of every cached tool in the process, by module and tool name, e.g. `pydanticai_tools.get_weather`."""
+    return {name: cache.stats() for name, cache in sorted(_caches.items())}
+
+
+def cached_tool(ttl: float = 300.0, maxsize: int = 128):
+    """Caches a sync or async tool's results per argument set for `ttl` seconds, keeping at most `maxsize`."""
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        # Several examples define a tool with the same name, so the module is part of the key
+        name = f"{func.__module__}.{func.__qualname__}"
+        cache = _caches[name] = ToolCache(name, ttl=ttl, maxsize=maxsize)
+
+        def make_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return json.dumps(bound.arguments, sort_keys=True, default=repr)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await cache.call_async(make_key(args, kwargs), lambda: func(*args, **kwargs))
+
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.call_sync(make_key(args, kwargs), lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator